@@ -0,0 +1,185 @@
+"""API JSON de la bibliothèque (préfixe ``/api``), pour les scripts d'automatisation.
+
+- ``GET /api/mangas`` : liste paginée par curseur (``?cursor=``,
+  ``?limit=``, ``?q=`` pour la recherche plein texte) ; ``?fields=`` limite
+  les champs renvoyés (et les colonnes lues), ``id`` est toujours inclus ;
+- ``GET /api/mangas/<id>`` : un titre, avec ``?fields=`` aussi ;
+- ``POST /api/mangas/chapters`` : ``{"updates": [{"id": 1, "chapitre": "12"}, ...]}``
+  (``chapitre`` en texte ou en entier), met à jour le dernier chapitre de
+  plusieurs titres en une transaction ;
+- ``POST /api/mangas/refresh`` : ``{"ids": [1, 2, ...]}``, programme leur
+  rafraîchissement dans la file de jobs (un seul commit) ; les entrées
+  manuelles, sans page à relire, sont ignorées et listées dans
+  ``not_pollable``.
+
+Les lots sont tout ou rien : un id inconnu renvoie 404 avec la liste des
+ids manquants, et rien n'est modifié. Les lectures portent un ETag dérivé de
+la version de la bibliothèque (voir pagecache.py) : un client qui revalide
+reçoit un 304. Les erreurs sont en JSON : ``{"error": "..."}``.
+"""
+from flask import Blueprint, abort, current_app, jsonify, request
+from sqlalchemy.orm import load_only
+from werkzeug.exceptions import HTTPException
+
+from chapters import ORIGIN_MANUAL, record_chapter
+from jobs import KIND_REFRESH, enqueue_many
+from models import db, Manga
+from pagecache import library_version, make_etag, not_modified, set_validators
+from pagination import clamp_page_size, keyset_page
+from scheduler import is_pollable
+from search import search_page
+
+# Champs exposés, dans l'ordre des réponses
+MANGA_FIELDS = ("id", "titre", "dernier_chapitre", "url", "image_couverture", "resume", "source",
+                "date_ajout", "date_maj")
+# Éléments maximum d'une requête par lot
+MAX_BATCH_SIZE = 500
+
+api = Blueprint("api", __name__, url_prefix="/api")
+
+
+@api.errorhandler(HTTPException)
+def _json_error(e):
+    body = {"error": e.description}
+    body.update(getattr(e, "details", None) or {})
+    return jsonify(body), e.code
+
+
+def _abort(code, message, **details):
+    try:
+        abort(code, description=message)
+    except HTTPException as e:
+        e.details = details
+        raise
+
+
+def manga_to_dict(manga, fields=MANGA_FIELDS):
+    data = {}
+    for field in fields:
+        value = getattr(manga, field)
+        data[field] = value.isoformat() if hasattr(value, "isoformat") else value
+    return data
+
+
+def _requested_fields():
+    """Champs de ?fields= (tous par défaut), dans l'ordre de MANGA_FIELDS"""
+    raw = request.args.get("fields")
+    if not raw:
+        return MANGA_FIELDS
+    wanted = {field.strip() for field in raw.split(",") if field.strip()}
+    unknown = sorted(wanted - set(MANGA_FIELDS))
+    if unknown:
+        _abort(400, f"Champ(s) inconnu(s) : {', '.join(unknown)}", fields=list(MANGA_FIELDS))
+    return tuple(field for field in MANGA_FIELDS if field in wanted or field == "id")
+
+
+def _conditional(*parts):
+    """``(etag, date, réponse 304 ou None)`` d'une lecture"""
+    version, last_modified = library_version()
+    etag = make_etag(version, "api", request.path, *parts)
+    return etag, last_modified, not_modified(etag, last_modified)
+
+
+@api.route("/mangas")
+def list_mangas():
+    fields = _requested_fields()
+    q = request.args.get("q", "").strip()
+    cursor = request.args.get("cursor")
+    limit = clamp_page_size(request.args.get("limit"), current_app.config["LIBRARY_PAGE_SIZE"],
+                            current_app.config["LIBRARY_MAX_PAGE_SIZE"])
+    etag, last_modified, response = _conditional(fields, q, cursor, limit)
+    if response is not None:
+        return response
+    try:
+        if q:
+            mangas, next_cursor = search_page(q, cursor, limit)
+        else:
+            # Seulement les colonnes demandées, plus celles du curseur
+            columns = {getattr(Manga, field) for field in set(fields) | {"id", "date_maj"}}
+            mangas, next_cursor = keyset_page(Manga.query.options(load_only(*columns)), cursor, limit)
+    except ValueError as e:
+        _abort(400, str(e))
+    return set_validators(jsonify({
+        "items": [manga_to_dict(manga, fields) for manga in mangas],
+        "next_cursor": next_cursor,
+    }), etag, last_modified)
+
+
+@api.route("/mangas/<int:manga_id>")
+def get_manga(manga_id):
+    fields = _requested_fields()
+    etag, last_modified, response = _conditional(fields)
+    if response is not None:
+        return response
+    manga = db.session.get(Manga, manga_id)
+    if manga is None:
+        _abort(404, f"Manga #{manga_id} introuvable")
+    return set_validators(jsonify(manga_to_dict(manga, fields)), etag, last_modified)
+
+
+def _json_list(key):
+    body = request.get_json(silent=True)
+    items = body.get(key) if isinstance(body, dict) else None
+    if not isinstance(items, list) or not items:
+        _abort(400, f'Corps JSON attendu : {{"{key}": [...]}}')
+    if len(items) > MAX_BATCH_SIZE:
+        _abort(413, f"Lot trop grand : {len(items)} éléments (maximum {MAX_BATCH_SIZE})")
+    return items
+
+
+def _load_all(ids):
+    """Mangas des ids demandés, ou 404 avec les ids inconnus"""
+    mangas = {manga.id: manga for manga in Manga.query.filter(Manga.id.in_(ids))}
+    missing = [manga_id for manga_id in ids if manga_id not in mangas]
+    if missing:
+        _abort(404, "Manga(s) introuvable(s)", missing=missing)
+    return mangas
+
+
+@api.route("/mangas/chapters", methods=["POST"])
+def update_chapters():
+    """Dernier chapitre de plusieurs titres, en une transaction"""
+    updates = {}
+    for item in _json_list("updates"):
+        manga_id = item.get("id") if isinstance(item, dict) else None
+        chapitre = item.get("chapitre") if isinstance(item, dict) else None
+        # Texte ou entier seulement : null, booléens, flottants et listes sont refusés
+        if isinstance(chapitre, int) and not isinstance(chapitre, bool):
+            chapitre = str(chapitre)
+        chapitre = chapitre.strip() if isinstance(chapitre, str) else ""
+        if not isinstance(manga_id, int) or isinstance(manga_id, bool) or not chapitre:
+            _abort(400, 'Chaque mise à jour doit avoir un "id" entier et un "chapitre" non vide', item=item)
+        if manga_id in updates:
+            _abort(400, f"Manga #{manga_id} présent plusieurs fois dans le lot")
+        updates[manga_id] = chapitre
+
+    mangas = _load_all(list(updates))
+    updated = []
+    for manga_id, chapitre in updates.items():
+        manga = mangas[manga_id]
+        if chapitre == manga.dernier_chapitre:
+            continue
+        record_chapter(manga, chapitre, ORIGIN_MANUAL)
+        manga.dernier_chapitre = chapitre
+        updated.append(manga_id)
+    db.session.commit()
+    return jsonify({
+        "updated": updated,
+        "unchanged": [manga_id for manga_id in updates if manga_id not in updated],
+    })
+
+
+@api.route("/mangas/refresh", methods=["POST"])
+def refresh_mangas():
+    """Programme le rafraîchissement de plusieurs titres (jobs déjà actifs et
+    entrées manuelles ignorés)"""
+    ids = _json_list("ids")
+    if not all(isinstance(manga_id, int) and not isinstance(manga_id, bool) for manga_id in ids):
+        _abort(400, '"ids" doit être une liste d\'entiers')
+    ids = list(dict.fromkeys(ids))
+    mangas = _load_all(ids)
+    not_pollable = [manga_id for manga_id in ids if not is_pollable(mangas[manga_id].url)]
+    created = enqueue_many((KIND_REFRESH, mangas[manga_id].url, manga_id) for manga_id in ids
+                           if manga_id not in not_pollable)
+    return jsonify({"requested": len(ids), "enqueued": created, "skipped": len(ids) - created,
+                    "not_pollable": not_pollable}), 202
@@ -1,9 +1,29 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
-from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, abort, Response, stream_with_context, send_from_directory, make_response, session
+from markupsafe import Markup
+from datetime import datetime, timedelta
+import logging
 import os
-from werkzeug.utils import secure_filename
-from scraper.scraper import scrape_manga_info
+from functools import wraps
+import click
+from scraper.urls import chapter_from_url, slug_title_from_url, title_from_url
+from scraper.cache import cache_stats
+from scraper.logs import configure_logging
+from scraper.ratelimit import limiter_stats
+from scraper.session import pool_stats
+from models import db, Manga
+from api import api
+from dbengine import DEFAULT_PRAGMAS, DEFAULT_READERS, db_stats, init_database
+from covers import FILE_NAME_RE, configure_covers, cover_stats, enforce_cover_quota, get_cover_store, warm_cover
+from uploads import collect_orphans, migrate_legacy_uploads, reconcile_references, save_upload, upload_stats
+from library_io import DEFAULT_IMPORT_BATCH_SIZE, FORMATS, SCRAPE_MODES, guess_format, import_library, iter_export
+from chapters import ORIGIN_MANUAL, chapters_since, delete_history, manga_history, record_chapter
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, clamp_page_size, keyset_page
+from search import rebuild_search_index, search_page
+from migrations import migrate, migration_status
+from pagecache import DEFAULT_MAX_BYTES as PAGE_CACHE_MAX_BYTES, DEFAULT_TTL as PAGE_CACHE_TTL, configure_page_cache, get_page_cache, library_version, make_etag, not_modified, page_cache_stats, set_validators
+from refresher import BulkRefreshJob, current_job, start_bulk_refresh
+from scheduler import is_pollable, scheduler_stats
+from jobs import KIND_ADD, KIND_REFRESH, Worker, enqueue, find_active, job_states, queue_stats, recent_jobs
 
 # Configuration
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
@@ -14,46 +34,165 @@ ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 os.makedirs(DB_DIR, exist_ok=True)
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-DB_PATH = os.path.join(DB_DIR, "manga.db")
+# MANGATRACKER_DB_PATH : autre base (tests, copie de travail)
+DB_PATH = os.environ.get("MANGATRACKER_DB_PATH") or os.path.join(DB_DIR, "manga.db")
 
 app = Flask(__name__)
-app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{DB_PATH}"
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 app.config["SECRET_KEY"] = "dev-secret-change-me-in-production"
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 app.config["MAX_CONTENT_LENGTH"] = 16 * 1024 * 1024  # 16MB max
+# SQLite : pragmas de chaque connexion (WAL, synchronous...) et taille du pool de lecture
+app.config["SQLITE_PRAGMAS"] = dict(DEFAULT_PRAGMAS)
+app.config["SQLITE_READERS"] = DEFAULT_READERS
+# Rafraîchissement groupé : taille du pool, limite par site et taille des lots
+app.config["REFRESH_MAX_WORKERS"] = 8
+app.config["REFRESH_PER_HOST"] = 2
+app.config["REFRESH_BATCH_SIZE"] = 50
+# Bibliothèque : titres par page (modifiable via ?limit=, borné par le maximum)
+app.config["LIBRARY_PAGE_SIZE"] = DEFAULT_PAGE_SIZE
+app.config["LIBRARY_MAX_PAGE_SIZE"] = MAX_PAGE_SIZE
+# File de scraping : python app.py lance aussi un worker intégré (sinon : python worker.py)
+app.config["JOBS_EMBEDDED_WORKER"] = True
+app.config["JOBS_WORKER_THREADS"] = 2
+# Import en masse : titres par commit
+app.config["IMPORT_BATCH_SIZE"] = DEFAULT_IMPORT_BATCH_SIZE
+# Cache des couvertures : quota disque et durée de cache navigateur des miniatures
+app.config["COVERS_MAX_BYTES"] = 200 * 1024 * 1024
+app.config["COVERS_MAX_AGE"] = 365 * 24 * 3600
+# Cache des pages de la bibliothèque : mémoire maximale et durée de vie d'un rendu
+app.config["PAGE_CACHE_MAX_BYTES"] = PAGE_CACHE_MAX_BYTES
+app.config["PAGE_CACHE_TTL"] = PAGE_CACHE_TTL
 
-db = SQLAlchemy(app)
+# Journalisation configurée par MANGATRACKER_LOG_LEVEL / _LOG_LEVELS / _LOG_FORMAT
+configure_logging()
+logger = logging.getLogger(__name__)
 
-# Modèle de données
-class Manga(db.Model):
-    __tablename__ = "mangas"
-    id = db.Column(db.Integer, primary_key=True)
-    titre = db.Column(db.String(200), nullable=False)
-    dernier_chapitre = db.Column(db.String(50), nullable=False)
-    url = db.Column(db.String(500), nullable=False)
-    image_couverture = db.Column(db.String(500), nullable=True)
-    resume = db.Column(db.Text, nullable=True)
-    source = db.Column(db.String(100), nullable=True)
-    date_ajout = db.Column(db.DateTime, default=datetime.utcnow)
-    date_maj = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-
-    def __repr__(self):
-        return f"<Manga {self.titre} ch.{self.dernier_chapitre}>"
+init_database(app, db, DB_PATH)
+configure_covers(max_bytes=app.config["COVERS_MAX_BYTES"], static_dir=app.static_folder)
+configure_page_cache(max_bytes=app.config["PAGE_CACHE_MAX_BYTES"], ttl=app.config["PAGE_CACHE_TTL"])
+# API JSON (/api/...)
+app.register_blueprint(api)
 
 def allowed_file(filename):
     """Vérifie si le fichier a une extension autorisée"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def _library_page():
+    """Page de la bibliothèque demandée par ?q=, ?cursor= et ?limit="""
+    q = request.args.get("q", "").strip()
+    limit = clamp_page_size(request.args.get("limit"), app.config["LIBRARY_PAGE_SIZE"],
+                            app.config["LIBRARY_MAX_PAGE_SIZE"])
+    cursor = request.args.get("cursor")
+    try:
+        if q:
+            # Recherche plein texte, classée par pertinence
+            mangas, next_cursor = search_page(q, cursor, limit)
+        else:
+            mangas, next_cursor = keyset_page(Manga.query, cursor, limit)
+    except ValueError:
+        abort(400)
+    next_url = None
+    if next_cursor:
+        next_url = url_for("library_page", q=q or None, cursor=next_cursor,
+                           limit=limit if "limit" in request.args else None)
+    return {"mangas": mangas, "q": q, "next_cursor": next_cursor, "next_url": next_url, "limit": limit,
+            "job_states": job_states(mangas), "covers": _cover_urls(mangas)}
+
+def _cover_urls(mangas):
+    """URLs des couvertures de chaque manga : miniatures en cache, sinon le proxy qui les crée"""
+    cached = get_cover_store().lookup_many(m.image_couverture for m in mangas)
+    covers = {}
+    for m in mangas:
+        if not m.image_couverture:
+            continue
+        files = cached.get(m.image_couverture)
+        if files:
+            covers[m.id] = {
+                "webp": url_for("cover_file", name=files["webp"]) if files["webp"] else None,
+                "src": url_for("cover_file", name=files["jpeg"]),
+            }
+        else:
+            covers[m.id] = {"webp": None, "src": url_for("cover_proxy", src=m.image_couverture)}
+    return covers
+
+def _cache_upload(image_url):
+    """Génère tout de suite les miniatures d'une image uploadée"""
+    warm_cover(image_url)
+    enforce_cover_quota()
+
+def _library_key():
+    """Paramètres de la requête qui changent le rendu des cartes"""
+    return (request.args.get("q", "").strip(), request.args.get("cursor"), request.args.get("limit"))
+
+def _library_cards(version):
+    """Cartes de la page demandée (HTML) et leur nombre, rendues ou lues dans le cache"""
+    def render():
+        page = _library_page()
+        return Markup(render_template("_manga_page.html", **page)), len(page["mangas"])
+    return get_page_cache().get_or_render(version, _library_key(), render)
+
+def _wants_fragment():
+    """Action envoyée par la page (fetch) : répondre par la seule carte modifiée"""
+    return request.headers.get("X-Fragment") == "card"
+
+def _fragment_aware(view):
+    """Vue qui répond par une carte ou une redirection selon X-Fragment :
+    ``Vary`` le signale aux caches, qui ne doivent pas servir l'une pour l'autre"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        response = make_response(view(*args, **kwargs))
+        response.vary.add("X-Fragment")
+        return response
+    return wrapper
+
+def _render_card(manga):
+    """Carte HTML d'un manga, comme dans la bibliothèque"""
+    return render_template("_manga_card.html", m=manga, covers=_cover_urls([manga]),
+                           job_states=job_states([manga]))
+
 # Routes
 @app.route("/")
 def index():
-    q = request.args.get("q", "").strip()
-    if q:
-        mangas = Manga.query.filter(Manga.titre.ilike(f"%{q}%")).order_by(Manga.date_maj.desc()).all()
-    else:
-        mangas = Manga.query.order_by(Manga.date_maj.desc()).all()
-    return render_template("index.html", mangas=mangas, q=q)
+    version, last_modified = library_version()
+    job = current_job()
+    bulk_job = job.snapshot() if job else None
+    etag = make_etag(version, "index", _library_key(), bulk_job and (bulk_job["status"], bulk_job["done"]))
+    # Les messages flash ne s'affichent qu'une fois : cette page-là ne se revalide pas
+    revalidate = not session.get("_flashes")
+    if revalidate:
+        response = not_modified(etag, last_modified)
+        if response is not None:
+            return response
+    cards, count = _library_cards(version)
+    active_jobs = len(recent_jobs(active_only=True, polls=False))
+    response = make_response(render_template("index.html", bulk_job=bulk_job, active_jobs=active_jobs,
+                                             cards=cards, has_mangas=count > 0, q=_library_key()[0]))
+    if revalidate:
+        set_validators(response, etag, last_modified)
+    return response
+
+@app.route("/library/page")
+def library_page():
+    """Page suivante de la bibliothèque, en fragment HTML (chargement progressif)"""
+    version, last_modified = library_version()
+    etag = make_etag(version, "page", _library_key())
+    response = not_modified(etag, last_modified)
+    if response is not None:
+        return response
+    cards, _ = _library_cards(version)
+    return set_validators(make_response(cards), etag, last_modified)
+
+@app.route("/card/<int:manga_id>")
+def card(manga_id):
+    """Carte d'un manga en fragment HTML (mise à jour de la page sans rechargement)"""
+    version, last_modified = library_version()
+    etag = make_etag(version, "card", manga_id)
+    response = not_modified(etag, last_modified)
+    if response is not None:
+        return response
+    manga = Manga.query.get_or_404(manga_id)
+    return set_validators(make_response(_render_card(manga)), etag, last_modified)
 
 @app.route("/add", methods=["GET", "POST"])
 def add():
@@ -68,13 +207,9 @@ def add():
         if 'image_file' in request.files:
             file = request.files['image_file']
             if file and file.filename and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                # Ajouter un timestamp pour éviter les collisions
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"{timestamp}_{filename}"
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(filepath)
-                image_url = url_for('static', filename=f'uploads/{filename}')
+                # Stockée sous l'empreinte de son contenu : pas de doublon
+                image_url = save_upload(file)
+                _cache_upload(image_url)
         
         # Si pas d'URL fournie, créer manuellement
         if not url and titre_manuel:
@@ -87,6 +222,7 @@ def add():
                 source="Manuel",
             )
             db.session.add(manga)
+            record_chapter(manga, manga.dernier_chapitre, ORIGIN_MANUAL)
             db.session.commit()
             flash(f"'{manga.titre}' ajouté manuellement à la bibliothèque !", "success")
             return redirect(url_for("index"))
@@ -96,21 +232,28 @@ def add():
             flash("Merci de fournir une URL ou un titre manuel", "warning")
             return redirect(url_for("add"))
         
+        if find_active(KIND_ADD, url):
+            flash("Cette URL est déjà en cours d'ajout.", "info")
+            return redirect(url_for("index"))
+        
         try:
-            data = scrape_manga_info(url)
+            # Fiche provisoire déduite de l'URL, complétée par le worker
             manga = Manga(
-                titre=data.get("titre", "Manga"),
-                dernier_chapitre=str(data.get("chapitre", "1")),
+                titre=title_from_url(url) or slug_title_from_url(url) or "Manga",
+                dernier_chapitre=chapter_from_url(url),
                 url=url,
-                image_couverture=image_url or data.get("image"),  # Priorité à l'image uploadée
-                resume=data.get("resume"),
-                source=data.get("source"),
+                image_couverture=image_url,  # Priorité à l'image uploadée
             )
             db.session.add(manga)
-            db.session.commit()
-            flash(f"'{manga.titre}' ajouté à la bibliothèque !", "success")
+            db.session.flush()
+            job, created = enqueue(KIND_ADD, url, manga_id=manga.id)
+            if created:
+                flash(f"'{manga.titre}' ajouté, récupération des informations en cours…", "success")
+            else:
+                flash("Cette URL est déjà en cours d'ajout.", "info")
             return redirect(url_for("index"))
         except Exception as e:
+            db.session.rollback()
             flash(f"Erreur lors de l'ajout : {e}", "danger")
             return redirect(url_for("add"))
     
@@ -123,7 +266,10 @@ def edit(manga_id):
     
     if request.method == "POST":
         manga.titre = request.form.get("titre", manga.titre).strip()
-        manga.dernier_chapitre = request.form.get("chapitre", manga.dernier_chapitre).strip()
+        chapitre = request.form.get("chapitre", manga.dernier_chapitre).strip()
+        if chapitre and chapitre != manga.dernier_chapitre:
+            record_chapter(manga, chapitre, ORIGIN_MANUAL)
+        manga.dernier_chapitre = chapitre or manga.dernier_chapitre
         manga.url = request.form.get("url", manga.url).strip()
         manga.resume = request.form.get("resume", manga.resume)
         
@@ -131,12 +277,8 @@ def edit(manga_id):
         if 'image_file' in request.files:
             file = request.files['image_file']
             if file and file.filename and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"{timestamp}_{filename}"
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(filepath)
-                manga.image_couverture = url_for('static', filename=f'uploads/{filename}')
+                manga.image_couverture = save_upload(file)
+                _cache_upload(manga.image_couverture)
         
         # Option pour supprimer l'image
         if request.form.get("remove_image"):
@@ -149,70 +291,302 @@ def edit(manga_id):
     return render_template("edit.html", manga=manga)
 
 @app.route("/update/<int:manga_id>", methods=["POST"])
+@_fragment_aware
 def update(manga_id):
     manga = Manga.query.get_or_404(manga_id)
     nouveau_chap = request.form.get("chapitre", "").strip()
     
     if not nouveau_chap:
+        if _wants_fragment():
+            return "Veuillez saisir un numéro de chapitre.", 400
         flash("Veuillez saisir un numéro de chapitre.", "warning")
         return redirect(url_for("index"))
     
+    if nouveau_chap != manga.dernier_chapitre:
+        record_chapter(manga, nouveau_chap, ORIGIN_MANUAL)
     manga.dernier_chapitre = nouveau_chap
     db.session.commit()
+    if _wants_fragment():
+        return _render_card(manga)
     flash("Chapitre mis à jour !", "success")
     return redirect(url_for("index"))
 
 @app.route("/refresh/<int:manga_id>", methods=["POST"])
+@_fragment_aware
 def refresh(manga_id):
     """Re-scrape la page pour mettre à jour les informations"""
     manga = Manga.query.get_or_404(manga_id)
     
+    if not is_pollable(manga.url):
+        # Entrée manuelle : pas de page à relire, le job ne pourrait qu'échouer
+        if _wants_fragment():
+            return "Ce manga n'a pas d'URL à rafraîchir.", 400
+        flash("Ce manga n'a pas d'URL à rafraîchir.", "info")
+        return redirect(url_for("index"))
+    
     try:
-        data = scrape_manga_info(manga.url)
-        manga.titre = data.get("titre", manga.titre)
-        
-        # Ne pas écraser l'image uploadée manuellement
-        if not manga.image_couverture or not manga.image_couverture.startswith('/static/uploads/'):
-            manga.image_couverture = data.get("image", manga.image_couverture)
-        
-        # Mise à jour du chapitre si supérieur
-        old = manga.dernier_chapitre
-        new = str(data.get("chapitre", old))
-        try:
-            if float(new) > float(old):
-                manga.dernier_chapitre = new
-        except ValueError:
-            manga.dernier_chapitre = new
-        
-        manga.resume = data.get("resume", manga.resume)
-        manga.source = data.get("source", manga.source)
-        db.session.commit()
-        flash("Manga rafraîchi avec succès !", "success")
+        job, created = enqueue(KIND_REFRESH, manga.url, manga_id=manga.id)
+        if _wants_fragment():
+            # Le badge de la carte indique le job, créé ou déjà en cours
+            return _render_card(manga)
+        if created:
+            flash("Rafraîchissement programmé.", "info")
+        else:
+            flash("Un rafraîchissement est déjà en cours pour ce manga.", "info")
     except Exception as e:
+        if _wants_fragment():
+            return f"Erreur lors du rafraîchissement : {e}", 500
         flash(f"Erreur lors du rafraîchissement : {e}", "danger")
     
     return redirect(url_for("index"))
 
+@app.route("/chapters/new")
+def new_chapters():
+    """Chapitres découverts depuis ?since= (date ISO) ou les ?hours= dernières heures (24 par défaut)"""
+    try:
+        if request.args.get("since"):
+            since = datetime.fromisoformat(request.args["since"])
+        else:
+            since = datetime.utcnow() - timedelta(hours=float(request.args.get("hours", 24)))
+    except (ValueError, OverflowError):
+        abort(400)
+    rows = chapters_since(since, limit=clamp_page_size(request.args.get("limit"), 100, 500))
+    return jsonify({
+        "since": since.isoformat(),
+        "chapters": [dict(chapter.to_dict(), titre=manga.titre, url=manga.url) for chapter, manga in rows],
+    })
+
+@app.route("/chapters/<int:manga_id>")
+def chapter_history(manga_id):
+    """Historique des chapitres observés d'un manga"""
+    manga = Manga.query.get_or_404(manga_id)
+    return jsonify({"manga_id": manga.id, "titre": manga.titre, "dernier_chapitre": manga.dernier_chapitre,
+                    "chapters": [chapter.to_dict() for chapter in manga_history(manga.id)]})
+
+@app.route("/covers/<name>")
+def cover_file(name):
+    """Miniature en cache : nom = empreinte du contenu, donc cache navigateur illimité"""
+    if not FILE_NAME_RE.match(name):
+        abort(404)
+    response = send_from_directory(get_cover_store().directory, name, max_age=app.config["COVERS_MAX_AGE"])
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+@app.route("/covers/proxy")
+def cover_proxy():
+    """Crée la miniature d'une couverture au premier affichage, puis redirige vers elle.
+
+    Seules les images d'un manga de la bibliothèque sont acceptées : ce
+    n'est pas un proxy ouvert.
+    """
+    src = request.args.get("src", "")
+    if not src or not db.session.query(Manga.id).filter_by(image_couverture=src).first():
+        abort(404)
+    files = get_cover_store().ingest(src)
+    if files is None:
+        # Échec (image introuvable, format inconnu) : l'image d'origine, sans cache
+        response = redirect(src)
+        response.cache_control.no_store = True
+        return response
+    enforce_cover_quota()
+    accepts_webp = "image/webp" in request.headers.get("Accept", "")
+    return redirect(url_for("cover_file", name=files["webp"] if accepts_webp and files["webp"] else files["jpeg"]))
+
+@app.route("/export.<fmt>")
+def export_library(fmt):
+    """Export de la bibliothèque en flux (CSV ou JSON Lines, ?history=1 pour l'historique)"""
+    if fmt not in FORMATS:
+        abort(404)
+    history = request.args.get("history") == "1"
+    mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    filename = f"mangatracker-{datetime.now():%Y%m%d}.{fmt}"
+    return Response(stream_with_context(iter_export(fmt, history=history)),
+                    mimetype=f"{mimetype}; charset=utf-8",
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+@app.route("/import", methods=["POST"])
+def import_route():
+    """Import CSV / JSON Lines : fichier "file" d'un formulaire, ou corps de la requête.
+
+    ?format= (sinon déduit du nom ou du type), ?scrape=missing|all|none.
+    Renvoie le rapport d'import en JSON.
+    """
+    upload = request.files.get("file")
+    if upload is not None:
+        stream, fmt = upload.stream, guess_format(upload.filename, upload.mimetype)
+    else:
+        stream, fmt = request.stream, guess_format(content_type=request.content_type)
+    fmt = request.args.get("format") or fmt
+    scrape = request.args.get("scrape", "missing")
+    if fmt not in FORMATS or scrape not in SCRAPE_MODES:
+        return jsonify({"error": "format (csv, jsonl) ou mode de scraping (missing, all, none) invalide"}), 400
+    report = import_library(stream, fmt, scrape=scrape, batch_size=app.config["IMPORT_BATCH_SIZE"])
+    return jsonify(report.to_dict())
+
+@app.route("/jobs")
+def jobs_status():
+    """Derniers jobs de scraping (?active=1 : seulement ceux en file ou en cours ;
+    ?polls=0 : sans les vérifications périodiques)"""
+    active_only = request.args.get("active") == "1"
+    polls = request.args.get("polls") != "0"
+    jobs = recent_jobs(limit=clamp_page_size(request.args.get("limit"), 50, 200), active_only=active_only,
+                       polls=polls)
+    return jsonify({"counts": queue_stats(polls=polls), "jobs": [job.to_dict() for job in jobs]})
+
+def _bulk_refresh_options():
+    return {
+        "max_workers": app.config["REFRESH_MAX_WORKERS"],
+        "per_host": app.config["REFRESH_PER_HOST"],
+        "batch_size": app.config["REFRESH_BATCH_SIZE"],
+    }
+
+@app.route("/refresh-all", methods=["POST"])
+def refresh_all():
+    """Lance le rafraîchissement groupé de toute la bibliothèque en arrière-plan"""
+    job, started = start_bulk_refresh(app, **_bulk_refresh_options())
+    if started:
+        flash("Rafraîchissement de la bibliothèque lancé.", "info")
+    else:
+        flash("Un rafraîchissement est déjà en cours.", "warning")
+    return redirect(url_for("index"))
+
+@app.route("/refresh-all/status")
+def refresh_all_status():
+    job = current_job()
+    return jsonify(job.snapshot() if job else {"status": "idle"})
+
+@app.route("/refresh-all/stream")
+def refresh_all_stream():
+    """Progression du rafraîchissement groupé en Server-Sent Events"""
+    job = current_job()
+    if job is None:
+        return Response("data: {\"status\": \"idle\"}\n\n", mimetype="text/event-stream")
+    return Response(stream_with_context(job.iter_sse()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route("/stats")
+def stats():
+    """Métriques internes (réutilisation des connexions HTTP, ...)"""
+    return jsonify({
+        "database": db_stats(),
+        "page_cache": page_cache_stats(),
+        "http_pool": pool_stats(),
+        "fetch_cache": cache_stats(),
+        "rate_limits": limiter_stats(),
+        "jobs": queue_stats(),
+        "polling": scheduler_stats(),
+        "covers": cover_stats(),
+        "uploads": upload_stats(),
+    })
+
 @app.route("/delete/<int:manga_id>", methods=["POST"])
+@_fragment_aware
 def delete(manga_id):
     manga = Manga.query.get_or_404(manga_id)
     
-    # Supprimer l'image uploadée si elle existe
-    if manga.image_couverture and manga.image_couverture.startswith('/static/uploads/'):
-        try:
-            filename = manga.image_couverture.split('/')[-1]
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            if os.path.exists(filepath):
-                os.remove(filepath)
-        except Exception as e:
-            print(f"Erreur lors de la suppression de l'image : {e}")
-    
+    # L'image uploadée perd une référence ; le worker la supprime si plus
+    # aucun manga ne l'utilise (voir uploads.py)
+    delete_history(manga.id)
     db.session.delete(manga)
     db.session.commit()
+    if _wants_fragment():
+        return "", 204
     flash("Manga supprimé.", "info")
     return redirect(url_for("index"))
 
+@app.cli.command("refresh-all")
+@click.option("--workers", type=int, default=None, help="Nombre de requêtes simultanées")
+@click.option("--per-host", type=int, default=None, help="Requêtes simultanées max par site")
+@click.option("--batch-size", type=int, default=None, help="Titres par commit")
+def refresh_all_command(workers, per_host, batch_size):
+    """Rafraîchit toute la bibliothèque en affichant la progression."""
+    options = _bulk_refresh_options()
+    if workers:
+        options["max_workers"] = workers
+    if per_host:
+        options["per_host"] = per_host
+    if batch_size:
+        options["batch_size"] = batch_size
+
+    job = BulkRefreshJob(app, **options).start()
+    for event in job.iter_events():
+        if event and event.get("type") == "item":
+            mark = "✅" if event["ok"] else "❌"
+            label = event.get("titre") or event.get("message", "")
+            click.echo(f"[{event['done']}/{event['total']}] {mark} #{event['manga_id']} {label}")
+    summary = job.snapshot()
+    click.echo(f"Terminé : {summary['done']} titres, {summary['updated']} mis à jour, "
+               f"{summary['errors']} erreurs, {summary['commits']} commits en {summary['elapsed']}s")
+    for host, counts in pool_stats().items():
+        click.echo(f"  {host} : {counts['hits']} connexions réutilisées, {counts['misses']} ouvertes")
+
+@app.cli.command("search-rebuild")
+def search_rebuild_command():
+    """Crée si besoin puis reconstruit l'index de recherche plein texte."""
+    count = rebuild_search_index()
+    if count is None:
+        click.echo("FTS5 indisponible dans ce SQLite : la recherche utilise ILIKE.")
+    else:
+        click.echo(f"Index de recherche reconstruit : {count} titres.")
+
+@app.cli.command("export")
+@click.option("--format", "fmt", type=click.Choice(FORMATS), default="csv")
+@click.option("--history", is_flag=True, help="Inclure l'historique des chapitres (jsonl)")
+@click.option("-o", "--output", type=click.File("w", encoding="utf-8"), default="-", help="Fichier (défaut : sortie standard)")
+def export_command(fmt, history, output):
+    """Exporte la bibliothèque en CSV ou JSON Lines."""
+    for line in iter_export(fmt, history=history):
+        output.write(line)
+
+@app.cli.command("import")
+@click.argument("source", type=click.File("rb"))
+@click.option("--format", "fmt", type=click.Choice(FORMATS), default=None, help="Déduit de l'extension par défaut")
+@click.option("--scrape", type=click.Choice(SCRAPE_MODES), default="missing", help="Titres à confier au worker")
+@click.option("--batch-size", type=int, default=None, help="Titres par commit")
+def import_command(source, fmt, scrape, batch_size):
+    """Importe des titres depuis un fichier CSV ou JSON Lines (- : entrée standard)."""
+    fmt = fmt or guess_format(source.name)
+    if fmt is None:
+        raise click.UsageError("Format introuvable : préciser --format csv ou jsonl")
+    migrate()
+    report = import_library(source, fmt, scrape=scrape, batch_size=batch_size or app.config["IMPORT_BATCH_SIZE"])
+    click.echo(f"Import : {report.read} lignes, {report.created} créées, {report.updated} mises à jour, "
+               f"{report.unchanged} inchangées, {report.skipped} ignorées, {report.jobs} jobs de scraping "
+               f"({report.commits} commits).")
+    for error in report.errors:
+        click.echo(f"  ligne {error['line']} : {error['error']}", err=True)
+    if report.jobs:
+        click.echo("Les jobs seront exécutés par le worker (python worker.py).")
+
+@app.cli.command("migrate")
+@click.option("--status", "show_status", is_flag=True, help="Afficher l'état des migrations sans rien appliquer")
+def migrate_command(show_status):
+    """Applique les migrations du schéma qui manquent (voir migrations.py)."""
+    if not show_status:
+        applied = migrate()
+        click.echo(f"Migrations : {len(applied)} appliquée(s)." if applied else "Schéma à jour.")
+    for version, name, state, applied_at in migration_status():
+        click.echo(f"  {version:>3} {state:10} {name}" + (f" ({applied_at})" if applied_at else ""))
+
+@app.cli.command("uploads-migrate")
+def uploads_migrate_command():
+    """Renomme les anciens uploads sous l'empreinte de leur contenu et fusionne les doublons."""
+    renamed, merged = migrate_legacy_uploads()
+    click.echo(f"Uploads : {renamed} renommé(s), {merged} doublon(s) fusionné(s).")
+
+@app.cli.command("uploads-gc")
+@click.option("--now", "immediate", is_flag=True, help="Ignorer le délai de grâce des orphelins")
+def uploads_gc_command(immediate):
+    """Recalcule les références des uploads et supprime les fichiers orphelins."""
+    fixed = reconcile_references()
+    collected = collect_orphans(grace=timedelta(0)) if immediate else collect_orphans()
+    click.echo(f"Uploads : {fixed} compteur(s) corrigé(s), {collected} fichier(s) supprimé(s).")
+
 if __name__ == "__main__":
     with app.app_context():
-        db.create_all()
+        migrate()
+    # Avec le reloader de debug, seul le processus qui sert l'application lance le worker
+    if app.config["JOBS_EMBEDDED_WORKER"] and os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        Worker(app, threads=app.config["JOBS_WORKER_THREADS"]).start()
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,361 @@
+"""Test de charge SQLite : latence des lectures pendant des écritures en masse.
+
+Deux configurations de la même base, remplie de ``--mangas`` titres avec
+leur historique de chapitres :
+
+- ``défaut`` : Flask-SQLAlchemy seul (journal rollback, synchronous=FULL,
+  une connexion par thread, transactions ouvertes par le pilote sqlite3) ;
+- ``optimisé`` : dbengine.init_database (WAL, pragmas, lecteurs en pool et
+  écrivain unique en BEGIN IMMEDIATE).
+
+Pour chacune, des threads lecteurs (l'application web) enchaînent les
+requêtes de la bibliothèque (première page triée par date_maj, titre par
+id) pendant ``--duration`` secondes, d'abord seuls, puis pendant que des
+processus écrivains (worker.py) appliquent des lots de rafraîchissement
+(mise à jour du dernier chapitre et ajout à l'historique, un commit par
+lot).
+
+Une troisième phase, ``rafraîchissement``, lance un rafraîchissement groupé
+(refresher.BulkRefreshJob) de toute la bibliothèque, dont les pages sont
+servies hors ligne par fixture_server.py avec ``--latency`` par réponse,
+pendant que les lecteurs tournent et qu'un thread de l'application met à
+jour un chapitre toutes les 20 ms (route /update) : la durée de ces
+commits montre si le job garde le verrou d'écriture pendant ses scrapings.
+
+Mesures : requêtes/s et latence des lectures (médiane, p95, p99, max),
+lignes écrites/s et durée des commits, erreurs (« database is locked »).
+
+La base est créée dans un répertoire temporaire (``--dir`` pour choisir le
+disque : les fsync coûtent plus cher sur un vrai disque que sur un tmpfs).
+
+Usage : python benchmarks/bench_db.py [--duration 5] [--readers 4] [--writers 2]
+        [--batch 50] [--mangas 2000] [--latency 0.05] [--dir /var/tmp] [--json]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flask import Flask  # noqa: E402
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError  # noqa: E402
+
+from chapters import chapter_sort_key  # noqa: E402
+from covers import configure_covers  # noqa: E402
+from dbengine import init_database  # noqa: E402
+from fixture_server import FixtureServer, load_index, local_url  # noqa: E402
+from migrations import migrate  # noqa: E402
+from models import Chapter, Manga, db  # noqa: E402
+from pagination import keyset_page  # noqa: E402
+from refresher import BulkRefreshJob  # noqa: E402
+from scraper.cache import configure_fetch_cache  # noqa: E402
+from scraper.ratelimit import configure_rate_limits  # noqa: E402
+from scraper.session import close_sessions  # noqa: E402
+
+MODES = ("défaut", "optimisé")
+PHASES = ("repos", "écritures", "rafraîchissement")
+# Pause entre deux mises à jour de l'application pendant le rafraîchissement (s)
+UPDATE_INTERVAL = 0.02
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(seconds):
+    if not seconds:
+        return {"median_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    return {
+        "median_ms": round(statistics.median(seconds) * 1000, 3),
+        "p95_ms": round(percentile(seconds, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(seconds, 0.99) * 1000, 3),
+        "max_ms": round(max(seconds) * 1000, 3),
+    }
+
+
+def create_app(mode, path):
+    app = Flask(f"bench_db_{mode}")
+    if mode == "optimisé":
+        init_database(app, db, path)
+    else:
+        app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+        db.init_app(app)
+    return app
+
+
+def seed(app, mangas):
+    now = datetime.utcnow()
+    # Pages du corpus (servies par fixture_server.py), à tour de rôle
+    urls = [local_url(url) for url in load_index().values()]
+    with app.app_context():
+        migrate()
+        db.session.add_all(
+            Manga(id=i, titre=f"Manga {i}", dernier_chapitre="1", url=urls[i % len(urls)],
+                  source="example.org", date_ajout=now, date_maj=now)
+            for i in range(1, mangas + 1)
+        )
+        db.session.add_all(
+            Chapter(manga_id=i, numero="1", sort_key=1.0, seen_at=now, origin="scrape")
+            for i in range(1, mangas + 1)
+        )
+        db.session.commit()
+        db.session.remove()
+
+
+def _write_loop(mode, path, mangas, batch, offset, step, duration, ready, go, results):
+    """Processus écrivain (comme worker.py) : lots de mises à jour pendant ``duration`` s"""
+    app = create_app(mode, path)
+    rng = random.Random(offset)
+    chapters = {}
+    latencies = []
+    rows = errors = 0
+    # La fenêtre de mesure s'ouvre quand tous les écrivains ont démarré (import, connexion)
+    ready.put(offset)
+    go.wait()
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        ids = rng.sample(range(1, mangas + 1), batch)
+        try:
+            with app.app_context():
+                now = datetime.utcnow()
+                for manga in Manga.query.filter(Manga.id.in_(ids)).all():
+                    # Numéros distincts d'un écrivain à l'autre
+                    numero = chapters.get(manga.id, offset) + step
+                    chapters[manga.id] = numero
+                    manga.dernier_chapitre = str(numero)
+                    db.session.add(Chapter(manga_id=manga.id, numero=str(numero),
+                                           sort_key=chapter_sort_key(str(numero)), seen_at=now))
+                    rows += 2
+                start = time.perf_counter()
+                db.session.commit()
+                latencies.append(time.perf_counter() - start)
+                db.session.remove()
+        except (OperationalError, PoolTimeoutError):
+            errors += 1
+    results.put((latencies, rows, errors))
+
+
+class Load:
+    """Lecteurs (threads) et écrivains (processus) d'une phase, et leurs mesures"""
+
+    def __init__(self, app, mode, path, mangas, batch):
+        self.app = app
+        self.mode = mode
+        self.path = path
+        self.mangas = mangas
+        self.batch = batch
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        self.reads = []
+        self.read_errors = 0
+
+    def read_loop(self):
+        rng = random.Random()
+        latencies = []
+        errors = 0
+        while not self.stop.is_set():
+            start = time.perf_counter()
+            try:
+                with self.app.app_context():
+                    if rng.random() < 0.5:
+                        keyset_page(Manga.query, None, 24)
+                    else:
+                        db.session.get(Manga, rng.randint(1, self.mangas))
+                    db.session.remove()
+            except (OperationalError, PoolTimeoutError):
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+        with self.lock:
+            self.reads.extend(latencies)
+            self.read_errors += errors
+
+    def update_loop(self, latencies, errors):
+        """Mises à jour ponctuelles de l'application (route /update) pendant le rafraîchissement"""
+        rng = random.Random()
+        while not self.stop.is_set():
+            start = time.perf_counter()
+            try:
+                with self.app.app_context():
+                    manga = db.session.get(Manga, rng.randint(1, self.mangas))
+                    manga.dernier_chapitre = str(rng.randint(2, 10 ** 6))
+                    db.session.commit()
+                    db.session.remove()
+                latencies.append(time.perf_counter() - start)
+            except (OperationalError, PoolTimeoutError):
+                errors.append(1)
+            self.stop.wait(UPDATE_INTERVAL)
+
+    def run_refresh(self, readers, batch):
+        """Rafraîchissement groupé de toute la bibliothèque, avec lecteurs et mises à jour"""
+        job = BulkRefreshJob(self.app, batch_size=batch)
+        updates, update_errors = [], []
+        threads = [threading.Thread(target=self.read_loop) for _ in range(readers)]
+        threads.append(threading.Thread(target=self.update_loop, args=(updates, update_errors)))
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        job.run()
+        self.stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        state = job.snapshot()
+        return {
+            "reads_per_s": round(len(self.reads) / elapsed, 1),
+            "read": summarize(self.reads),
+            "read_errors": self.read_errors,
+            # Titres rafraîchis par seconde ; commits : mises à jour de l'application
+            "rows_per_s": round(state["done"] / elapsed, 1),
+            "commit": summarize(updates),
+            "write_errors": len(update_errors) + state["errors"],
+            "refresh": state,
+        }
+
+    def run(self, readers, writers, duration):
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        ready = context.Queue()
+        go = context.Event()
+        processes = [
+            context.Process(target=_write_loop, args=(self.mode, self.path, self.mangas, self.batch,
+                                                      index + 1, writers, duration, ready, go, results))
+            for index in range(writers)
+        ]
+        for process in processes:
+            process.start()
+        for _ in processes:
+            ready.get()
+        threads = [threading.Thread(target=self.read_loop) for _ in range(readers)]
+        go.set()
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        self.stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        commits = []
+        rows = write_errors = 0
+        for _ in processes:
+            latencies, written, errors = results.get()
+            commits.extend(latencies)
+            rows += written
+            write_errors += errors
+        for process in processes:
+            process.join()
+        return {
+            "reads_per_s": round(len(self.reads) / elapsed, 1),
+            "read": summarize(self.reads),
+            "read_errors": self.read_errors,
+            "rows_per_s": round(rows / duration, 1) if writers else None,
+            "commit": summarize(commits) if writers else None,
+            "write_errors": write_errors if writers else None,
+        }
+
+
+def run_mode(mode, directory, args):
+    path = os.path.join(directory, f"bench_{MODES.index(mode)}.db")
+    app = create_app(mode, path)
+    seed(app, args.mangas)
+    results = {}
+    for phase in PHASES:
+        load = Load(app, mode, path, args.mangas, args.batch)
+        if phase == "rafraîchissement":
+            results[phase] = load.run_refresh(args.readers, args.batch)
+            continue
+        writers = args.writers if phase == "écritures" else 0
+        results[phase] = load.run(args.readers, writers, args.duration)
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    return results
+
+
+def print_report(report):
+    meta = report["meta"]
+    print(f"{meta['mangas']} titres  {meta['readers']} lecteurs  {meta['writers']} écrivains  "
+          f"lots de {meta['batch']}  {meta['duration_s']} s par phase  pages servies en {meta['latency_s']} s")
+    print("rafraîchissement : lignes/s = titres rafraîchis/s, commit = mises à jour de l'application")
+    header = (f"{'mode':9} {'phase':16} {'lect/s':>8} {'méd ms':>8} {'p95':>8} {'p99':>8} {'max':>9} "
+              f"{'err':>5} {'lignes/s':>9} {'commit ms':>10} {'p95':>8} {'err':>5}")
+    print(header)
+    print("-" * len(header))
+    for mode, phases in report["modes"].items():
+        for phase, row in phases.items():
+            read = row["read"]
+            commit = row["commit"] or {}
+            print(f"{mode:9} {phase:16} {row['reads_per_s']:>8} {read['median_ms']!s:>8} {read['p95_ms']!s:>8} "
+                  f"{read['p99_ms']!s:>8} {read['max_ms']!s:>9} {row['read_errors']:>5} "
+                  f"{row['rows_per_s'] if row['rows_per_s'] is not None else '-':>9} "
+                  f"{commit.get('median_ms', '-')!s:>10} {commit.get('p95_ms', '-')!s:>8} "
+                  f"{row['write_errors'] if row['write_errors'] is not None else '-':>5}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--duration", type=float, default=5.0, help="durée de chaque phase (s)")
+    parser.add_argument("--readers", type=int, default=4, help="threads lecteurs")
+    parser.add_argument("--writers", type=int, default=2, help="processus écrivains")
+    parser.add_argument("--batch", type=int, default=50, help="titres mis à jour par commit")
+    parser.add_argument("--mangas", type=int, default=2000, help="titres dans la base")
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="délai de chaque page servie pendant le rafraîchissement (s)")
+    parser.add_argument("--mode", choices=MODES, action="append", help="configuration(s) à mesurer")
+    parser.add_argument("--dir", help="répertoire de la base de test")
+    parser.add_argument("--json", action="store_true", help="sortie JSON")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "mangas": args.mangas,
+            "readers": args.readers,
+            "writers": args.writers,
+            "batch": args.batch,
+            "duration_s": args.duration,
+            "latency_s": args.latency,
+        },
+        "modes": {},
+    }
+    directory = tempfile.mkdtemp(prefix="bench_db_", dir=args.dir)
+    server = FixtureServer(latency=args.latency).start()
+    # Rafraîchissement hors ligne : pages et couvertures par le serveur local,
+    # sans cache de pages ni limite de débit, couvertures dans le répertoire de test
+    for name in ("HTTP_PROXY", "http_proxy", "HTTPS_PROXY", "https_proxy"):
+        os.environ[name] = server.proxy_url
+    os.environ.pop("NO_PROXY", None)
+    os.environ.pop("no_proxy", None)
+    configure_fetch_cache(enabled=False)
+    configure_rate_limits(default_rate=1e6, burst=1e6, host_rates={})
+    configure_covers(directory=os.path.join(directory, "covers"))
+    close_sessions()
+    try:
+        for mode in args.mode or MODES:
+            report["modes"][mode] = run_mode(mode, directory, args)
+    finally:
+        server.stop()
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Benchmark du parsing HTML sur les pages enregistrées dans benchmarks/fixtures.
+
+Compare, pour chaque backend disponible, le parsing complet et le parsing
+restreint (SoupStrainer) : temps de parsing, temps total parsing +
+extraction, pic mémoire, et vérifie que le résultat extrait est identique.
+
+Usage : python benchmarks/bench_parse.py [--repeat 20] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from scraper.parsing import available_backends, make_soup  # noqa: E402
+from scraper.scraper import parse_soup, strainer_for  # noqa: E402
+
+FIXTURES_DIR = os.path.join(ROOT, "benchmarks", "fixtures")
+
+
+def load_fixtures():
+    with open(os.path.join(FIXTURES_DIR, "index.json"), encoding="utf-8") as f:
+        index = json.load(f)
+    for name, url in index.items():
+        with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+            yield name, url, f.read()
+
+
+def extract(html, url, backend, restricted):
+    soup = make_soup(html, strainer_for(url) if restricted else None, backend=backend)
+    return soup, parse_soup(soup, url)
+
+
+def measure(html, url, backend, restricted, repeat):
+    parse_times, total_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        soup = make_soup(html, strainer_for(url) if restricted else None, backend=backend)
+        parsed = time.perf_counter()
+        result = parse_soup(soup, url)
+        end = time.perf_counter()
+        parse_times.append(parsed - start)
+        total_times.append(end - start)
+
+    tracemalloc.start()
+    soup, _ = extract(html, url, backend, restricted)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "parse_ms": round(statistics.median(parse_times) * 1000, 3),
+        "total_ms": round(statistics.median(total_times) * 1000, 3),
+        "peak_kib": round(peak / 1024, 1),
+        "nodes": sum(1 for _ in soup.find_all(True)),
+        "result": result,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="sortie JSON")
+    args = parser.parse_args()
+
+    rows = []
+    for name, url, html in load_fixtures():
+        reference = None
+        for backend in available_backends():
+            for restricted in (False, True):
+                stats = measure(html, url, backend, restricted, args.repeat)
+                result = stats.pop("result")
+                if reference is None:
+                    reference = result
+                rows.append({
+                    "fixture": name,
+                    "size_kib": round(len(html.encode("utf-8")) / 1024, 1),
+                    "backend": backend,
+                    "mode": "restreint" if restricted else "complet",
+                    "identical": result == reference,
+                    **stats,
+                })
+
+    if args.json:
+        json.dump(rows, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+        return
+
+    header = f"{'fixture':28} {'Kio':>6} {'backend':12} {'mode':10} {'parse ms':>9} {'total ms':>9} {'pic Kio':>9} {'nœuds':>6}  identique"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(f"{row['fixture']:28} {row['size_kib']:>6} {row['backend']:12} {row['mode']:10} "
+              f"{row['parse_ms']:>9} {row['total_ms']:>9} {row['peak_kib']:>9} {row['nodes']:>6}  "
+              f"{'oui' if row['identical'] else 'NON'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""Benchmark du scraping complet, hors ligne, sur le corpus de benchmarks/fixtures.
+
+Les pages sont servies par fixture_server.py (proxy HTTP local), le
+scraper passe donc par tout son chemin réel : session partagée, limiteur
+de débit, téléchargement, décompression, parsing et extraction. Le cache
+de pages est désactivé et le limiteur relevé pour ne mesurer que le
+scraper.
+
+Mesures :
+
+- par page : latence de téléchargement, de parsing et de
+  ``scrape_manga_info`` de bout en bout (médiane et p95), pic mémoire
+  (tracemalloc) d'un scraping ;
+- débit (pages/s) à plusieurs niveaux de concurrence, en threads avec
+  ``scrape_manga_info`` et, si httpx est installé, avec ``scrape_many_async``.
+
+Le résultat extrait de chaque page est comparé à fixtures/expected.json :
+un benchmark plus rapide mais qui extrait autre chose est signalé.
+``--save`` écrit les mesures en JSON (avec le commit, Python et le parser
+utilisés) ; ``--compare`` affiche l'écart avec un fichier sauvegardé, pour
+comparer deux commits sur la même machine.
+
+Usage : python benchmarks/bench_scrape.py [--repeat 10] [--concurrency 1,2,4,8,16]
+        [--latency 0.02] [--save out.json] [--compare baseline.json] [--json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fixture_server import FIXTURES_DIR, FixtureServer, load_index, local_url  # noqa: E402
+from scraper import parsing  # noqa: E402
+from scraper.async_scraper import httpx, scrape_many_async  # noqa: E402
+from scraper.cache import configure_fetch_cache  # noqa: E402
+from scraper.ratelimit import configure_rate_limits  # noqa: E402
+from scraper.scraper import parse_page, scrape_manga_info  # noqa: E402
+from scraper.session import close_sessions, configure_pools, get_session  # noqa: E402
+
+EXPECTED_PATH = os.path.join(FIXTURES_DIR, "expected.json")
+DEFAULT_CONCURRENCY = "1,2,4,8,16"
+# Nombre de pages scrapées par niveau de concurrence (le corpus est répété)
+THROUGHPUT_PAGES = 112
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(seconds):
+    return {
+        "median_ms": round(statistics.median(seconds) * 1000, 3),
+        "p95_ms": round(percentile(seconds, 0.95) * 1000, 3),
+    }
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ("-dirty" if dirty else "")
+
+
+def setup(server, concurrency):
+    """Oriente le scraper vers le serveur local, sans cache ni limite de débit"""
+    os.environ["HTTP_PROXY"] = os.environ["http_proxy"] = server.proxy_url
+    os.environ.pop("NO_PROXY", None)
+    os.environ.pop("no_proxy", None)
+    configure_fetch_cache(enabled=False)
+    configure_rate_limits(default_rate=1e6, burst=1e6, host_rates={})
+    configure_pools(default=concurrency)
+    close_sessions()
+
+
+# --- Mesures par page ---
+
+def measure_page(url, repeat):
+    session = get_session(url)
+    fetch_times, parse_times, scrape_times = [], [], []
+    size = 0
+    html = ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = session.get(url)
+        response.raise_for_status()
+        html = response.text
+        fetch_times.append(time.perf_counter() - start)
+        size = len(response.content)
+
+        start = time.perf_counter()
+        parse_page(html, url)
+        parse_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        scrape_manga_info(url)
+        scrape_times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = scrape_manga_info(url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "size_kib": round(size / 1024, 1),
+        "fetch": summarize(fetch_times),
+        "parse": summarize(parse_times),
+        "scrape": summarize(scrape_times),
+        "peak_kib": round(peak / 1024, 1),
+    }, result
+
+
+# --- Débit ---
+
+def throughput_threads(urls, concurrency):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(scrape_manga_info, urls))
+    return time.perf_counter() - start, results
+
+
+def throughput_async(urls, concurrency):
+    start = time.perf_counter()
+    results = asyncio.run(scrape_many_async(urls, concurrency=concurrency))
+    return time.perf_counter() - start, results
+
+
+def measure_throughput(server, urls, levels, backends, reference):
+    """Pages/s par backend et concurrence ; un résultat différent de ``reference`` compte comme échec"""
+    rows = {}
+    for backend in backends:
+        run = throughput_threads if backend == "threads" else throughput_async
+        rows[backend] = {}
+        for concurrency in levels:
+            setup(server, concurrency)
+            run(urls[:len(set(urls))], concurrency)  # connexions ouvertes, imports faits
+            elapsed, results = run(urls, concurrency)
+            failures = sum(1 for url, result in zip(urls, results) if result != reference[url])
+            rows[backend][str(concurrency)] = {
+                "pages_per_s": round(len(urls) / elapsed, 1),
+                "elapsed_s": round(elapsed, 3),
+                "failures": failures,
+            }
+    return rows
+
+
+# --- Vérification et comparaison ---
+
+def load_expected():
+    try:
+        with open(EXPECTED_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_expected(results):
+    with open(EXPECTED_PATH, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False, sort_keys=True)
+        f.write("\n")
+
+
+def flatten(report):
+    """Mesures comparables d'un rapport : {clé lisible: (valeur, plus grand = mieux)}"""
+    metrics = {}
+    for name, page in report["pages"].items():
+        for stage in ("fetch", "parse", "scrape"):
+            metrics[f"{name} {stage} médiane ms"] = (page[stage]["median_ms"], False)
+        metrics[f"{name} pic Kio"] = (page["peak_kib"], False)
+    for backend, levels in report["throughput"].items():
+        for concurrency, row in levels.items():
+            metrics[f"débit {backend} x{concurrency} pages/s"] = (row["pages_per_s"], True)
+    return metrics
+
+
+def print_comparison(baseline, report):
+    before, after = flatten(baseline), flatten(report)
+    print(f"\nComparaison avec {baseline['meta'].get('commit')} ({baseline['meta'].get('date')})")
+    for key in ("parser", "latency_ms", "python", "platform"):
+        if baseline["meta"].get(key) != report["meta"].get(key):
+            print(f"attention : {key} différent ({baseline['meta'].get(key)} -> {report['meta'].get(key)})")
+    header = f"{'mesure':60} {'avant':>10} {'après':>10} {'écart':>8}"
+    print(header)
+    print("-" * len(header))
+    for key, (value, higher_is_better) in after.items():
+        if key not in before:
+            continue
+        old = before[key][0]
+        if not old:
+            continue
+        delta = (value - old) / old * 100
+        better = delta > 0 if higher_is_better else delta < 0
+        flag = "" if abs(delta) < 5 else (" +" if better else " -")
+        print(f"{key:60} {old:>10} {value:>10} {delta:>+7.1f}%{flag}")
+
+
+def print_report(report):
+    meta = report["meta"]
+    print(f"commit {meta['commit']}  python {meta['python']}  parser {meta['parser']}  "
+          f"latence {meta['latency_ms']} ms  répétitions {meta['repeat']}")
+    header = (f"{'fixture':28} {'Kio':>6} {'fetch ms':>9} {'p95':>8} {'parse ms':>9} {'p95':>8} "
+              f"{'scrape ms':>10} {'p95':>8} {'pic Kio':>9}  résultat")
+    print(header)
+    print("-" * len(header))
+    for name, page in report["pages"].items():
+        print(f"{name:28} {page['size_kib']:>6} {page['fetch']['median_ms']:>9} {page['fetch']['p95_ms']:>8} "
+              f"{page['parse']['median_ms']:>9} {page['parse']['p95_ms']:>8} {page['scrape']['median_ms']:>10} "
+              f"{page['scrape']['p95_ms']:>8} {page['peak_kib']:>9}  {page['check']}")
+    print()
+    header = f"{'backend':8} {'concurrence':>11} {'pages/s':>9} {'durée s':>9} {'échecs':>7}"
+    print(header)
+    print("-" * len(header))
+    for backend, levels in report["throughput"].items():
+        for concurrency, row in levels.items():
+            print(f"{backend:8} {concurrency:>11} {row['pages_per_s']:>9} {row['elapsed_s']:>9} "
+                  f"{row['failures']:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10, help="mesures par page")
+    parser.add_argument("--concurrency", default=DEFAULT_CONCURRENCY, help="niveaux de concurrence, ex. 1,4,16")
+    parser.add_argument("--pages", type=int, default=THROUGHPUT_PAGES, help="pages scrapées par niveau")
+    parser.add_argument("--latency", type=float, default=0.0, help="délai réseau simulé par réponse (s)")
+    parser.add_argument("--no-async", action="store_true", help="ne pas mesurer le backend async")
+    parser.add_argument("--save", metavar="FICHIER", help="écrit le rapport JSON")
+    parser.add_argument("--compare", metavar="FICHIER", help="rapport de référence à comparer")
+    parser.add_argument("--update-expected", action="store_true", help="réécrit fixtures/expected.json")
+    parser.add_argument("--json", action="store_true", help="sortie JSON")
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    backends = ["threads"] + ([] if args.no_async or httpx is None else ["async"])
+    index = load_index()
+    expected = {} if args.update_expected else load_expected()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parser": parsing.PARSER_BACKEND,
+            "restricted_parsing": parsing.RESTRICTED_PARSING,
+            "latency_ms": round(args.latency * 1000, 1),
+            "repeat": args.repeat,
+            "pages_per_level": args.pages,
+        },
+        "pages": {},
+        "throughput": {},
+    }
+    results = {}
+    mismatches = []
+
+    with FixtureServer(latency=args.latency) as server:
+        setup(server, max(levels))
+        for name, url in index.items():
+            page, result = measure_page(local_url(url), args.repeat)
+            results[name] = result
+            if expected is None:
+                page["check"] = "non vérifié"
+            elif args.update_expected:
+                page["check"] = "enregistré"
+            elif expected.get(name) == result:
+                page["check"] = "ok"
+            else:
+                page["check"] = "DIFFÉRENT"
+                mismatches.append(name)
+            report["pages"][name] = page
+
+        urls = [local_url(url) for url in index.values()]
+        urls = (urls * (args.pages // len(urls) + 1))[:args.pages]
+        reference = {local_url(url): results[name] for name, url in index.items()}
+        report["throughput"] = measure_throughput(server, urls, levels, backends, reference)
+    close_sessions()
+
+    if args.update_expected:
+        save_expected(results)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        print_report(report)
+        if args.compare:
+            with open(args.compare, encoding="utf-8") as f:
+                print_comparison(json.load(f), report)
+        if mismatches:
+            print(f"\nRésultat différent de fixtures/expected.json : {', '.join(mismatches)}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Benchmark de l'analyse d'URLs (numéro de chapitre, titre) sur benchmarks/fixtures/urls.txt.
+
+Compare l'implémentation d'origine (motifs passés à re.search à chaque
+appel) à scraper.urls : motifs précompilés sans mémo (à froid), avec mémo
+(à chaud, le cas du rafraîchissement périodique), et extract_many. Vérifie
+que les résultats sont identiques.
+
+Usage : python benchmarks/bench_urls.py [--repeat 20] [--json]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from urllib.parse import urlparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from scraper import urls  # noqa: E402
+
+CORPUS = os.path.join(ROOT, "benchmarks", "fixtures", "urls.txt")
+
+
+# Implémentation d'origine, gardée comme référence
+def legacy_chapter_from_url(url):
+    patterns = [
+        r"Chapitre[-_](\d+(?:\.\d+)?)",
+        r"chapitre[-_](\d+(?:\.\d+)?)",
+        r"chap(?:itre)?[-_](\d+(?:\.\d+)?)",
+        r"ch(?:apter)?[-_](\d+(?:\.\d+)?)",
+        r"c(\d+(?:\.\d+)?)",
+        r"/(\d+(?:\.\d+)?)/?$",
+    ]
+    for pat in patterns:
+        m = re.search(pat, url, flags=re.IGNORECASE)
+        if m:
+            return m.group(1)
+    nums = re.findall(r"\d+(?:\.\d+)?", url)
+    if nums:
+        return max(nums, key=lambda x: float(x))
+    return "1"
+
+
+def legacy_title_from_url(url):
+    path = urlparse(url).path
+    match = re.search(r'/lecture-en-ligne/([^/]+)', path)
+    if match:
+        title_part = re.sub(r'-Chapitre-\d+.*$', '', match.group(1))
+        title_part = re.sub(r'_\d+\.html$', '', title_part)
+        title = title_part.replace('-', ' ').strip()
+        return title if title else None
+    return None
+
+
+def legacy(corpus):
+    return [(legacy_title_from_url(u), legacy_chapter_from_url(u)) for u in corpus]
+
+
+def cold(corpus):
+    urls.clear_url_cache()
+    return [(urls.title_from_url(u), urls.chapter_from_url(u)) for u in corpus]
+
+
+def warm(corpus):
+    return [(urls.title_from_url(u), urls.chapter_from_url(u)) for u in corpus]
+
+
+def bulk(corpus):
+    return [(info["titre"], info["chapitre"]) for info in urls.extract_many(corpus)]
+
+
+def timed(func, corpus, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(corpus)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="sortie JSON")
+    args = parser.parse_args()
+
+    with open(CORPUS, encoding="utf-8") as f:
+        corpus = [line.strip() for line in f if line.strip()]
+
+    reference_time, reference = timed(legacy, corpus, args.repeat)
+    rows = [{"mode": "origine", "us_per_url": reference_time / len(corpus) * 1e6,
+             "speedup": 1.0, "identical": True}]
+    for mode, func in (("précompilé (froid)", cold), ("mémo (chaud)", warm), ("extract_many", bulk)):
+        elapsed, result = timed(func, corpus, args.repeat)
+        rows.append({
+            "mode": mode,
+            "us_per_url": elapsed / len(corpus) * 1e6,
+            "speedup": reference_time / elapsed,
+            "identical": result == reference,
+        })
+    for row in rows:
+        row["us_per_url"] = round(row["us_per_url"], 2)
+        row["speedup"] = round(row["speedup"], 1)
+
+    if args.json:
+        json.dump({"urls": len(corpus), "results": rows}, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+        return
+
+    print(f"{len(corpus)} URLs")
+    header = f"{'mode':20} {'µs/URL':>8} {'gain':>6}  identique"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        print(f"{row['mode']:20} {row['us_per_url']:>8} {row['speedup']:>5}x  {'oui' if row['identical'] else 'NON'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Serveur HTTP local qui rejoue les pages de benchmarks/fixtures.
+
+Il se comporte comme un proxy HTTP : le scraper garde les vraies URLs des
+pages (le parser de site est choisi d'après l'hôte), seul le schéma passe
+en http://, et ``HTTP_PROXY`` pointe vers ce serveur. Chaque page est
+servie sous son hôte et son chemin d'origine, compressée en gzip si le
+client l'accepte, avec ETag et Last-Modified comme un vrai site.
+
+``latency`` ajoute un délai fixe à chaque réponse pour simuler le réseau ;
+sans lui, le benchmark mesure surtout le coût CPU côté client.
+
+Usage autonome : python benchmarks/fixture_server.py [--port 8765] [--latency 0.05]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_index(fixtures_dir=FIXTURES_DIR):
+    """Pages du corpus : {nom de fichier: URL d'origine}"""
+    with open(os.path.join(fixtures_dir, "index.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def local_url(url):
+    """URL à demander au serveur (même hôte et chemin, en http://)"""
+    parts = urlsplit(url)
+    return parts._replace(scheme="http").geturl()
+
+
+def _route(url):
+    parts = urlsplit(url)
+    return parts.netloc.lower(), parts.path or "/", parts.query
+
+
+class _Page:
+    def __init__(self, body):
+        self.body = body
+        self.gzipped = gzip.compress(body, compresslevel=6, mtime=0)
+        self.etag = '"%s"' % hashlib.sha256(body).hexdigest()[:16]
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FixtureServer/1.0"
+    # En-têtes et corps partent en deux écritures : sans TCP_NODELAY, l'ACK
+    # retardé du client ajouterait ~40 ms à chaque réponse
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        # Requête de proxy : ligne de requête absolue ("GET http://hôte/chemin")
+        target = self.path if "://" in self.path else f"http://{self.headers.get('Host', '')}{self.path}"
+        page = self.server.pages.get(_route(target))
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.server.count()
+        if page is None:
+            self._send(404, b"Not found", "text/plain; charset=utf-8")
+            return
+        if self.headers.get("If-None-Match") == page.etag:
+            self.send_response(304)
+            self.send_header("ETag", page.etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            self._send(200, page.gzipped, "text/html; charset=utf-8",
+                       {"Content-Encoding": "gzip", "ETag": page.etag, "Vary": "Accept-Encoding"})
+        else:
+            self._send(200, page.body, "text/html; charset=utf-8", {"ETag": page.etag})
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Last-Modified", self.server.last_modified)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Les benchmarks à forte concurrence ouvrent beaucoup de connexions d'un coup
+    request_queue_size = 128
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, fixtures_dir=FIXTURES_DIR, verbose=False):
+        super().__init__((host, port), FixtureHandler)
+        self.latency = latency
+        self.verbose = verbose
+        self.requests = 0
+        self._count_lock = threading.Lock()
+        self.last_modified = formatdate(usegmt=True)
+        self.pages = {}
+        for name, url in load_index(fixtures_dir).items():
+            with open(os.path.join(fixtures_dir, name), "rb") as f:
+                self.pages[_route(url)] = _Page(f.read())
+        self._thread = None
+
+    def count(self):
+        with self._count_lock:
+            self.requests += 1
+
+    @property
+    def proxy_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Démarre le serveur dans un thread ; renvoie self"""
+        self._thread = threading.Thread(target=self.serve_forever, name="fixture-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="délai ajouté à chaque réponse (s)")
+    args = parser.parse_args()
+
+    server = FixtureServer(args.host, args.port, latency=args.latency, verbose=True)
+    print(f"{len(server.pages)} pages servies ; export HTTP_PROXY={server.proxy_url}")
+    for name, url in load_index().items():
+        print(f"  {local_url(url)}  ({name})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Génère les pages dérivées du corpus de benchmarks/fixtures.
+
+Les pages enregistrées (scan-manga, anime-sama) servent de base ; ce script
+en dérive, de façon déterministe, les cas extrêmes que le corpus doit
+couvrir : lecteur de chapitre à plusieurs centaines d'images, catalogue
+anime-sama avec toutes ses vignettes d'épisodes, pages de sites
+génériques (article, galerie) et pages de série listant les chapitres
+parus. Il met aussi à jour index.json.
+
+Usage : python benchmarks/make_fixtures.py
+"""
+import json
+import os
+import random
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(ROOT, "benchmarks", "fixtures")
+SEED = 18
+
+DERIVED = {
+    "scan_manga_gallery.html": "https://www.scan-manga.com/lecture-en-ligne/Blue-Lock-Chapitre-323-FR_506901.html",
+    "anime_sama_gallery.html": "https://anime-sama.fr/catalogue/one-piece/scan/vf",
+    "generic_article.html": "https://www.manga-news.example/actualite/chapitre-1120-one-piece",
+    "generic_gallery.html": "https://galerie.example.org/series/berserk/chapter-374",
+    "scan_manga_series.html": "https://www.scan-manga.com/400000/Eleceed.html",
+    "generic_series.html": "https://galerie.example.org/series/berserk/",
+}
+
+
+def read(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def write(name, html):
+    with open(os.path.join(FIXTURES_DIR, name), "w", encoding="utf-8", newline="\n") as f:
+        f.write(html)
+
+
+def scan_manga_gallery(rng):
+    """Lecteur scan-manga sans métadonnées, 600 pages : le cas le plus coûteux du scoring d'images"""
+    html = read("scan_manga_no_meta.html")
+    pages = []
+    for number in range(1, 601):
+        width = rng.choice((720, 800, 960))
+        pages.append(
+            f'            <img class="lazy page-img" data-src="https://lel.scan-manga.com/Blue-Lock/323/{number:03d}.webp" '
+            f'src="/assets/img/loading.gif" alt="page {number}" width="{width}" height="{width * 3 // 2}">'
+        )
+    reader = '    <div class="reader-pages">\n' + "\n".join(pages) + "\n    </div>\n"
+    return html.replace("</body>", reader + "</body>", 1)
+
+
+def anime_sama_gallery(rng):
+    """Catalogue anime-sama avec 300 vignettes d'épisodes"""
+    html = read("anime_sama_catalogue.html")
+    cards = []
+    for episode in range(1, 301):
+        cards.append(
+            f'        <a class="episode-card" href="/catalogue/one-piece/saison1/vostfr/episode-{episode}">'
+            f'<img class="episode-thumb" loading="lazy" src="https://cdn.statically.io/gh/Anime-Sama/IMG/img/episodes/'
+            f'one-piece-{episode}.jpg" alt="Episode {episode}" width="{rng.choice((240, 320))}" height="180">'
+            f'<span>Épisode {episode}</span></a>'
+        )
+    grid = '    <section class="episodes-grid">\n' + "\n".join(cards) + "\n    </section>\n"
+    return html.replace("</body>", grid + "</body>", 1)
+
+
+def _generic_page(title, body):
+    return f"""<!DOCTYPE html>
+<html lang="fr">
+<head>
+    <meta charset="utf-8">
+    <title>{title}</title>
+    <meta name="viewport" content="width=device-width, initial-scale=1">
+    <link rel="stylesheet" href="/assets/site.css">
+    <script src="/assets/analytics.js" async></script>
+</head>
+<body>
+    <header class="site-header"><a href="/"><img src="/assets/logo.svg" alt="logo" width="160" height="32"></a>
+        <nav><a href="/actualite">Actualité</a> <a href="/critiques">Critiques</a> <a href="/planning">Planning</a></nav>
+    </header>
+{body}
+    <footer class="site-footer"><p>© 2026 — tous droits réservés</p></footer>
+</body>
+</html>
+"""
+
+
+def generic_article(rng):
+    """Article d'un site sans parser dédié : texte long, quelques images"""
+    words = ("chapitre", "arc", "équipage", "révélation", "combat", "île", "mystère", "auteur",
+             "planche", "dessin", "scénario", "lecteur", "parution", "hebdomadaire", "volume")
+    paragraphs = []
+    for _ in range(60):
+        sentence = " ".join(rng.choice(words) for _ in range(rng.randint(40, 90)))
+        paragraphs.append(f"        <p>{sentence.capitalize()}.</p>")
+        if rng.random() < 0.15:
+            paragraphs.append(f'        <figure><img src="/uploads/2026/10/illustration-{len(paragraphs)}.jpg" '
+                              f'alt="illustration" width="640" height="360"></figure>')
+    body = ('    <article class="post">\n        <h1>One Piece chapitre 1120 : ce qu\'il faut retenir</h1>\n'
+            + "\n".join(paragraphs) + "\n    </article>")
+    return _generic_page("One Piece chapitre 1120 - Manga News", body)
+
+
+def generic_gallery(rng):
+    """Lecteur d'un site générique : 400 images de pages et des vignettes de chapitres"""
+    pages = "\n".join(
+        f'        <img class="wp-manga-chapter-img" src="https://cdn.galerie.example.org/berserk/374/{n:03d}.jpg" '
+        f'alt="Berserk 374 page {n}" width="{rng.choice((760, 800))}" height="1150">'
+        for n in range(1, 401)
+    )
+    thumbs = "\n".join(
+        f'        <li><a href="/series/berserk/chapter-{n}"><img src="/thumbs/berserk-{n}.jpg" '
+        f'alt="Chapitre {n}" width="90" height="128"></a></li>'
+        for n in range(374, 274, -1)
+    )
+    body = (f'    <div class="reading-content">\n{pages}\n    </div>\n'
+            f'    <ul class="chapter-list">\n{thumbs}\n    </ul>')
+    return _generic_page("Berserk Chapter 374 - Galerie", body)
+
+
+def scan_manga_series(rng):
+    """Page du manga Eleceed : couverture, synopsis et liste des 380 chapitres"""
+    chapters = "\n".join(
+        f'            <li class="chapt_m"><a href="/lecture-en-ligne/Eleceed-Chapitre-{n}-FR_{519095 + (n - 377) * 7}.html">'
+        f'Chapitre {n}</a> <span class="date">{rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2026</span></li>'
+        for n in range(380, 0, -1)
+    )
+    return f"""<!DOCTYPE html>
+<html lang="fr">
+<head>
+    <meta charset="utf-8">
+    <title>Eleceed - Scan Manga</title>
+    <meta property="og:title" content="Eleceed - Scan">
+    <meta property="og:image" content="https://www.scan-manga.com/img/manga/Eleceed-cover.jpg">
+    <link rel="stylesheet" href="/assets/css/main.css">
+</head>
+<body>
+    <nav class="breadcrumb"><a href="/">Accueil</a> › <a href="/manga">Manga</a> › <a href="/400000/Eleceed.html">Eleceed</a></nav>
+    <div class="manga-info">
+        <h1 class="manga-title">Eleceed</h1>
+        <div class="manga-cover"><img src="/img/manga/Eleceed-cover.jpg" alt="Eleceed cover" width="300" height="420"></div>
+        <div class="manga-summary">Jiwoo est un garçon au grand cœur doté de réflexes hors du commun. Sa rencontre avec Kayden,
+            un agent surentraîné coincé dans le corps d'un chat, va bouleverser son quotidien.</div>
+    </div>
+    <ul class="chapter-list">
+{chapters}
+    </ul>
+</body>
+</html>
+"""
+
+
+def generic_series(rng):
+    """Page de série d'un site générique (thème de lecteur WordPress) : 376 chapitres"""
+    chapters = "\n".join(
+        f'        <li class="wp-manga-chapter"><a href="https://galerie.example.org/series/berserk/chapter-{n}/">'
+        f'Chapter {n}</a><span class="chapter-release-date">{rng.randint(1, 28)} days ago</span></li>'
+        for n in range(376, 0, -1)
+    )
+    related = "\n".join(
+        f'        <li><a href="https://galerie.example.org/series/vagabond/chapter-{n}/">Vagabond {n}</a></li>'
+        for n in range(400, 390, -1)
+    )
+    body = (f'    <div class="summary_image"><img src="/covers/berserk.jpg" alt="Berserk cover" width="193" height="274"></div>\n'
+            f'    <h1>Berserk</h1>\n'
+            f'    <div class="description-summary"><p>Guts, un mercenaire solitaire marqué par un destin cruel, '
+            f'affronte démons et apôtres dans un monde médiéval sombre.</p></div>\n'
+            f'    <ul class="main version-chap">\n{chapters}\n    </ul>\n'
+            f'    <ul class="related">\n{related}\n    </ul>')
+    return _generic_page("Berserk - Galerie", body)
+
+
+BUILDERS = {
+    "scan_manga_gallery.html": scan_manga_gallery,
+    "anime_sama_gallery.html": anime_sama_gallery,
+    "generic_article.html": generic_article,
+    "generic_gallery.html": generic_gallery,
+    "scan_manga_series.html": scan_manga_series,
+    "generic_series.html": generic_series,
+}
+
+
+def main():
+    rng = random.Random(SEED)
+    for name, build in BUILDERS.items():
+        html = build(rng)
+        write(name, html)
+        print(f"{name:28} {len(html.encode('utf-8')) / 1024:8.1f} Kio  {html.count('<img'):4} images")
+
+    index_path = os.path.join(FIXTURES_DIR, "index.json")
+    with open(index_path, encoding="utf-8") as f:
+        index = json.load(f)
+    index.update(DERIVED)
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
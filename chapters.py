@@ -0,0 +1,180 @@
+"""Historique des chapitres observés et numérotation numérique.
+
+``Manga.dernier_chapitre`` reste le libellé affiché ; chaque chapitre vu
+(scraping, saisie manuelle) est aussi enregistré dans la table ``chapters``
+avec une clé de tri numérique ("126" -> 126.0, "126.5" -> 126.5, "Extra"
+-> NULL) et sa date d'observation. Les questions courantes deviennent des
+requêtes indexées :
+
+- dernier chapitre d'un manga : ``ix_chapters_manga_sort`` ;
+- nouveautés depuis une date : ``ix_chapters_seen_at``.
+
+Le planificateur (scheduler.py) y lit aussi le rythme de sortie passé d'un
+manga pour initialiser son intervalle de vérification.
+"""
+import re
+from datetime import datetime
+
+from sqlalchemy import func, select
+
+from models import db, Chapter, Manga
+
+ORIGIN_SCRAPE = "scrape"
+ORIGIN_MANUAL = "manual"
+ORIGIN_BACKFILL = "backfill"
+ORIGIN_IMPORT = "import"
+
+# Mangas traités par transaction lors de la migration de l'historique
+BACKFILL_BATCH_SIZE = 500
+
+# "126", "126.5", "126,5", "Chapitre 126", "Ch.126 - Fin"
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)?")
+
+
+def chapter_label(numero):
+    """Libellé enregistré dans l'historique (espaces retirés, 50 caractères au plus)"""
+    return str(numero or "").strip()[:50]
+
+
+def chapter_sort_key(numero):
+    """Clé de tri numérique d'un libellé de chapitre ; None s'il n'a pas de numéro"""
+    match = _NUMBER_RE.search(str(numero or ""))
+    if not match:
+        return None
+    return float(match.group().replace(",", "."))
+
+
+def is_newer(new, old):
+    """Vrai si le chapitre ``new`` doit remplacer ``old`` comme dernier chapitre.
+
+    Un libellé sans numéro ("Extra", "Oneshot") ne remplace jamais un
+    chapitre numéroté ; il ne l'emporte que sur un autre libellé sans numéro.
+    """
+    new_key, old_key = chapter_sort_key(new), chapter_sort_key(old)
+    if new_key is None:
+        return old_key is None and new != old
+    return old_key is None or new_key > old_key
+
+
+def record_chapter(manga, numero, origin=ORIGIN_SCRAPE, now=None):
+    """Enregistre un chapitre observé (sans commit) ; renvoie None s'il est déjà connu"""
+    numero = chapter_label(numero)
+    if not numero:
+        return None
+    if manga.id is None:
+        db.session.flush()
+    exists = db.session.execute(
+        select(Chapter.id).where(Chapter.manga_id == manga.id, Chapter.numero == numero)
+    ).first()
+    if exists is not None:
+        return None
+    chapter = Chapter(
+        manga_id=manga.id,
+        numero=numero,
+        sort_key=chapter_sort_key(numero),
+        seen_at=now or datetime.utcnow(),
+        origin=origin,
+    )
+    db.session.add(chapter)
+    return chapter
+
+
+def delete_history(manga_id):
+    """Supprime l'historique d'un manga (sans commit)"""
+    return Chapter.query.filter_by(manga_id=manga_id).delete(synchronize_session=False)
+
+
+def latest_chapters(manga_ids):
+    """Chapitre numéroté le plus avancé de chaque manga : ``{manga_id: Chapter}``"""
+    manga_ids = list(manga_ids)
+    if not manga_ids:
+        return {}
+    best = (select(Chapter.manga_id, func.max(Chapter.sort_key).label("sort_key"))
+            .where(Chapter.manga_id.in_(manga_ids), Chapter.sort_key.is_not(None))
+            .group_by(Chapter.manga_id)
+            .subquery())
+    rows = (Chapter.query
+            .join(best, (Chapter.manga_id == best.c.manga_id) & (Chapter.sort_key == best.c.sort_key))
+            .order_by(Chapter.seen_at)
+            .all())
+    # "126" et "126.0" ont la même clé : le plus récemment vu l'emporte
+    return {chapter.manga_id: chapter for chapter in rows}
+
+
+def chapters_since(since, limit=100):
+    """Chapitres vus depuis ``since``, les plus récents d'abord : ``[(Chapter, Manga)]``"""
+    return (db.session.query(Chapter, Manga)
+            .join(Manga, Manga.id == Chapter.manga_id)
+            .filter(Chapter.seen_at >= since, Chapter.origin != ORIGIN_BACKFILL)
+            .order_by(Chapter.seen_at.desc(), Chapter.id.desc())
+            .limit(limit)
+            .all())
+
+
+def manga_history(manga_id):
+    """Historique d'un manga, du plus récent au plus ancien"""
+    return (Chapter.query
+            .filter_by(manga_id=manga_id)
+            .order_by(Chapter.seen_at.desc(), Chapter.id.desc())
+            .all())
+
+
+def release_cadence(manga_id):
+    """``(écart moyen en secondes, date du dernier chapitre)`` d'après les scrapings passés.
+
+    Seuls les chapitres découverts par scraping comptent : une saisie
+    manuelle dit où en est le lecteur, pas quand le chapitre est sorti. La
+    première observation (l'ajout du manga) ne date pas une sortie, elle ne
+    sert que de point de départ. Renvoie ``(None, None)`` sans au moins deux
+    sorties observées.
+    """
+    dates = db.session.execute(
+        select(Chapter.seen_at)
+        .where(Chapter.manga_id == manga_id, Chapter.origin == ORIGIN_SCRAPE)
+        .order_by(Chapter.seen_at)
+    ).scalars().all()[1:]
+    if len(dates) < 2:
+        return None, None
+    span = (dates[-1] - dates[0]).total_seconds()
+    if span <= 0:
+        return None, None
+    return span / (len(dates) - 1), dates[-1]
+
+
+def backfill_chapters(conn, after=0, limit=BACKFILL_BATCH_SIZE):
+    """Crée l'entrée d'historique des mangas d'id > ``after`` qui n'en ont pas, par lot.
+
+    Migration d'une base existante : le chapitre courant de chaque manga
+    devient sa première entrée (datée de sa dernière mise à jour). Traite au
+    plus ``limit`` mangas sur la connexion ``conn`` (transaction ouverte) ;
+    renvoie l'id du dernier manga parcouru, ou None quand il n'en reste plus.
+    """
+    mangas = Manga.__table__
+    chapters = Chapter.__table__
+    rows = conn.execute(
+        select(mangas.c.id, mangas.c.dernier_chapitre, mangas.c.date_maj, mangas.c.date_ajout)
+        .where(mangas.c.id > after)
+        .order_by(mangas.c.id)
+        .limit(limit)
+    ).all()
+    if not rows:
+        return None
+    known = set(conn.execute(
+        select(chapters.c.manga_id).where(chapters.c.manga_id.in_([row.id for row in rows])).distinct()
+    ).scalars())
+    now = datetime.utcnow()
+    missing = []
+    for row in rows:
+        numero = chapter_label(row.dernier_chapitre)
+        if row.id in known or not numero:
+            continue
+        missing.append({
+            "manga_id": row.id,
+            "numero": numero,
+            "sort_key": chapter_sort_key(numero),
+            "seen_at": row.date_maj or row.date_ajout or now,
+            "origin": ORIGIN_BACKFILL,
+        })
+    if missing:
+        conn.execute(chapters.insert(), missing)
+    return rows[-1].id
@@ -0,0 +1,422 @@
+"""Proxy et cache local des couvertures, avec miniatures au format des cartes.
+
+Les couvertures distantes sont téléchargées une seule fois, les images
+uploadées lues sur le disque ; chacune est réduite au format des cartes de
+la bibliothèque (WebP, et JPEG pour les navigateurs sans WebP). Les fichiers
+produits sont nommés d'après l'empreinte SHA-256 de l'image source : leur
+contenu ne change jamais, ils sont servis avec un cache navigateur d'un an
+(``immutable``), et deux mangas partageant une image partagent ses fichiers.
+
+Pillow fait partie de requirements.txt. S'il manque, l'image d'origine
+est mise en cache telle quelle (les couvertures ne sont plus hot-linkées,
+mais ne sont pas réduites) et un avertissement est journalisé au démarrage.
+
+L'index (``covers/index.db``, SQLite) associe chaque source à ses fichiers.
+Au-delà de ``max_bytes``, les couvertures qui ne sont plus référencées par
+aucun manga sont évincées en premier, les moins récemment affichées d'abord
+(voir ``enforce_cover_quota``).
+"""
+import hashlib
+import io
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from models import db, Manga
+from scraper.ratelimit import get_rate_limiter
+from scraper.scraper import PLACEHOLDER_IMG
+from scraper.session import REQUEST_TIMEOUT, get_session
+
+try:
+    from PIL import Image, ImageOps, features
+    HAS_PILLOW = True
+except ImportError:
+    HAS_PILLOW = False
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+DEFAULT_COVERS_DIR = os.path.join(BASE_DIR, "database", "covers")
+DEFAULT_STATIC_DIR = os.path.join(BASE_DIR, "static")
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+# Boîte des miniatures : cartes de 300 px environ, un peu plus pour les écrans denses
+THUMB_SIZE = (360, 504)
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+MAX_SOURCE_BYTES = 10 * 1024 * 1024
+# Délai avant de retenter une source en échec (404, page HTML, ...)
+FAILURE_TTL = 6 * 3600
+# last_used n'est réécrit qu'au-delà de ce délai, pas à chaque affichage
+TOUCH_INTERVAL = 3600
+
+IMAGE_ACCEPT = "image/avif,image/webp,image/apng,image/*,*/*;q=0.8"
+# Signatures des formats acceptés (une page d'erreur HTML n'est pas une image)
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+)
+FILE_NAME_RE = re.compile(r"^[0-9a-f]{24}(?:-t)?\.(?:webp|jpg|png|gif)$")
+
+
+def sniff_format(data):
+    """Extension correspondant au contenu, ou None si ce n'est pas une image reconnue"""
+    for signature, ext in _SIGNATURES:
+        if data.startswith(signature):
+            return ext
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def _webp_supported():
+    return HAS_PILLOW and features.check("webp")
+
+
+def make_thumbnails(data):
+    """Miniatures ``{extension: octets}`` (webp si disponible, et jpg)"""
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(THUMB_SIZE, Image.LANCZOS)
+        if image.mode not in ("RGB", "L"):
+            # JPEG n'a pas de transparence : fond blanc
+            background = Image.new("RGB", image.size, "white")
+            rgba = image.convert("RGBA")
+            background.paste(rgba, mask=rgba.getchannel("A"))
+            image = background
+        thumbnails = {}
+        if _webp_supported():
+            out = io.BytesIO()
+            image.save(out, "WEBP", quality=WEBP_QUALITY, method=4)
+            thumbnails["webp"] = out.getvalue()
+        out = io.BytesIO()
+        image.convert("RGB").save(out, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+        thumbnails["jpg"] = out.getvalue()
+    return thumbnails
+
+
+class CoverStore:
+    """Fichiers de couvertures sur disque et leur index SQLite"""
+
+    def __init__(self, directory=DEFAULT_COVERS_DIR, max_bytes=DEFAULT_MAX_BYTES, static_dir=DEFAULT_STATIC_DIR):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.static_dir = static_dir
+        self._conn = None
+        self._lock = threading.Lock()
+        # Une seule ingestion à la fois par source (cartes affichées en parallèle)
+        self._inflight = {}
+        # bytes_saved : octets en moins entre les sources et leurs miniatures
+        self._stats = {"hits": 0, "misses": 0, "downloads": 0, "failures": 0, "evicted": 0, "bytes_saved": 0}
+
+    def _connection(self):
+        if self._conn is None:
+            os.makedirs(self.directory, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(self.directory, "index.db"), timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS covers (
+                    source TEXT PRIMARY KEY,
+                    digest TEXT,
+                    webp TEXT,
+                    jpeg TEXT,
+                    source_bytes INTEGER NOT NULL DEFAULT 0,
+                    size INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_covers_last_used ON covers (last_used)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_covers_digest ON covers (digest)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    # --- Lecture ---
+
+    def lookup_many(self, sources):
+        """Couvertures prêtes des sources demandées : ``{source: {"webp": nom, "jpeg": nom}}``"""
+        sources = [source for source in set(sources) if source]
+        if not sources:
+            return {}
+        now = time.time()
+        found = {}
+        stale = []
+        with self._lock:
+            conn = self._connection()
+            placeholders = ", ".join("?" * len(sources))
+            rows = conn.execute(
+                f"SELECT source, webp, jpeg, last_used FROM covers "
+                f"WHERE source IN ({placeholders}) AND error IS NULL",
+                sources,
+            ).fetchall()
+            for source, webp, jpeg, last_used in rows:
+                found[source] = {"webp": webp, "jpeg": jpeg}
+                if now - last_used > TOUCH_INTERVAL:
+                    stale.append((now, source))
+            if stale:
+                conn.executemany("UPDATE covers SET last_used = ? WHERE source = ?", stale)
+                conn.commit()
+            self._stats["hits"] += len(found)
+            self._stats["misses"] += len(sources) - len(found)
+        return found
+
+    def lookup(self, source):
+        return self.lookup_many([source]).get(source)
+
+    def _failed_recently(self, source):
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT error, last_used FROM covers WHERE source = ?", (source,)
+            ).fetchone()
+        return row is not None and row[0] is not None and time.time() - row[1] < FAILURE_TTL
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    # --- Ingestion ---
+
+    def _read_source(self, source):
+        """Octets de l'image : fichier local pour /static/..., téléchargement sinon"""
+        if source.startswith("/static/"):
+            root = os.path.realpath(self.static_dir)
+            path = os.path.realpath(os.path.join(root, source[len("/static/"):]))
+            if not path.startswith(root + os.sep):
+                raise ValueError(f"Chemin hors de static : {source}")
+            with open(path, "rb") as f:
+                return f.read(MAX_SOURCE_BYTES + 1)
+        if not source.startswith(("http://", "https://")):
+            raise ValueError(f"Source de couverture non prise en charge : {source}")
+
+        get_rate_limiter().acquire(source)
+        response = get_session(source).get(source, timeout=REQUEST_TIMEOUT, stream=True,
+                                           headers={"Accept": IMAGE_ACCEPT, "Sec-Fetch-Dest": "image"})
+        with response:
+            get_rate_limiter().observe(source, response.status_code, response.headers)
+            response.raise_for_status()
+            chunks = []
+            received = 0
+            for chunk in response.iter_content(64 * 1024):
+                chunks.append(chunk)
+                received += len(chunk)
+                if received > MAX_SOURCE_BYTES:
+                    break
+        with self._lock:
+            self._stats["downloads"] += 1
+        return b"".join(chunks)
+
+    def _write(self, name, data):
+        path = self.path(name)
+        if os.path.exists(path):
+            return
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def ingest(self, source, data=None, force=False):
+        """Met en cache la couverture de ``source`` ; renvoie ses fichiers ou None en cas d'échec.
+
+        ``data`` évite de relire une image uploadée qu'on vient d'écrire. Une
+        source en échec n'est retentée qu'après ``FAILURE_TTL``.
+        """
+        if not source:
+            return None
+        if not force:
+            cached = self.lookup(source)
+            if cached is not None:
+                return cached
+            if self._failed_recently(source):
+                return None
+
+        with self._lock:
+            event = self._inflight.get(source)
+            owner = event is None
+            if owner:
+                event = self._inflight[source] = threading.Event()
+        if not owner:
+            event.wait(REQUEST_TIMEOUT * 2)
+            return self.lookup(source)
+
+        try:
+            return self._ingest(source, data)
+        finally:
+            with self._lock:
+                del self._inflight[source]
+            event.set()
+
+    def _ingest(self, source, data):
+        try:
+            if data is None:
+                data = self._read_source(source)
+            if len(data) > MAX_SOURCE_BYTES:
+                raise ValueError(f"Image trop lourde (> {MAX_SOURCE_BYTES} octets)")
+            ext = sniff_format(data)
+            if ext is None:
+                raise ValueError("Contenu non reconnu comme une image")
+
+            digest = hashlib.sha256(data).hexdigest()[:24]
+            if HAS_PILLOW:
+                files = {f"{digest}-t.{fmt}": content for fmt, content in make_thumbnails(data).items()}
+            else:
+                files = {f"{digest}.{ext}": data}
+            os.makedirs(self.directory, exist_ok=True)
+            for name, content in files.items():
+                self._write(name, content)
+        except Exception as e:
+            logger.warning("Couverture indisponible (%s) : %s", source, e)
+            self._remember(source, error=str(e) or e.__class__.__name__)
+            return None
+
+        names = list(files)
+        webp = next((name for name in names if name.endswith(".webp")), None)
+        jpeg = next((name for name in names if not name.endswith(".webp")), webp)
+        size = sum(len(content) for content in files.values())
+        self._remember(source, digest=digest, webp=webp, jpeg=jpeg, source_bytes=len(data), size=size)
+        logger.debug("Couverture mise en cache : %s -> %s (%s -> %s octets)", source, names, len(data), size)
+        return {"webp": webp, "jpeg": jpeg}
+
+    def _remember(self, source, digest=None, webp=None, jpeg=None, source_bytes=0, size=0, error=None):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO covers "
+                "(source, digest, webp, jpeg, source_bytes, size, error, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (source, digest, webp, jpeg, source_bytes, size, error, now, now),
+            )
+            conn.commit()
+            if error:
+                self._stats["failures"] += 1
+            else:
+                self._stats["bytes_saved"] += max(0, source_bytes - size)
+
+    # --- Quota ---
+
+    def total_bytes(self):
+        """Taille des fichiers en cache (un fichier partagé n'est compté qu'une fois)"""
+        with self._lock:
+            return self._connection().execute(
+                "SELECT COALESCE(SUM(size), 0) FROM "
+                "(SELECT MAX(size) AS size FROM covers WHERE digest IS NOT NULL GROUP BY digest)"
+            ).fetchone()[0]
+
+    def evict(self, referenced):
+        """Ramène le cache sous 90 % de ``max_bytes`` ; renvoie le nombre d'entrées évincées.
+
+        Ordre d'éviction : entrées en échec, couvertures que plus aucun
+        manga ne référence, puis couvertures référencées (elles seront
+        régénérées au prochain affichage), chaque groupe par ancienneté
+        d'affichage.
+        """
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return 0
+        target = total - int(self.max_bytes * 0.9)
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute(
+                "SELECT source, digest, webp, jpeg, size, error FROM covers ORDER BY last_used"
+            ).fetchall()
+            ranked = sorted(rows, key=lambda row: (row[5] is None, row[0] in referenced))
+            # Sources qui partagent chaque fichier : il n'est libéré qu'avec la dernière
+            sharing = Counter(row[1] for row in rows if row[1] is not None)
+            evicted = []
+            freed = 0
+            for source, digest, webp, jpeg, size, error in ranked:
+                if freed >= target:
+                    break
+                evicted.append((source, digest, webp, jpeg))
+                if digest is not None:
+                    sharing[digest] -= 1
+                    if not sharing[digest]:
+                        freed += size
+            conn.executemany("DELETE FROM covers WHERE source = ?", [(row[0],) for row in evicted])
+            conn.commit()
+            # Un fichier n'est supprimé que si plus aucune source ne le partage
+            for source, digest, webp, jpeg in evicted:
+                if digest is None:
+                    continue
+                if conn.execute("SELECT 1 FROM covers WHERE digest = ? LIMIT 1", (digest,)).fetchone():
+                    continue
+                for name in {webp, jpeg} - {None}:
+                    try:
+                        os.remove(self.path(name))
+                    except FileNotFoundError:
+                        pass
+            self._stats["evicted"] += len(evicted)
+        logger.info("%s couverture(s) évincée(s) du cache (%s octets libérés)", len(evicted), freed)
+        return len(evicted)
+
+    def stats(self):
+        with self._lock:
+            conn = self._connection()
+            entries, failed = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(error IS NOT NULL), 0) FROM covers"
+            ).fetchone()
+            counts = dict(self._stats)
+        counts.update({
+            "entries": entries,
+            "failed": failed,
+            "bytes": self.total_bytes(),
+            "max_bytes": self.max_bytes,
+            "thumbnails": HAS_PILLOW,
+            "webp": _webp_supported(),
+        })
+        return counts
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def configure_covers(directory=None, max_bytes=None, static_dir=None):
+    """Change l'emplacement ou le quota du cache de couvertures"""
+    global _store
+    if not HAS_PILLOW:
+        logger.warning("Pillow absent (pip install -r requirements.txt) : les couvertures "
+                       "sont mises en cache sans miniatures WebP / JPEG")
+    with _store_lock:
+        _store = CoverStore(directory or DEFAULT_COVERS_DIR, max_bytes or DEFAULT_MAX_BYTES,
+                            static_dir or DEFAULT_STATIC_DIR)
+
+
+def get_cover_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CoverStore()
+    return _store
+
+
+def warm_cover(source):
+    """Met en cache une couverture (scraping, upload) sans jamais lever d'exception"""
+    if not source or source == PLACEHOLDER_IMG:
+        return None
+    try:
+        return get_cover_store().ingest(source)
+    except Exception:
+        logger.exception("Échec de la mise en cache de la couverture %s", source)
+        return None
+
+
+def enforce_cover_quota():
+    """Applique le quota disque ; nécessite un contexte d'application (lit les mangas)"""
+    store = get_cover_store()
+    if store.total_bytes() <= store.max_bytes:
+        return 0
+    referenced = {source for (source,) in db.session.query(Manga.image_couverture).distinct() if source}
+    return store.evict(referenced)
+
+
+def cover_stats():
+    return get_cover_store().stats()
@@ -0,0 +1,169 @@
+"""Moteur SQLite de l'application : WAL, pragmas, lecteurs en pool et écrivain unique.
+
+Chaque connexion reçoit les pragmas de ``SQLITE_PRAGMAS`` : journal WAL
+(les lectures ne bloquent plus les écritures et inversement),
+``synchronous=NORMAL`` (plus de fsync à chaque commit, seulement aux
+checkpoints), cache de pages, lecture des fichiers par mmap et attente
+(``busy_timeout``) quand un autre processus tient le verrou d'écriture.
+
+Deux moteurs partagent le fichier :
+
+- l'écrivain (moteur par défaut de Flask-SQLAlchemy) : une seule connexion
+  par processus, les threads font la queue dans son pool. Ses transactions
+  commencent par ``BEGIN IMMEDIATE`` : le verrou d'écriture est pris dès le
+  début, une transaction ne peut donc pas échouer en plein milieu faute de
+  pouvoir passer de lecture à écriture, et les autres processus (worker.py)
+  attendent leur tour au lieu de recevoir « database is locked » ;
+- les lecteurs (bind ``reader``) : un pool de connexions en lecture seule
+  (``query_only``) ; sans transaction explicite, chaque SELECT lit le dernier
+  état commité, comme le faisait déjà le pilote sqlite3.
+
+``RoutingSession`` envoie les SELECT aux lecteurs et tout le reste (flush,
+INSERT / UPDATE / DELETE, SQL textuel) à l'écrivain. Une fois que la
+transaction a écrit, elle reste sur l'écrivain jusqu'au commit ou au
+rollback, pour relire ses propres écritures.
+
+Les pragmas se règlent par ``app.config`` ou par variables d'environnement
+(``MANGATRACKER_SQLITE_SYNCHRONOUS=FULL``, ``MANGATRACKER_SQLITE_READERS=4``...).
+"""
+import logging
+import os
+import re
+
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+READER_BIND = "reader"
+
+# Pragmas appliqués à chaque connexion (journal_mode : écrivain seulement)
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    # Négatif : en Kio (16 Mio par connexion)
+    "cache_size": -16 * 1024,
+    "mmap_size": 256 * 1024 * 1024,
+    # En millisecondes
+    "busy_timeout": 5000,
+}
+for _name in DEFAULT_PRAGMAS:
+    _value = os.environ.get(f"MANGATRACKER_SQLITE_{_name.upper()}")
+    if _value:
+        DEFAULT_PRAGMAS[_name] = _value
+
+# Connexions de lecture gardées ouvertes (autant en plus lors des pics)
+DEFAULT_READERS = int(os.environ.get("MANGATRACKER_SQLITE_READERS", 8))
+
+_PRAGMA_VALUE_RE = re.compile(r"^-?\w+$")
+
+# Moteurs créés par init_database, pour db_stats
+_engines = {}
+_journal_mode = None
+
+
+def _pragma_statements(pragmas, writer):
+    statements = []
+    for name, value in pragmas.items():
+        if name == "journal_mode" and not writer:
+            continue
+        if not _PRAGMA_VALUE_RE.match(str(value)):
+            raise ValueError(f"Valeur de pragma invalide : {name}={value!r}")
+        statements.append(f"PRAGMA {name}={value}")
+    if not writer:
+        statements.append("PRAGMA query_only=ON")
+    return statements
+
+
+def _install(engine, pragmas, writer):
+    statements = _pragma_statements(pragmas, writer)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        # Le pilote ne gère plus les transactions : BEGIN est émis ci-dessous
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    if writer:
+        @event.listens_for(engine, "begin")
+        def _on_begin(conn):
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def engine_options(app):
+    """Options des moteurs écrivain et lecteurs, d'après app.config"""
+    readers = app.config.get("SQLITE_READERS", DEFAULT_READERS)
+    writer = {"pool_size": 1, "max_overflow": 0}
+    reader = {"pool_size": max(1, readers), "max_overflow": max(1, readers)}
+    return writer, reader if readers else None
+
+
+def init_database(app, db, path):
+    """Configure ``db`` pour la base SQLite ``path`` et l'attache à ``app``"""
+    uri = f"sqlite:///{path}"
+    pragmas = dict(DEFAULT_PRAGMAS, **app.config.get("SQLITE_PRAGMAS", {}))
+    writer_options, reader_options = engine_options(app)
+    app.config["SQLALCHEMY_DATABASE_URI"] = uri
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = writer_options
+    binds = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+    if reader_options is not None:
+        binds[READER_BIND] = dict(reader_options, url=uri)
+    app.config["SQLALCHEMY_BINDS"] = binds
+    db.init_app(app)
+
+    global _journal_mode
+    with app.app_context():
+        engines = db.engines
+    _install(engines[None], pragmas, writer=True)
+    if READER_BIND in engines:
+        _install(engines[READER_BIND], pragmas, writer=False)
+    # Première connexion de l'écrivain : passe la base en WAL avant les lecteurs
+    with engines[None].connect() as conn:
+        mode = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+    _journal_mode = mode
+    _engines.clear()
+    _engines.update(writer=engines[None], readers=engines.get(READER_BIND))
+    if str(pragmas.get("journal_mode", "")).lower() != str(mode).lower():
+        logger.warning("SQLite : journal_mode=%s demandé, %s obtenu", pragmas.get("journal_mode"), mode)
+    logger.debug("SQLite : %s (journal %s, %s lecteurs)", path, mode,
+                 reader_options["pool_size"] if reader_options else 0)
+
+
+class RoutingSession(Session):
+    """Session qui lit sur le pool de lecteurs et écrit sur l'écrivain unique"""
+
+    _writing = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._writing and not self._flushing:
+            reader = self._db.engines.get(READER_BIND)
+            if reader is not None and clause is not None and getattr(clause, "is_select", False):
+                return reader
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is None:
+            self._writing = True
+        return engine
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _release_writer(session, transaction):
+    if transaction.parent is None:
+        session._writing = False
+
+
+def _pool_stats(engine):
+    pool = engine.pool
+    return {"size": pool.size(), "checked_out": pool.checkedout(), "overflow": max(0, pool.overflow())}
+
+
+def db_stats():
+    """Mode du journal et occupation des pools écrivain et lecteurs"""
+    return {
+        "journal_mode": _journal_mode,
+        **{name: _pool_stats(engine) if engine is not None else None for name, engine in _engines.items()},
+    }
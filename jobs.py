@@ -0,0 +1,489 @@
+"""File persistante de jobs de scraping (table SQLite ``jobs``, sans broker externe).
+
+Les routes enregistrent un job et répondent tout de suite ; les workers
+(worker.py, ou le thread intégré de ``python app.py``) les exécutent.
+
+- Déduplication : un seul job actif par (type, URL), garanti par un index
+  unique partiel ; une demande identique renvoie le job existant.
+- Retries : backoff exponentiel, nombre d'essais et délai de base par type.
+- Reprise après crash : un job pris a un bail (``locked_until``), renouvelé
+  tant qu'il tourne. Si le worker meurt, le bail expire et le job repart en
+  file (ou échoue s'il a épuisé ses essais). Un worker qui a perdu son bail
+  (repris par un autre) ne termine pas le job : son résultat est abandonné.
+
+Le worker programme aussi les vérifications périodiques des mangas
+arrivées à échéance (voir scheduler.py) et supprime les uploads orphelins
+(voir uploads.py). Ces vérifications sont des jobs ``poll`` : ils ne
+s'affichent ni sur les cartes ni dans le bandeau de la bibliothèque, et
+ne changent pas la version de la bibliothèque (voir pagecache.py).
+"""
+import logging
+import os
+import socket
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import case, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from chapters import record_chapter
+from covers import enforce_cover_quota, warm_cover
+from models import db, Manga, ScrapeJob
+from refresher import apply_scrape_result
+from scheduler import MAX_DUE_PER_TICK, due_schedules, is_pollable, postpone, record_check, sync_schedules
+from scraper.scraper import scrape_manga_info
+from uploads import collect_orphans
+
+logger = logging.getLogger(__name__)
+
+KIND_ADD = "add"            # compléter un manga tout juste ajouté
+KIND_REFRESH = "refresh"    # rafraîchir les mangas d'une URL
+KIND_POLL = "poll"          # vérification périodique (scheduler.py), en arrière-plan
+# Jobs demandés par l'utilisateur : badges des cartes et bandeau de la bibliothèque
+VISIBLE_KINDS = (KIND_ADD, KIND_REFRESH)
+
+# (essais max, délai de base en secondes) par type de job
+RETRY_POLICIES = {
+    KIND_ADD: (4, 30),
+    KIND_REFRESH: (3, 60),
+    KIND_POLL: (3, 60),
+}
+MAX_RETRY_DELAY = 3600
+LEASE_SECONDS = 300
+# Renouvellement du bail pendant l'exécution d'un job
+LEASE_RENEW_INTERVAL = LEASE_SECONDS / 3
+ACTIVE_STATUSES = ("queued", "running")
+# Les échecs restent signalés sur les cartes pendant ce délai
+FAILED_VISIBLE_FOR = timedelta(days=1)
+
+DEFAULT_WORKER_THREADS = 2
+DEFAULT_POLL_INTERVAL = 1.0
+SCHEDULER_TICK = 60
+
+
+def dedup_key(kind, url):
+    return f"{kind}:{url}"
+
+
+def retry_delay(kind, attempts):
+    """Délai avant le prochain essai, après ``attempts`` essais ratés"""
+    base = RETRY_POLICIES[kind][1]
+    return min(MAX_RETRY_DELAY, base * 2 ** max(0, attempts - 1))
+
+
+def find_active(kind, url):
+    return (ScrapeJob.query
+            .filter(ScrapeJob.dedup_key == dedup_key(kind, url), ScrapeJob.status.in_(ACTIVE_STATUSES))
+            .first())
+
+
+def enqueue(kind, url, manga_id=None):
+    """Programme un job et commit la session ; renvoie ``(job, créé)``.
+
+    Si un job identique est déjà actif, rien n'est ajouté et c'est lui qui
+    est renvoyé ; les objets ajoutés à la session par l'appelant sont alors
+    annulés avec le job.
+    """
+    existing = find_active(kind, url)
+    if existing is not None:
+        db.session.rollback()
+        return existing, False
+
+    job = ScrapeJob(
+        kind=kind,
+        url=url,
+        manga_id=manga_id,
+        dedup_key=dedup_key(kind, url),
+        max_attempts=RETRY_POLICIES[kind][0],
+        run_after=datetime.utcnow(),
+    )
+    db.session.add(job)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Un autre processus a programmé le même job entre-temps
+        db.session.rollback()
+        existing = find_active(kind, url)
+        if existing is None:
+            raise
+        return existing, False
+    return job, True
+
+
+def enqueue_many(items):
+    """Programme un lot de jobs ``(type, url, manga_id)`` en un seul commit.
+
+    Les jobs déjà actifs (ou en double dans le lot) sont ignorés ; renvoie
+    le nombre de jobs créés. À appeler avec une session sans changement en
+    attente : en cas de conflit avec un autre processus, le lot est annulé
+    puis repris job par job.
+    """
+    jobs = {}
+    for kind, url, manga_id in items:
+        jobs.setdefault(dedup_key(kind, url), (kind, url, manga_id))
+    if not jobs:
+        return 0
+    active = {key for (key,) in db.session.query(ScrapeJob.dedup_key)
+              .filter(ScrapeJob.dedup_key.in_(list(jobs)), ScrapeJob.status.in_(ACTIVE_STATUSES))}
+    for key in active:
+        del jobs[key]
+    now = datetime.utcnow()
+    db.session.add_all(
+        ScrapeJob(kind=kind, url=url, manga_id=manga_id, dedup_key=key,
+                  max_attempts=RETRY_POLICIES[kind][0], run_after=now)
+        for key, (kind, url, manga_id) in jobs.items()
+    )
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return sum(enqueue(kind, url, manga_id)[1] for kind, url, manga_id in jobs.values())
+    return len(jobs)
+
+
+def recover_expired(now=None):
+    """Remet en file les jobs dont le worker a disparu ; renvoie leur nombre"""
+    now = now or datetime.utcnow()
+    result = db.session.execute(
+        update(ScrapeJob)
+        .where(ScrapeJob.status == "running", ScrapeJob.locked_until < now)
+        .values(
+            status=case((ScrapeJob.attempts >= ScrapeJob.max_attempts, "failed"), else_="queued"),
+            worker=None,
+            locked_until=None,
+            run_after=now,
+            last_error="Bail expiré : worker interrompu",
+            updated_at=now,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    if result.rowcount:
+        logger.warning("%s job(s) repris après l'arrêt d'un worker", result.rowcount)
+    return result.rowcount
+
+
+def claim(worker, now=None):
+    """Prend le prochain job prêt, de façon atomique entre workers et processus"""
+    now = now or datetime.utcnow()
+    next_id = (select(ScrapeJob.id)
+               .where(ScrapeJob.status == "queued", ScrapeJob.run_after <= now)
+               .order_by(ScrapeJob.run_after, ScrapeJob.id)
+               .limit(1)
+               .scalar_subquery())
+    job_id = db.session.execute(
+        update(ScrapeJob)
+        .where(ScrapeJob.id == next_id, ScrapeJob.status == "queued")
+        .values(
+            status="running",
+            attempts=ScrapeJob.attempts + 1,
+            worker=worker,
+            locked_until=now + timedelta(seconds=LEASE_SECONDS),
+            updated_at=now,
+        )
+        .returning(ScrapeJob.id)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+    db.session.commit()
+    return db.session.get(ScrapeJob, job_id) if job_id else None
+
+
+def fill_new_manga(manga, data):
+    """Complète un manga ajouté par URL avec le résultat du scraping (sans commit)"""
+    manga.titre = data.get("titre", "Manga")
+    manga.dernier_chapitre = str(data.get("chapitre", "1"))
+    record_chapter(manga, manga.dernier_chapitre)
+    # Priorité à l'image uploadée
+    manga.image_couverture = manga.image_couverture or data.get("image")
+    manga.resume = data.get("resume")
+    manga.source = data.get("source")
+
+
+def execute(job, data):
+    """Applique le résultat ``data`` du scraping d'un job (sans commit) ; une
+    exception signifie un échec à réessayer.
+
+    Renvoie les images de couverture des mangas concernés, à mettre en cache
+    une fois la transaction terminée.
+    """
+    covers = set()
+    if job.kind == KIND_ADD:
+        manga = db.session.get(Manga, job.manga_id) if job.manga_id else None
+        if manga is not None:
+            fill_new_manga(manga, data)
+            record_check(manga, changed=False)
+            covers.add(manga.image_couverture)
+    elif job.kind in (KIND_REFRESH, KIND_POLL):
+        # Tous les mangas de cette URL profitent du même scraping
+        for manga in Manga.query.filter_by(url=job.url):
+            record_check(manga, apply_scrape_result(manga, data))
+            covers.add(manga.image_couverture)
+    else:
+        raise ValueError(f"Type de job inconnu : {job.kind}")
+    return covers
+
+
+def warm_covers(sources):
+    """Miniatures prêtes avant le prochain affichage (un échec ne fait pas échouer le job).
+
+    Téléchargement et redimensionnement : à appeler hors transaction, pour ne
+    pas garder le verrou d'écriture pendant des accès réseau.
+    """
+    for source in sources:
+        warm_cover(source)
+    enforce_cover_quota()
+
+
+def renew_lease(job_id, worker, now=None):
+    """Prolonge le bail d'un job encore tenu par ``worker`` ; renvoie False s'il l'a perdu"""
+    now = now or datetime.utcnow()
+    result = db.session.execute(
+        update(ScrapeJob)
+        .where(ScrapeJob.id == job_id, ScrapeJob.worker == worker, ScrapeJob.status == "running")
+        .values(locked_until=now + timedelta(seconds=LEASE_SECONDS))
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount > 0
+
+
+class _LeaseHeartbeat:
+    """Renouvelle le bail d'un job depuis un thread à part, le temps de son exécution"""
+
+    def __init__(self, app, job_id, worker, interval):
+        self.app = app
+        self.job_id = job_id
+        self.worker = worker
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-{job_id}", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self.app.app_context():
+                try:
+                    if not renew_lease(self.job_id, self.worker):
+                        logger.warning("Job %s : bail perdu par %s", self.job_id, self.worker)
+                        return
+                except Exception:
+                    logger.exception("Renouvellement du bail du job %s impossible", self.job_id)
+                    db.session.rollback()
+                finally:
+                    db.session.remove()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _finish(job_id, worker, error=None):
+    """Termine le job s'il est encore tenu par ``worker`` et commit, avec les
+    changements en attente dans la session.
+
+    Si le bail a expiré et que le job a été repris, rien n'est écrit : la
+    session est annulée et la fonction renvoie False.
+    """
+    job = db.session.get(ScrapeJob, job_id)
+    now = datetime.utcnow()
+    values = {"worker": None, "locked_until": None, "updated_at": now}
+    if error is None:
+        values.update(status="done", last_error=None)
+    else:
+        values["last_error"] = str(error) or error.__class__.__name__
+        if job.attempts >= job.max_attempts:
+            values["status"] = "failed"
+        else:
+            values.update(status="queued", run_after=now + timedelta(seconds=retry_delay(job.kind, job.attempts)))
+    result = db.session.execute(
+        update(ScrapeJob)
+        .where(ScrapeJob.id == job_id, ScrapeJob.worker == worker, ScrapeJob.status == "running")
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        db.session.rollback()
+        logger.warning("Job %s (%s %s) repris par un autre worker : résultat de %s abandonné",
+                       job_id, job.kind, job.url, worker)
+        return False
+    db.session.commit()
+    if values["status"] == "failed":
+        logger.warning("Job %s (%s %s) abandonné après %s essais : %s",
+                       job_id, job.kind, job.url, job.attempts, values["last_error"])
+    elif values["status"] == "queued":
+        logger.info("Job %s (%s %s) en échec, nouvel essai à %s : %s",
+                    job_id, job.kind, job.url, values["run_after"], values["last_error"])
+    return True
+
+
+def run_next(worker):
+    """Exécute un job prêt s'il y en a un ; renvoie False si la file est vide"""
+    recover_expired()
+    job = claim(worker)
+    if job is None:
+        return False
+    job_id = job.id
+    try:
+        # Le bail n'est renouvelé que pendant le scraping : les écritures qui
+        # suivent tiennent le verrou d'écriture dont le renouvellement a besoin
+        with _LeaseHeartbeat(current_app._get_current_object(), job_id, worker, LEASE_RENEW_INTERVAL):
+            data = scrape_manga_info(job.url, raise_errors=True)
+        covers = execute(job, data)
+        db.session.flush()
+    except Exception as e:
+        db.session.rollback()
+        _finish(job_id, worker, e)
+    else:
+        # Résultat et fin du job dans le même commit, si le bail est toujours à nous
+        if _finish(job_id, worker):
+            warm_covers(covers)
+    return True
+
+
+def enqueue_due_polls(now=None, limit=MAX_DUE_PER_TICK):
+    """Programme la vérification des mangas arrivés à échéance ; renvoie le nombre de jobs créés"""
+    now = now or datetime.utcnow()
+    sync_schedules(now)
+    created = 0
+    for schedule in due_schedules(now, limit):
+        manga = db.session.get(Manga, schedule.manga_id)
+        if manga is None or not is_pollable(manga.url):
+            # Manga supprimé ou passé en saisie manuelle depuis sync_schedules
+            db.session.delete(schedule)
+            db.session.commit()
+            continue
+        postpone(schedule, now)
+        db.session.commit()
+        # Un rafraîchissement demandé par l'utilisateur vaut vérification
+        if find_active(KIND_REFRESH, manga.url) is None:
+            created += enqueue(KIND_POLL, manga.url, manga_id=manga.id)[1]
+    if created:
+        logger.info("%s vérification(s) de nouveaux chapitres programmée(s)", created)
+    return created
+
+
+def job_states(mangas):
+    """Job actif (ou échec récent) de chaque manga affiché : ``{manga_id: dict}``"""
+    mangas = list(mangas)
+    if not mangas:
+        return {}
+    ids = [m.id for m in mangas]
+    by_url = {}
+    for m in mangas:
+        by_url.setdefault(m.url, []).append(m.id)
+
+    recent = datetime.utcnow() - FAILED_VISIBLE_FOR
+    # Les vérifications périodiques ne s'affichent pas (voir VISIBLE_KINDS)
+    jobs = (ScrapeJob.query
+            .filter(ScrapeJob.kind.in_(VISIBLE_KINDS))
+            .filter(or_(ScrapeJob.status.in_(ACTIVE_STATUSES),
+                        (ScrapeJob.status == "failed") & (ScrapeJob.updated_at >= recent)))
+            .filter(or_(ScrapeJob.manga_id.in_(ids), ScrapeJob.url.in_(list(by_url))))
+            .order_by(ScrapeJob.updated_at)
+            .all())
+
+    states = {}
+    for job in jobs:
+        targets = [job.manga_id] if job.kind == KIND_ADD else by_url.get(job.url, [])
+        for manga_id in targets:
+            current = states.get(manga_id)
+            # Un job actif prime sur un échec ; sinon le plus récent l'emporte
+            if current is None or job.status in ACTIVE_STATUSES or current["status"] not in ACTIVE_STATUSES:
+                states[manga_id] = job.to_dict()
+    return states
+
+
+def recent_jobs(limit=50, active_only=False, polls=True):
+    query = ScrapeJob.query
+    if not polls:
+        query = query.filter(ScrapeJob.kind.in_(VISIBLE_KINDS))
+    if active_only:
+        query = query.filter(ScrapeJob.status.in_(ACTIVE_STATUSES))
+    return query.order_by(ScrapeJob.updated_at.desc(), ScrapeJob.id.desc()).limit(limit).all()
+
+
+def queue_stats(polls=True):
+    query = db.session.query(ScrapeJob.status, func.count())
+    if not polls:
+        query = query.filter(ScrapeJob.kind.in_(VISIBLE_KINDS))
+    counts = dict(query.group_by(ScrapeJob.status).all())
+    return {status: counts.get(status, 0) for status in ("queued", "running", "done", "failed")}
+
+
+class Worker:
+    """Pool de threads exécutant la file ; s'arrête proprement sur stop()"""
+
+    def __init__(self, app, threads=DEFAULT_WORKER_THREADS, poll_interval=DEFAULT_POLL_INTERVAL, name=None,
+                 scheduler=True, tick_interval=SCHEDULER_TICK):
+        self.app = app
+        self.threads = max(1, threads)
+        self.poll_interval = poll_interval
+        self.scheduler = scheduler
+        self.tick_interval = tick_interval
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+        self._threads = []
+
+    def _loop(self, index, once):
+        worker = f"{self.name}:{index}"
+        with self.app.app_context():
+            while not self._stop.is_set():
+                try:
+                    ran = run_next(worker)
+                except Exception:
+                    logger.exception("Erreur du worker %s", worker)
+                    db.session.rollback()
+                    ran = False
+                finally:
+                    db.session.remove()
+                if not ran:
+                    if once:
+                        return
+                    self._stop.wait(self.poll_interval)
+
+    def tick(self):
+        """Un passage de maintenance : vérifications périodiques (si activées) et
+        suppression des uploads orphelins. Les erreurs sont journalisées, pas propagées.
+        """
+        created = 0
+        with self.app.app_context():
+            try:
+                if self.scheduler:
+                    created = enqueue_due_polls()
+                collect_orphans()
+            except Exception:
+                logger.exception("Erreur de la maintenance du worker")
+                db.session.rollback()
+            finally:
+                db.session.remove()
+        return created
+
+    def _maintenance_loop(self):
+        while not self._stop.is_set():
+            self.tick()
+            self._stop.wait(self.tick_interval)
+
+    def start(self, once=False, daemon=True):
+        if once:
+            self.tick()
+        else:
+            thread = threading.Thread(target=self._maintenance_loop, name="worker-maintenance", daemon=daemon)
+            thread.start()
+            self._threads.append(thread)
+        for index in range(self.threads):
+            thread = threading.Thread(target=self._loop, args=(index, once),
+                                      name=f"scrape-worker-{index}", daemon=daemon)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def join(self, timeout=None):
+        for thread in self._threads:
+            thread.join(timeout)
@@ -0,0 +1,340 @@
+"""Import et export de la bibliothèque en CSV et JSON Lines, en flux.
+
+Export : les titres sont lus par lots de ``EXPORT_BATCH_SIZE`` (keyset sur
+l'id) et écrits ligne à ligne ; la table n'est jamais chargée en entier.
+En JSON Lines, ``history=True`` ajoute l'historique des chapitres de chaque
+titre (une requête par lot).
+
+Import : les lignes sont lues au fil de l'eau et insérées par lots de
+``batch_size`` (un commit par lot). Une URL déjà suivie n'est pas dupliquée,
+seul son chapitre avance s'il est plus loin ; une entrée manuelle (sans URL)
+est reconnue à son titre. Réimporter un export ne crée donc aucun doublon.
+Les titres à compléter sont confiés à la file de scraping (jobs.py), que les
+workers traitent en parallèle :
+
+- ``scrape="missing"`` (défaut) : lignes sans titre (job "add") ou sans
+  chapitre (job "refresh") ;
+- ``scrape="all"`` : toutes les lignes ayant une URL ;
+- ``scrape="none"`` : aucun scraping.
+"""
+import csv
+import io
+import json
+import logging
+from datetime import datetime
+
+from chapters import ORIGIN_IMPORT, chapter_label, chapter_sort_key, is_newer, record_chapter
+from jobs import KIND_ADD, KIND_REFRESH, enqueue_many
+from models import db, Chapter, Manga
+from scraper.urls import chapter_from_url, slug_title_from_url, title_from_url
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "jsonl")
+SCRAPE_MODES = ("missing", "all", "none")
+EXPORT_FIELDS = ("id", "titre", "url", "dernier_chapitre", "source", "image_couverture", "resume",
+                 "date_ajout", "date_maj")
+EXPORT_BATCH_SIZE = 500
+DEFAULT_IMPORT_BATCH_SIZE = 200
+# Colonnes acceptées à l'import, avec leurs alias courants
+FIELD_ALIASES = {
+    "titre": ("titre", "title", "name"),
+    "url": ("url", "link", "lien"),
+    "dernier_chapitre": ("dernier_chapitre", "chapitre", "chapter", "last_chapter"),
+    "source": ("source",),
+    "image_couverture": ("image_couverture", "image", "cover"),
+    "resume": ("resume", "summary", "description"),
+}
+MAX_REPORTED_ERRORS = 20
+MANUAL_URL = "#"
+
+
+def guess_format(filename=None, content_type=None):
+    """Format d'après l'extension ou le type MIME ; None si inconnu"""
+    name = (filename or "").lower()
+    kind = (content_type or "").lower()
+    if name.endswith(".csv") or "csv" in kind:
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson", ".json")) or "ndjson" in kind or "jsonl" in kind or "json" in kind:
+        return "jsonl"
+    return None
+
+
+# --- Export ---
+
+def _iter_batches(batch_size=EXPORT_BATCH_SIZE):
+    last_id = 0
+    while True:
+        batch = (Manga.query
+                 .filter(Manga.id > last_id)
+                 .order_by(Manga.id)
+                 .limit(batch_size)
+                 .all())
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1].id
+        # Les objets déjà écrits n'ont pas à rester dans la session
+        db.session.expunge_all()
+
+
+def _histories(manga_ids):
+    histories = {manga_id: [] for manga_id in manga_ids}
+    rows = (Chapter.query
+            .filter(Chapter.manga_id.in_(manga_ids))
+            .order_by(Chapter.manga_id, Chapter.seen_at, Chapter.id))
+    for chapter in rows:
+        data = chapter.to_dict()
+        del data["manga_id"]
+        histories[chapter.manga_id].append(data)
+    return histories
+
+
+def export_record(manga):
+    record = {}
+    for field in EXPORT_FIELDS:
+        value = getattr(manga, field)
+        record[field] = value.isoformat() if isinstance(value, datetime) else value
+    return record
+
+
+class _LineBuffer:
+    """Cible d'écriture de csv.writer : récupère la ligne qui vient d'être écrite"""
+
+    def __init__(self):
+        self.value = ""
+
+    def write(self, text):
+        self.value = text
+
+
+def iter_export(fmt="csv", history=False, batch_size=EXPORT_BATCH_SIZE):
+    """Générateur des lignes exportées (texte, fin de ligne comprise)"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Format d'export inconnu : {fmt}")
+    if fmt == "csv":
+        buffer = _LineBuffer()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS)
+        yield buffer.value
+    for batch in _iter_batches(batch_size):
+        histories = _histories([m.id for m in batch]) if history and fmt == "jsonl" else None
+        for manga in batch:
+            record = export_record(manga)
+            if fmt == "csv":
+                writer.writerow(["" if record[field] is None else record[field] for field in EXPORT_FIELDS])
+                yield buffer.value
+            else:
+                if histories is not None:
+                    record["chapters"] = histories[manga.id]
+                yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+# --- Import ---
+
+class ImportReport:
+    def __init__(self):
+        self.read = 0
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.skipped = 0
+        self.jobs = 0
+        self.commits = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def to_dict(self):
+        return {
+            "read": self.read,
+            "created": self.created,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "skipped": self.skipped,
+            "jobs": self.jobs,
+            "commits": self.commits,
+            "errors": self.errors,
+        }
+
+
+def _text_stream(stream):
+    """Flux texte UTF-8 (BOM toléré) à partir d'un flux binaire ou texte"""
+    if isinstance(stream, io.TextIOBase):
+        return stream
+    return io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+
+def iter_records(stream, fmt):
+    """Lignes ``(numéro, dict ou exception)`` d'un fichier CSV ou JSON Lines"""
+    text = _text_stream(stream)
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for record in reader:
+            yield reader.line_num, record
+    elif fmt == "jsonl":
+        for number, line in enumerate(text, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield number, e
+                continue
+            yield number, record if isinstance(record, dict) else ValueError("Objet JSON attendu")
+    else:
+        raise ValueError(f"Format d'import inconnu : {fmt}")
+
+
+def normalize_record(record):
+    """Champs connus d'une ligne importée (alias résolus, chaînes nettoyées)"""
+    lowered = {str(key).strip().lower(): value for key, value in record.items() if key is not None}
+    row = {}
+    for field, aliases in FIELD_ALIASES.items():
+        for alias in aliases:
+            value = lowered.get(alias)
+            if value is not None and str(value).strip():
+                row[field] = str(value).strip()
+                break
+    if not row.get("url") and not row.get("titre"):
+        raise ValueError("Ligne sans titre ni URL")
+    if isinstance(lowered.get("chapters"), list):
+        row["chapters"] = lowered["chapters"]
+    return row
+
+
+def _restore_history(manga, chapters):
+    """Historique exporté (JSON Lines avec history) d'un titre tout juste créé"""
+    for item in chapters:
+        if not isinstance(item, dict) or not item.get("numero"):
+            continue
+        try:
+            seen_at = datetime.fromisoformat(item["seen_at"]) if item.get("seen_at") else None
+        except (TypeError, ValueError):
+            seen_at = None
+        record_chapter(manga, item["numero"], item.get("origin") or ORIGIN_IMPORT, now=seen_at)
+
+
+class _Importer:
+    def __init__(self, scrape, batch_size, report):
+        self.scrape = scrape
+        self.batch_size = max(1, batch_size)
+        self.report = report
+        self.pending = []
+
+    def add(self, line, row):
+        self.pending.append((line, row))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        urls = {row["url"] for _, row in batch if row.get("url") and row["url"] != MANUAL_URL}
+        existing = {}
+        if urls:
+            for manga in Manga.query.filter(Manga.url.in_(urls)).order_by(Manga.id):
+                existing.setdefault(manga.url, manga)
+        # Entrées manuelles, par titre
+        titles = {row["titre"] for _, row in batch if (row.get("url") or MANUAL_URL) == MANUAL_URL}
+        manual = {}
+        if titles:
+            for manga in Manga.query.filter(Manga.url == MANUAL_URL, Manga.titre.in_(titles)).order_by(Manga.id):
+                manual.setdefault(manga.titre, manga)
+
+        created = []
+        jobs = []
+        for line, row in batch:
+            url = row.get("url") or MANUAL_URL
+            manga = existing.get(url) if url != MANUAL_URL else manual.get(row["titre"])
+            if manga is not None:
+                self._update(manga, row)
+                if self.scrape == "all" and url != MANUAL_URL:
+                    jobs.append((KIND_REFRESH, url, manga.id))
+                continue
+            manga = self._create(url, row)
+            created.append((manga, row))
+            if url != MANUAL_URL:
+                existing[url] = manga
+            else:
+                manual[manga.titre] = manga
+
+        # Un seul INSERT groupé pour les nouveaux titres (ids renvoyés par RETURNING)
+        db.session.flush()
+        for manga, row in created:
+            if row.get("chapters"):
+                _restore_history(manga, row["chapters"])
+            elif numero := chapter_label(manga.dernier_chapitre):
+                # Comme record_chapter, sans sa requête d'existence : le titre est nouveau
+                db.session.add(Chapter(manga_id=manga.id, numero=numero, sort_key=chapter_sort_key(numero),
+                                       origin=ORIGIN_IMPORT))
+            if manga.url == MANUAL_URL or self.scrape == "none":
+                continue
+            if not row.get("titre"):
+                jobs.append((KIND_ADD, manga.url, manga.id))
+            elif self.scrape == "all" or not row.get("dernier_chapitre"):
+                jobs.append((KIND_REFRESH, manga.url, manga.id))
+        db.session.commit()
+        self.report.commits += 1
+        self.report.created += len(created)
+        if jobs:
+            self.report.jobs += enqueue_many(jobs)
+
+    def _create(self, url, row):
+        manual = url == MANUAL_URL
+        manga = Manga(
+            titre=row.get("titre") or (None if manual else title_from_url(url) or slug_title_from_url(url)) or "Manga",
+            dernier_chapitre=row.get("dernier_chapitre") or ("1" if manual else chapter_from_url(url)),
+            url=url,
+            image_couverture=row.get("image_couverture"),
+            resume=row.get("resume"),
+            source=row.get("source") or ("Manuel" if manual else None),
+        )
+        db.session.add(manga)
+        return manga
+
+    def _update(self, manga, row):
+        chapitre = row.get("dernier_chapitre")
+        if chapitre and is_newer(chapitre, manga.dernier_chapitre):
+            # Titre créé plus haut dans le lot : son historique est écrit après le flush
+            if manga.id is not None:
+                record_chapter(manga, chapitre, ORIGIN_IMPORT)
+            manga.dernier_chapitre = chapitre
+            self.report.updated += 1
+        else:
+            self.report.unchanged += 1
+
+
+def import_library(stream, fmt="csv", scrape="missing", batch_size=DEFAULT_IMPORT_BATCH_SIZE):
+    """Importe un fichier CSV / JSON Lines ; renvoie un ``ImportReport``.
+
+    Les lignes invalides sont ignorées et signalées dans le rapport ; les
+    lots déjà commités restent en base si l'import s'interrompt.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Format d'import inconnu : {fmt}")
+    if scrape not in SCRAPE_MODES:
+        raise ValueError(f"Mode de scraping inconnu : {scrape}")
+    report = ImportReport()
+    importer = _Importer(scrape, batch_size, report)
+    try:
+        for line, record in iter_records(stream, fmt):
+            report.read += 1
+            if isinstance(record, Exception):
+                report.error(line, str(record))
+                continue
+            try:
+                importer.add(line, normalize_record(record))
+            except ValueError as e:
+                report.error(line, str(e))
+        importer.flush()
+    except Exception:
+        db.session.rollback()
+        raise
+    logger.info("Import %s : %s lignes, %s créées, %s mises à jour, %s ignorées, %s jobs",
+                fmt, report.read, report.created, report.updated, report.skipped, report.jobs)
+    return report
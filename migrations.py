@@ -0,0 +1,277 @@
+"""Migrations versionnées du schéma de la base.
+
+Chaque étape a un numéro de version et un nom ; la table
+``schema_migrations`` garde les versions appliquées. ``migrate()`` applique
+dans l'ordre celles qui manquent, chacune dans sa propre transaction, qui
+enregistre aussi sa version : une étape est appliquée entièrement ou pas
+du tout. Plusieurs processus peuvent démarrer en même temps (application,
+worker.py) : les transactions d'écriture sont sérialisées et chacune
+revérifie que l'étape n'a pas déjà été faite par un autre.
+
+Les étapes qui parcourent toute la bibliothèque sont découpées en lots
+(``batched=True``) : la fonction traite un lot à partir d'un curseur (le
+dernier id traité) et renvoie le curseur suivant, ou None quand elle a
+fini. Chaque lot est une transaction courte qui enregistre le curseur :
+l'application lit et écrit entre deux lots au lieu d'attendre la fin de la
+migration, et une migration interrompue reprend au dernier lot.
+
+SQLite ne sait pas construire un index en ligne (``CREATE INDEX`` garde le
+verrou d'écriture jusqu'au bout) : chaque table a sa propre étape pour ses
+index, pour ne jamais en construire plusieurs dans une même transaction.
+
+Au démarrage, une seule requête lit les versions appliquées ; quand la base
+est à jour, rien d'autre n'est exécuté.
+
+Les bases créées avant ce module (``db.create_all``, ancien migratedb.py)
+n'ont pas de ``schema_migrations`` : les étapes sont idempotentes
+(``IF NOT EXISTS``, colonnes vérifiées avant ``ALTER TABLE``), elles sont
+rejouées sans risque puis enregistrées.
+
+Ajouter une migration : une fonction décorée par ``@migration(version
+suivante, "description")``, qui reçoit la connexion (transaction ouverte).
+Ne jamais modifier une étape déjà publiée.
+"""
+import json
+import logging
+import time
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+from chapters import backfill_chapters
+from dbengine import READER_BIND
+from models import db
+from pagecache import create_version_triggers
+from search import create_search_tables
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_TABLE = "schema_migrations"
+
+_SCHEMA = f"""CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    -- Progression d'une étape par lots en cours (JSON)
+    cursor TEXT,
+    -- NULL tant que l'étape n'est pas terminée
+    applied_at TIMESTAMP,
+    duration_ms INTEGER
+)"""
+
+
+class Migration:
+    def __init__(self, version, name, apply, batched=False):
+        self.version = version
+        self.name = name
+        # apply(conn) ; par lots : apply(conn, curseur) -> curseur suivant ou None
+        self.apply = apply
+        self.batched = batched
+
+    def __repr__(self):
+        return f"<Migration {self.version} {self.name}>"
+
+
+MIGRATIONS = []
+
+# Bases (URL) déjà à jour dans ce processus
+_up_to_date = set()
+
+
+def migration(version, name, batched=False):
+    """Déclare une étape de migration"""
+    def register(apply):
+        if any(step.version == version for step in MIGRATIONS):
+            raise ValueError(f"Version de migration en double : {version}")
+        MIGRATIONS.append(Migration(version, name, apply, batched))
+        MIGRATIONS.sort(key=lambda step: step.version)
+        return apply
+    return register
+
+
+# --- Outils des étapes ---
+
+def create_table(conn, name):
+    """Crée la table du modèle ``name`` (et ses index) si elle n'existe pas"""
+    db.metadata.tables[name].create(conn, checkfirst=True)
+
+
+def create_indexes(conn, table):
+    """Crée les index déclarés sur la table ``table`` qui manquent"""
+    for index in db.metadata.tables[table].indexes:
+        index.create(conn, checkfirst=True)
+
+
+def add_column(conn, table, name, ddl):
+    """``ALTER TABLE ... ADD COLUMN`` si la colonne n'existe pas ; renvoie True si ajoutée"""
+    columns = {column["name"] for column in inspect(conn).get_columns(table)}
+    if name in columns:
+        return False
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+    return True
+
+
+# --- Étapes ---
+
+@migration(1, "table mangas et colonne image_couverture")
+def _mangas(conn):
+    create_table(conn, "mangas")
+    # Bases d'avant l'upload d'images (ancien migratedb.py)
+    add_column(conn, "mangas", "image_couverture", "VARCHAR(500)")
+
+
+@migration(2, "tables jobs, chapters, poll_schedules et uploads")
+def _tables(conn):
+    for name in ("jobs", "chapters", "poll_schedules", "uploads"):
+        create_table(conn, name)
+
+
+@migration(3, "index de pagination de la bibliothèque")
+def _mangas_indexes(conn):
+    create_indexes(conn, "mangas")
+
+
+@migration(4, "index de la file de jobs")
+def _jobs_indexes(conn):
+    create_indexes(conn, "jobs")
+
+
+@migration(5, "index du planning des vérifications")
+def _poll_indexes(conn):
+    create_indexes(conn, "poll_schedules")
+
+
+@migration(6, "index de l'historique des chapitres")
+def _chapters_indexes(conn):
+    create_indexes(conn, "chapters")
+
+
+@migration(7, "index des uploads orphelins")
+def _uploads_indexes(conn):
+    create_indexes(conn, "uploads")
+
+
+@migration(8, "index de recherche plein texte")
+def _search(conn):
+    # Sans FTS5, la recherche utilise ILIKE ; search.py retente au démarrage suivant
+    create_search_tables(conn)
+
+
+@migration(9, "historique des chapitres des mangas existants", batched=True)
+def _backfill_chapters(conn, cursor):
+    return backfill_chapters(conn, after=cursor or 0)
+
+
+@migration(10, "version de la bibliothèque (cache des pages)")
+def _library_version(conn):
+    create_table(conn, "library_version")
+    create_version_triggers(conn)
+
+
+@migration(11, "vérifications périodiques hors version de la bibliothèque")
+def _poll_jobs(conn):
+    create_version_triggers(conn, replace=True)
+    # Vérifications d'entrées manuelles (URL "#"), qui échouaient toujours
+    conn.execute(text("DELETE FROM jobs WHERE url NOT LIKE 'http%' AND status != 'running'"))
+
+
+# --- Exécution ---
+
+def _applied_versions(engine):
+    with engine.connect() as conn:
+        if conn.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                        {"name": MIGRATIONS_TABLE}).first() is None:
+            return set()
+        return set(conn.execute(
+            text(f"SELECT version FROM {MIGRATIONS_TABLE} WHERE applied_at IS NOT NULL")
+        ).scalars())
+
+
+def _state(conn, step):
+    """``(appliquée, curseur)`` de l'étape, lu dans la transaction en cours"""
+    row = conn.execute(text(f"SELECT applied_at, cursor FROM {MIGRATIONS_TABLE} WHERE version = :version"),
+                       {"version": step.version}).first()
+    if row is None:
+        return False, None
+    return row.applied_at is not None, json.loads(row.cursor) if row.cursor else None
+
+
+def _record(conn, step, cursor=None, done=True, duration=None):
+    conn.execute(text(f"""
+        INSERT INTO {MIGRATIONS_TABLE} (version, name, cursor, applied_at, duration_ms)
+        VALUES (:version, :name, :cursor, :applied_at, :duration_ms)
+        ON CONFLICT(version) DO UPDATE SET
+            cursor = excluded.cursor,
+            applied_at = excluded.applied_at,
+            duration_ms = COALESCE({MIGRATIONS_TABLE}.duration_ms, 0) + excluded.duration_ms
+    """), {
+        "version": step.version,
+        "name": step.name,
+        "cursor": None if done or cursor is None else json.dumps(cursor),
+        "applied_at": datetime.utcnow() if done else None,
+        "duration_ms": round(duration * 1000) if duration is not None else 0,
+    })
+
+
+def _apply(engine, step):
+    """Applique une étape ; renvoie False si un autre processus l'a déjà faite"""
+    started = time.perf_counter()
+    batches = 0
+    while True:
+        batch_started = time.perf_counter()
+        with engine.begin() as conn:
+            applied, cursor = _state(conn, step)
+            if applied:
+                return batches > 0
+            if not step.batched:
+                step.apply(conn)
+                _record(conn, step, duration=time.perf_counter() - batch_started)
+                break
+            cursor = step.apply(conn, cursor)
+            _record(conn, step, cursor, done=cursor is None, duration=time.perf_counter() - batch_started)
+        batches += 1
+        if cursor is None:
+            break
+        logger.debug("Migration %s : lot %s (curseur %s)", step.version, batches, cursor)
+    logger.info("Migration %s appliquée : %s (%.0f ms)", step.version, step.name,
+                (time.perf_counter() - started) * 1000)
+    return True
+
+
+def migrate():
+    """Applique les migrations manquantes ; renvoie les versions appliquées par cet appel"""
+    engines = db.engines
+    url = str(engines[None].url)
+    if url in _up_to_date:
+        return []
+    applied = _applied_versions(engines.get(READER_BIND) or engines[None])
+    pending = [step for step in MIGRATIONS if step.version not in applied]
+    done = []
+    if pending:
+        with engines[None].begin() as conn:
+            conn.execute(text(_SCHEMA))
+        for step in pending:
+            if _apply(engines[None], step):
+                done.append(step.version)
+    _up_to_date.add(url)
+    return done
+
+
+def migration_status():
+    """État de chaque étape : ``[(version, nom, "appliquée" | "en cours" | "en attente", date)]``"""
+    engines = db.engines
+    rows = {}
+    with (engines.get(READER_BIND) or engines[None]).connect() as conn:
+        if conn.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                        {"name": MIGRATIONS_TABLE}).first() is not None:
+            rows = {row.version: row for row in conn.execute(
+                text(f"SELECT version, cursor, applied_at FROM {MIGRATIONS_TABLE}"))}
+    status = []
+    for step in MIGRATIONS:
+        row = rows.get(step.version)
+        if row is not None and row.applied_at is not None:
+            status.append((step.version, step.name, "appliquée", row.applied_at))
+        elif row is not None:
+            status.append((step.version, step.name, "en cours", None))
+        else:
+            status.append((step.version, step.name, "en attente", None))
+    return status
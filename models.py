@@ -0,0 +1,150 @@
+"""Modèles de données partagés entre l'application web et les tâches de fond"""
+from datetime import datetime
+from flask_sqlalchemy import SQLAlchemy
+
+from dbengine import RoutingSession
+
+# Lectures sur le pool de lecteurs, écritures sur l'écrivain unique (voir dbengine.py)
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+# Modèle de données
+class Manga(db.Model):
+    __tablename__ = "mangas"
+    __table_args__ = (
+        # Tri et pagination de la bibliothèque (date_maj DESC, id DESC)
+        db.Index("ix_mangas_date_maj_id", "date_maj", "id"),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    titre = db.Column(db.String(200), nullable=False)
+    dernier_chapitre = db.Column(db.String(50), nullable=False)
+    url = db.Column(db.String(500), nullable=False)
+    image_couverture = db.Column(db.String(500), nullable=True)
+    resume = db.Column(db.Text, nullable=True)
+    source = db.Column(db.String(100), nullable=True)
+    date_ajout = db.Column(db.DateTime, default=datetime.utcnow)
+    date_maj = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<Manga {self.titre} ch.{self.dernier_chapitre}>"
+
+
+class ScrapeJob(db.Model):
+    """Job de scraping de la file persistante (voir jobs.py)"""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Un seul job actif par (type, URL) : les demandes identiques sont fusionnées
+        db.Index("ux_jobs_active_key", "dedup_key", unique=True,
+                 sqlite_where=db.text("status IN ('queued', 'running')")),
+        # Prise du prochain job à exécuter
+        db.Index("ix_jobs_status_run_after", "status", "run_after"),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)
+    url = db.Column(db.String(500), nullable=False)
+    manga_id = db.Column(db.Integer, nullable=True)
+    dedup_key = db.Column(db.String(600), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default="queued")
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_until = db.Column(db.DateTime, nullable=True)
+    worker = db.Column(db.String(100), nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "url": self.url,
+            "manga_id": self.manga_id,
+            "status": self.status,
+            "attempts": self.attempts,
+            "max_attempts": self.max_attempts,
+            "run_after": self.run_after.isoformat() if self.run_after else None,
+            "last_error": self.last_error,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+    def __repr__(self):
+        return f"<ScrapeJob {self.kind} {self.url} {self.status}>"
+
+
+class PollSchedule(db.Model):
+    """Rythme de vérification d'un manga, appris de ses sorties (voir scheduler.py)"""
+    __tablename__ = "poll_schedules"
+    manga_id = db.Column(db.Integer, primary_key=True)
+    next_check_at = db.Column(db.DateTime, nullable=False, index=True)
+    interval_seconds = db.Column(db.Float, nullable=False)
+    # Moyenne glissante de l'écart entre deux nouveaux chapitres
+    avg_gap_seconds = db.Column(db.Float, nullable=True)
+    last_checked_at = db.Column(db.DateTime, nullable=True)
+    last_change_at = db.Column(db.DateTime, nullable=True)
+    checks = db.Column(db.Integer, nullable=False, default=0)
+    changes = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<PollSchedule manga={self.manga_id} every {self.interval_seconds:.0f}s>"
+
+
+class Chapter(db.Model):
+    """Chapitre observé pour un manga (historique, voir chapters.py)"""
+    __tablename__ = "chapters"
+    __table_args__ = (
+        db.UniqueConstraint("manga_id", "numero", name="uq_chapters_manga_numero"),
+        # Dernier chapitre d'un manga : MAX(sort_key) par manga_id, sans scan
+        db.Index("ix_chapters_manga_sort", "manga_id", "sort_key"),
+        # "Quoi de neuf depuis hier" : parcours de l'index à partir de la date
+        db.Index("ix_chapters_seen_at", "seen_at", "manga_id"),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    manga_id = db.Column(db.Integer, nullable=False)
+    # Libellé tel qu'observé ("126", "126.5", "Extra")
+    numero = db.Column(db.String(50), nullable=False)
+    # Clé de tri numérique ; NULL pour les chapitres sans numéro
+    sort_key = db.Column(db.Float, nullable=True)
+    seen_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    # "scrape", "manual", "backfill" ou "import"
+    origin = db.Column(db.String(20), nullable=False, default="scrape")
+
+    def to_dict(self):
+        return {
+            "manga_id": self.manga_id,
+            "numero": self.numero,
+            "sort_key": self.sort_key,
+            "seen_at": self.seen_at.isoformat() if self.seen_at else None,
+            "origin": self.origin,
+        }
+
+    def __repr__(self):
+        return f"<Chapter manga={self.manga_id} ch.{self.numero}>"
+
+
+class Upload(db.Model):
+    """Image uploadée, stockée sous l'empreinte de son contenu (voir uploads.py)"""
+    __tablename__ = "uploads"
+    # "<sha256>.<ext>", dans UPLOAD_FOLDER
+    name = db.Column(db.String(100), primary_key=True)
+    size = db.Column(db.Integer, nullable=False, default=0)
+    # Nombre de mangas dont image_couverture désigne ce fichier
+    refcount = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Date du passage à zéro référence ; le GC supprime le fichier après un délai
+    orphaned_at = db.Column(db.DateTime, nullable=True, index=True)
+
+    def __repr__(self):
+        return f"<Upload {self.name} refs={self.refcount}>"
+
+
+
+class LibraryVersion(db.Model):
+    """Version de la bibliothèque, incrémentée par des triggers (voir pagecache.py)"""
+    __tablename__ = "library_version"
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    # Date de la dernière écriture (timestamp Unix)
+    updated_at = db.Column(db.Float, nullable=False)
+
+    def __repr__(self):
+        return f"<LibraryVersion {self.version}>"
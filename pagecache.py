@@ -0,0 +1,244 @@
+"""Cache des pages de la bibliothèque et validateurs HTTP (ETag, Last-Modified).
+
+La bibliothèque a un numéro de version (table ``library_version``) que des
+triggers SQLite incrémentent à chaque écriture sur ``mangas`` et à chaque
+changement d'état d'un job affiché (badges des cartes, hors vérifications
+périodiques), quel que soit le processus qui écrit (application,
+worker.py, import). Lire la version coûte une
+requête sur une ligne.
+
+- Les cartes d'une page (``_manga_page.html``, accueil, recherche et
+  chargement progressif) sont gardées rendues, par paramètres de page, pour
+  la version courante : une nouvelle version vide le cache. Le cache est
+  borné en mémoire (LRU) et ses entrées expirent après ``ttl`` secondes
+  (miniatures générées entre-temps, échecs de jobs qui ne s'affichent plus).
+- L'ETag dérive de la version, des paramètres de la page et de la tranche
+  de ``ttl`` secondes en cours : un navigateur ou un reverse proxy qui
+  revalide reçoit un 304 sans requête sur les mangas ni rendu, et les
+  validateurs expirent comme les rendus (un badge d'échec qui ne s'affiche
+  plus ne change pas la version). Last-Modified est la date de la dernière
+  écriture, ou le début de la tranche s'il est plus récent ;
+  l'en-tête est à la seconde, il n'annonce donc la seconde qui suit
+  l'écriture qu'une fois celle-ci écoulée (une écriture dans la même seconde
+  ne doit pas valider un 304).
+"""
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from flask import Response, request
+from sqlalchemy import select
+
+from models import db, LibraryVersion
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_TTL = 300
+
+_BUMP = ("UPDATE library_version SET version = version + 1, "
+         "updated_at = (julianday('now') - 2440587.5) * 86400.0 WHERE id = 1;")
+
+# Écritures qui changent l'affichage de la bibliothèque ; les vérifications
+# périodiques (jobs "poll") ne s'affichent pas
+_TRIGGERS = (
+    ("mangas", "ai", "INSERT", None),
+    ("mangas", "au", "UPDATE", None),
+    ("mangas", "ad", "DELETE", None),
+    ("jobs", "ai", "INSERT", "NEW.kind != 'poll'"),
+    ("jobs", "au", "UPDATE OF status, last_error", "NEW.kind != 'poll'"),
+    ("jobs", "ad", "DELETE", "OLD.kind != 'poll'"),
+)
+TRIGGERS = [
+    f"CREATE TRIGGER IF NOT EXISTS library_version_{table}_{suffix} AFTER {event} ON {table} "
+    f"{f'WHEN {when} ' if when else ''}BEGIN {_BUMP} END"
+    for table, suffix, event, when in _TRIGGERS
+]
+
+
+def create_version_triggers(conn, replace=False):
+    """Crée la ligne de version et ses triggers sur ``conn`` (transaction ouverte), pour les migrations.
+
+    ``replace`` : supprime d'abord les triggers existants (nouvelle définition).
+    """
+    table = LibraryVersion.__table__
+    if conn.execute(select(table.c.id).where(table.c.id == 1)).first() is None:
+        conn.execute(table.insert().values(id=1, version=0, updated_at=time.time()))
+    if replace:
+        for table_name, suffix, _, _ in _TRIGGERS:
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS library_version_{table_name}_{suffix}")
+    for statement in TRIGGERS:
+        conn.exec_driver_sql(statement)
+
+
+def _period_start():
+    """Début (timestamp) de la tranche de ``ttl`` secondes en cours, 0 sans ttl"""
+    ttl = get_page_cache().ttl
+    return time.time() // ttl * ttl if ttl else 0.0
+
+
+def library_version():
+    """``(version, date de la dernière écriture)`` de la bibliothèque.
+
+    La date est au moins le début de la tranche de ttl en cours : ce qui
+    change sans écriture (badges d'échec expirés) invalide aussi
+    If-Modified-Since.
+    """
+    row = db.session.execute(
+        select(LibraryVersion.version, LibraryVersion.updated_at).where(LibraryVersion.id == 1)
+    ).first()
+    if row is None:
+        return 0, datetime.now(timezone.utc)
+    # Date exacte : l'arrondi à la seconde est fait dans l'en-tête (set_validators)
+    return row.version, datetime.fromtimestamp(max(row.updated_at, _period_start()), timezone.utc)
+
+
+def make_etag(version, *parts):
+    """ETag (faible) d'une page : version de la bibliothèque, paramètres qui
+    changent le rendu et tranche de ttl en cours"""
+    return hashlib.sha1(repr((version, _period_start()) + parts).encode("utf-8")).hexdigest()[:20]
+
+
+def _http_last_modified(last_modified):
+    """Last-Modified à la seconde : la seconde qui suit la dernière écriture si
+    elle est écoulée (toute écriture ultérieure sera plus récente), sinon celle
+    de l'écriture, qui ne pourra valider aucun 304 (voir not_modified)"""
+    after = last_modified.replace(microsecond=0) + timedelta(seconds=1)
+    return after if after <= datetime.now(timezone.utc) else last_modified.replace(microsecond=0)
+
+
+def set_validators(response, etag, last_modified):
+    """Ajoute ETag, Last-Modified et Cache-Control à une réponse"""
+    response.set_etag(etag, weak=True)
+    response.last_modified = _http_last_modified(last_modified)
+    # Stockable, mais à revalider à chaque affichage
+    response.cache_control.no_cache = True
+    return response
+
+
+def not_modified(etag, last_modified):
+    """Réponse 304 si la requête revalide une page toujours à jour, sinon None"""
+    if request.if_none_match:
+        fresh = request.if_none_match.contains_weak(etag)
+    else:
+        # Comparaison stricte avec la date exacte : If-Modified-Since est à la
+        # seconde, une écriture dans la même seconde rend la page périmée
+        fresh = request.if_modified_since is not None and last_modified < request.if_modified_since
+    if not fresh:
+        return None
+    get_page_cache().count_not_modified()
+    return set_validators(Response(status=304), etag, last_modified)
+
+
+class _Entry:
+    __slots__ = ("value", "size", "render_seconds", "expires_at")
+
+    def __init__(self, value, size, render_seconds, expires_at):
+        self.value = value
+        self.size = size
+        self.render_seconds = render_seconds
+        self.expires_at = expires_at
+
+
+class PageCache:
+    """Rendus de la version courante de la bibliothèque, LRU borné en octets"""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._version = None
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0, "not_modified": 0,
+                       "render_seconds": 0.0, "saved_seconds": 0.0}
+
+    def _switch(self, version):
+        """Passe à ``version`` si elle est plus récente ; False pour une version dépassée"""
+        if self._version is not None and version < self._version:
+            return False
+        if version != self._version:
+            if self._entries:
+                self._stats["invalidations"] += 1
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+        return True
+
+    def get_or_render(self, version, key, render):
+        """Rendu en cache de ``key`` pour ``version`` ; sinon ``render()``, mis en cache.
+
+        ``render`` renvoie ``(html, données)`` ; les données (petites) sont
+        rendues avec le HTML aux appels suivants.
+        """
+        now = time.monotonic()
+        with self._lock:
+            current = self._switch(version)
+            entry = self._entries.get(key) if current else None
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                self._stats["saved_seconds"] += entry.render_seconds
+                return entry.value
+            self._stats["misses"] += 1
+
+        started = time.perf_counter()
+        value = render()
+        elapsed = time.perf_counter() - started
+        size = sys.getsizeof(value[0])
+        with self._lock:
+            self._stats["render_seconds"] += elapsed
+            # La bibliothèque a changé pendant le rendu : ne pas garder un rendu périmé
+            if version != self._version or size > self.max_bytes:
+                return value
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = _Entry(value, size, elapsed, now + self.ttl)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self._stats["evictions"] += 1
+        return value
+
+    def count_not_modified(self):
+        with self._lock:
+            self._stats["not_modified"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(version=self._version, entries=len(self._entries), bytes=self._bytes,
+                         max_bytes=self.max_bytes)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = round(stats["hits"] / lookups, 3) if lookups else None
+        stats["render_ms"] = round(stats.pop("render_seconds") * 1000, 1)
+        stats["render_ms_saved"] = round(stats.pop("saved_seconds") * 1000, 1)
+        return stats
+
+
+_cache = PageCache()
+
+
+def configure_page_cache(max_bytes=None, ttl=None):
+    """Règle la taille maximale (octets) et la durée de vie (s) des rendus en cache"""
+    if max_bytes is not None:
+        _cache.max_bytes = max(0, int(max_bytes))
+    if ttl is not None:
+        _cache.ttl = max(0, ttl)
+    _cache.clear()
+
+
+def get_page_cache():
+    return _cache
+
+
+def page_cache_stats():
+    return _cache.stats()
@@ -0,0 +1,86 @@
+"""Pagination par curseur (keyset) de la bibliothèque.
+
+Les titres sont triés par ``date_maj DESC, id DESC`` ; le curseur d'une page
+encode le couple (date_maj, id) de son dernier titre, et la page suivante
+reprend juste après grâce à l'index ``ix_mangas_date_maj_id``. Le coût d'une
+page ne dépend donc pas de sa position dans la liste, contrairement à
+OFFSET.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_, tuple_
+
+from models import Manga
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 96
+
+
+def encode_token(values):
+    """Jeton opaque (JSON en base64 URL) ; partagé avec les curseurs de recherche"""
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_token(cursor):
+    """Valeurs d'un jeton ; ValueError s'il est invalide"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Curseur invalide : {cursor!r}") from e
+    if not isinstance(values, list):
+        raise ValueError(f"Curseur invalide : {cursor!r}")
+    return values
+
+
+def encode_cursor(manga):
+    """Curseur opaque désignant la position juste après ``manga``"""
+    return encode_token([manga.date_maj.isoformat() if manga.date_maj else None, manga.id])
+
+
+def decode_cursor(cursor):
+    """``(date_maj, id)`` d'un curseur ; ValueError s'il est invalide"""
+    values = decode_token(cursor)
+    try:
+        date_maj, manga_id = values
+        if date_maj is not None:
+            date_maj = datetime.fromisoformat(date_maj)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Curseur invalide : {cursor!r}") from e
+    if not isinstance(manga_id, int):
+        raise ValueError(f"Curseur invalide : {cursor!r}")
+    return date_maj, manga_id
+
+
+def clamp_page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+
+
+def _after(date_maj, manga_id):
+    """Titres situés après (date_maj, id) dans l'ordre date_maj DESC, id DESC.
+
+    SQLite classe NULL avant toute valeur : en ordre décroissant, les titres
+    sans date_maj viennent en dernier.
+    """
+    if date_maj is None:
+        return and_(Manga.date_maj.is_(None), Manga.id < manga_id)
+    return or_(tuple_(Manga.date_maj, Manga.id) < (date_maj, manga_id), Manga.date_maj.is_(None))
+
+
+def keyset_page(query, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """Renvoie ``(titres, curseur_suivant)`` ; le curseur vaut None à la dernière page"""
+    if cursor:
+        query = query.filter(_after(*decode_cursor(cursor)))
+    rows = query.order_by(Manga.date_maj.desc(), Manga.id.desc()).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
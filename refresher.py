@@ -0,0 +1,301 @@
+"""Rafraîchissement groupé de la bibliothèque via un pool de workers borné"""
+import json
+import logging
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+
+from chapters import is_newer, record_chapter
+from covers import enforce_cover_quota, warm_cover
+from models import db, Manga
+from scheduler import pollable_filter, record_check
+from scraper.scraper import scrape_manga_info
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_PER_HOST = 2
+DEFAULT_BATCH_SIZE = 50
+
+
+def apply_scrape_result(manga, data):
+    """Applique le résultat d'un scraping à un manga (sans commit).
+
+    Retourne True si le dernier chapitre a changé.
+    """
+    manga.titre = data.get("titre", manga.titre)
+
+    # Ne pas écraser l'image uploadée manuellement
+    if not manga.image_couverture or not manga.image_couverture.startswith('/static/uploads/'):
+        manga.image_couverture = data.get("image", manga.image_couverture)
+
+    # Tout chapitre observé entre dans l'historique ; le dernier chapitre
+    # n'avance que si le nouveau est plus loin ("Extra" n'écrase pas "126")
+    old = manga.dernier_chapitre
+    new = str(data.get("chapitre", old))
+    if new != old:
+        record_chapter(manga, new)
+        if is_newer(new, old):
+            manga.dernier_chapitre = new
+            # Lu sur la page de série : l'URL suit le dernier chapitre paru
+            if data.get("url"):
+                manga.url = data["url"]
+
+    manga.resume = data.get("resume", manga.resume)
+    manga.source = data.get("source", manga.source)
+    return manga.dernier_chapitre != old
+
+
+def scrape_with_cover(url):
+    """Scrape une page et met en cache sa couverture, dans le thread du worker.
+
+    Une erreur réseau ou de parsing est propagée : le titre n'est pas
+    écrasé par un résultat de repli déduit de l'URL.
+    """
+    data = scrape_manga_info(url, raise_errors=True)
+    warm_cover(data.get("image"))
+    return data
+
+
+class BulkRefreshJob:
+    """Re-scrape toute la bibliothèque (titres suivis par URL http(s)) avec une
+    concurrence bornée par hôte.
+
+    Les workers ne font que le réseau et le parsing ; leurs résultats sont
+    gardés en mémoire, puis le thread du job les applique par lots de
+    ``batch_size`` titres, chaque lot dans une transaction courte sans accès
+    réseau : le verrou d'écriture (écrivain unique, voir dbengine.py) n'est
+    jamais tenu pendant un scraping.
+    """
+
+    def __init__(self, app, max_workers=DEFAULT_MAX_WORKERS, per_host=DEFAULT_PER_HOST,
+                 batch_size=DEFAULT_BATCH_SIZE):
+        self.app = app
+        self.max_workers = max(1, max_workers)
+        self.per_host = max(1, per_host)
+        self.batch_size = max(1, batch_size)
+
+        self.status = "pending"
+        self.total = 0
+        self.done = 0
+        self.updated = 0
+        self.errors = 0
+        self.commits = 0
+        self.started_at = None
+        self.finished_at = None
+
+        self._events = []
+        self._cond = threading.Condition()
+        self._thread = None
+
+    # --- Suivi de progression ---
+
+    def snapshot(self):
+        """État courant du job, sérialisable en JSON"""
+        with self._cond:
+            return self._snapshot()
+
+    def _snapshot(self):
+        elapsed = None
+        if self.started_at:
+            elapsed = round((self.finished_at or time.time()) - self.started_at, 2)
+        return {
+            "status": self.status,
+            "total": self.total,
+            "done": self.done,
+            "updated": self.updated,
+            "errors": self.errors,
+            "commits": self.commits,
+            "elapsed": elapsed,
+        }
+
+    def _emit(self, **event):
+        with self._cond:
+            event.update(self._snapshot())
+            self._events.append(event)
+            self._cond.notify_all()
+
+    def iter_events(self, start=0, timeout=15.0):
+        """Générateur des événements de progression (bloquant jusqu'à la fin du job).
+
+        Produit ``None`` toutes les ``timeout`` secondes sans événement pour
+        permettre d'envoyer un keep-alive.
+        """
+        index = start
+        while True:
+            with self._cond:
+                if index >= len(self._events) and self.status not in ("done", "failed"):
+                    self._cond.wait(timeout)
+                pending = self._events[index:]
+                finished = self.status in ("done", "failed")
+            if not pending and not finished:
+                yield None
+                continue
+            for event in pending:
+                yield event
+            index += len(pending)
+            if finished and index >= len(self._events):
+                return
+
+    def iter_sse(self):
+        """Flux Server-Sent Events de la progression"""
+        for event in self.iter_events():
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+    # --- Exécution ---
+
+    def start(self):
+        """Lance le job dans un thread de fond"""
+        self._thread = threading.Thread(target=self.run, name="bulk-refresh", daemon=True)
+        self._thread.start()
+        return self
+
+    def is_running(self):
+        return self.status in ("pending", "running")
+
+    def run(self):
+        """Exécute le job dans le thread courant"""
+        with self.app.app_context():
+            try:
+                self._run()
+            except Exception as e:
+                logger.exception("Échec du rafraîchissement groupé")
+                db.session.rollback()
+                with self._cond:
+                    self.status = "failed"
+                    self.finished_at = time.time()
+                self._emit(type="error", message=str(e))
+            finally:
+                db.session.remove()
+
+    def _run(self):
+        # Les entrées manuelles (URL "#") n'ont pas de page à relire
+        rows = db.session.query(Manga.id, Manga.url).filter(pollable_filter()).order_by(Manga.id).all()
+        # Aucune connexion gardée pendant les scrapings
+        db.session.close()
+
+        # Une file par hôte pour respecter la limite de concurrence par site
+        pending = {}
+        for manga_id, url in rows:
+            host = urlparse(url).netloc.lower()
+            pending.setdefault(host, deque()).append((manga_id, url))
+
+        with self._cond:
+            self.total = len(rows)
+            self.status = "running"
+            self.started_at = time.time()
+        self._emit(type="start")
+
+        in_flight = {}
+        host_active = Counter()
+        scraped = []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix="bulk-refresh") as executor:
+            while pending or in_flight:
+                # Répartir les titres entre les hôtes, à tour de rôle
+                for host in list(pending):
+                    host_queue = pending[host]
+                    while (host_queue and host_active[host] < self.per_host
+                           and len(in_flight) < self.max_workers):
+                        manga_id, url = host_queue.popleft()
+                        future = executor.submit(scrape_with_cover, url)
+                        in_flight[future] = (manga_id, host)
+                        host_active[host] += 1
+                    if not host_queue:
+                        del pending[host]
+
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    manga_id, host = in_flight.pop(future)
+                    host_active[host] -= 1
+                    data = self._collect(manga_id, future)
+                    if data is not None:
+                        scraped.append((manga_id, data))
+
+                if len(scraped) >= self.batch_size:
+                    self._apply_batch(scraped)
+                    scraped = []
+
+        if scraped:
+            self._apply_batch(scraped)
+        enforce_cover_quota()
+
+        with self._cond:
+            self.status = "done"
+            self.finished_at = time.time()
+        logger.info("Rafraîchissement groupé terminé : %s titres, %s mis à jour, %s erreurs",
+                    self.done, self.updated, self.errors)
+        self._emit(type="done")
+
+    def _collect(self, manga_id, future):
+        """Résultat d'un scraping terminé, ou None (erreur comptée)"""
+        try:
+            data = future.result()
+        except Exception as e:
+            logger.warning("Échec du scraping du manga #%s : %s", manga_id, e)
+            with self._cond:
+                self.done += 1
+                self.errors += 1
+            self._emit(type="item", manga_id=manga_id, ok=False, message=str(e))
+            return None
+        with self._cond:
+            self.done += 1
+        return data
+
+    def _apply_batch(self, scraped):
+        """Applique un lot de résultats et le commit, en une transaction courte"""
+        started = time.perf_counter()
+        try:
+            mangas = {manga.id: manga for manga in
+                      Manga.query.filter(Manga.id.in_([manga_id for manga_id, _ in scraped]))}
+            items = []
+            for manga_id, data in scraped:
+                manga = mangas.get(manga_id)
+                if manga is None:
+                    # Supprimé pendant le rafraîchissement
+                    continue
+                changed = apply_scrape_result(manga, data)
+                record_check(manga, changed)
+                items.append(dict(manga_id=manga_id, ok=True, titre=manga.titre,
+                                  chapitre=manga.dernier_chapitre, changed=changed))
+            db.session.commit()
+        except Exception as e:
+            logger.exception("Échec du commit du rafraîchissement groupé")
+            db.session.rollback()
+            with self._cond:
+                self.errors += len(scraped)
+            self._emit(type="error", message=f"Échec du commit : {e}")
+            return
+        finally:
+            db.session.close()
+        logger.debug("Lot de %s titres appliqué en %.1f ms", len(scraped), (time.perf_counter() - started) * 1000)
+        with self._cond:
+            self.commits += 1
+            self.updated += sum(item["changed"] for item in items)
+        for item in items:
+            self._emit(type="item", **item)
+
+
+_current_job = None
+_job_lock = threading.Lock()
+
+
+def current_job():
+    """Dernier job de rafraîchissement groupé lancé dans ce processus"""
+    return _current_job
+
+
+def start_bulk_refresh(app, **options):
+    """Lance un rafraîchissement groupé, sauf si un job est déjà en cours"""
+    global _current_job
+    with _job_lock:
+        if _current_job is not None and _current_job.is_running():
+            return _current_job, False
+        _current_job = BulkRefreshJob(app, **options).start()
+        return _current_job, True
@@ -0,0 +1,173 @@
+"""Vérification automatique des nouveaux chapitres, à intervalle adaptatif.
+
+Chaque manga a un ``PollSchedule`` : date de la prochaine vérification et
+intervalle courant. L'intervalle est appris des changements de
+``dernier_chapitre`` observés :
+
+- une série qui sort un chapitre tous les ``g`` en moyenne (moyenne
+  glissante) est vérifiée ``CHECKS_PER_RELEASE`` fois par période ``g`` ;
+- une série sans nouveauté depuis plus de ``DORMANT_AFTER`` fois son
+  rythme habituel (ou dont on ne connaît pas le rythme) voit son
+  intervalle multiplié par ``DORMANT_BACKOFF`` à chaque vérification vaine ;
+- un léger aléa (±``JITTER``) et un nombre maximal de vérifications par
+  passage étalent la charge dans le temps.
+
+Un nouveau planning part du rythme passé enregistré dans l'historique des
+chapitres (chapters.py), s'il y en a un.
+
+Le worker (jobs.Worker) appelle ``jobs.enqueue_due_polls`` à chaque passage ;
+les vérifications passent par la file de jobs (déduplication, retries).
+
+Seuls les mangas suivis par une URL http(s) ont un planning : les entrées
+manuelles (URL ``#``) n'ont rien à vérifier.
+"""
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, or_, select
+
+from chapters import release_cadence
+from models import db, Manga, PollSchedule
+
+DEFAULT_INTERVAL = 6 * 3600          # rythme inconnu
+MIN_INTERVAL = 30 * 60
+MAX_INTERVAL = 7 * 24 * 3600
+CHECKS_PER_RELEASE = 8
+DORMANT_AFTER = 2.0
+DORMANT_BACKOFF = 1.5
+GAP_SMOOTHING = 0.3                  # poids du dernier écart dans la moyenne
+JITTER = 0.1
+MAX_DUE_PER_TICK = 20
+# Référence pour les statistiques : un balayage naïf de toute la bibliothèque
+NAIVE_SWEEP_INTERVAL = 3600
+
+
+def is_pollable(url):
+    """L'URL désigne-t-elle une page à vérifier (http ou https) ?"""
+    return bool(url) and url.lower().startswith(("http://", "https://"))
+
+
+def pollable_filter():
+    """Filtre SQL des mangas à vérifier, pendant de is_pollable"""
+    return or_(Manga.url.ilike("http://%"), Manga.url.ilike("https://%"))
+
+
+def _clamp(seconds):
+    return max(MIN_INTERVAL, min(MAX_INTERVAL, seconds))
+
+
+def _jittered(seconds):
+    return seconds * random.uniform(1 - JITTER, 1 + JITTER)
+
+
+def next_interval(schedule, changed, now):
+    """Met à jour le rythme appris de ``schedule`` et renvoie le prochain intervalle"""
+    if changed:
+        if schedule.last_change_at is not None:
+            gap = (now - schedule.last_change_at).total_seconds()
+            if gap > 0:
+                if schedule.avg_gap_seconds is None:
+                    schedule.avg_gap_seconds = gap
+                else:
+                    schedule.avg_gap_seconds = (GAP_SMOOTHING * gap
+                                                + (1 - GAP_SMOOTHING) * schedule.avg_gap_seconds)
+        schedule.last_change_at = now
+        schedule.changes += 1
+
+    cadence = schedule.avg_gap_seconds
+    if cadence and (changed or schedule.last_change_at is None
+                    or (now - schedule.last_change_at).total_seconds() <= DORMANT_AFTER * cadence):
+        interval = cadence / CHECKS_PER_RELEASE
+    elif changed:
+        # Premier changement observé : on ne connaît pas encore le rythme
+        interval = DEFAULT_INTERVAL
+    else:
+        interval = schedule.interval_seconds * DORMANT_BACKOFF
+    return _clamp(interval)
+
+
+def record_check(manga, changed, now=None):
+    """Enregistre une vérification du manga (sans commit) et planifie la suivante"""
+    now = now or datetime.utcnow()
+    schedule = db.session.get(PollSchedule, manga.id)
+    if schedule is None:
+        schedule = _new_schedule(manga, now)
+        db.session.add(schedule)
+    schedule.checks += 1
+    schedule.last_checked_at = now
+    schedule.interval_seconds = next_interval(schedule, changed, now)
+    schedule.next_check_at = now + timedelta(seconds=_jittered(schedule.interval_seconds))
+    return schedule
+
+
+def _new_schedule(manga, now):
+    # date_maj bouge aussi à l'édition : seuls les chapitres découverts par
+    # scraping renseignent le rythme
+    avg_gap, last_change_at = release_cadence(manga.id)
+    interval = _clamp(avg_gap / CHECKS_PER_RELEASE) if avg_gap else DEFAULT_INTERVAL
+    # Première vérification répartie sur l'intervalle
+    return PollSchedule(
+        manga_id=manga.id,
+        interval_seconds=interval,
+        avg_gap_seconds=avg_gap,
+        next_check_at=now + timedelta(seconds=random.uniform(0, interval)),
+        last_change_at=last_change_at,
+        checks=0,
+        changes=0,
+    )
+
+
+def sync_schedules(now=None):
+    """Crée les plannings des nouveaux mangas, supprime ceux des mangas supprimés
+    ou sans URL à vérifier"""
+    now = now or datetime.utcnow()
+    missing = (Manga.query
+               .filter(pollable_filter())
+               .filter(~select(PollSchedule.manga_id).where(PollSchedule.manga_id == Manga.id).exists())
+               .all())
+    for manga in missing:
+        db.session.add(_new_schedule(manga, now))
+    orphans = (PollSchedule.query
+               .filter(~select(Manga.id)
+                       .where(Manga.id == PollSchedule.manga_id, pollable_filter())
+                       .exists())
+               .delete(synchronize_session=False))
+    db.session.commit()
+    return len(missing), orphans
+
+
+def due_schedules(now=None, limit=MAX_DUE_PER_TICK):
+    """Plannings arrivés à échéance, les plus en retard d'abord"""
+    now = now or datetime.utcnow()
+    return (PollSchedule.query
+            .filter(PollSchedule.next_check_at <= now)
+            .order_by(PollSchedule.next_check_at)
+            .limit(limit)
+            .all())
+
+
+def postpone(schedule, now=None):
+    """Repousse l'échéance d'un planning dont la vérification vient d'être programmée.
+
+    record_check la recalculera quand le job aura tourné ; si le job échoue
+    pour de bon, le manga sera revérifié à l'intervalle courant.
+    """
+    now = now or datetime.utcnow()
+    schedule.next_check_at = now + timedelta(seconds=_jittered(schedule.interval_seconds))
+
+
+def scheduler_stats():
+    """Charge estimée (requêtes/jour) face à un balayage à intervalle fixe"""
+    count, per_day, due = db.session.query(
+        func.count(PollSchedule.manga_id),
+        func.coalesce(func.sum(86400.0 / PollSchedule.interval_seconds), 0.0),
+        func.coalesce(func.sum(case((PollSchedule.next_check_at <= datetime.utcnow(), 1), else_=0)), 0),
+    ).one()
+    naive = count * 86400.0 / NAIVE_SWEEP_INTERVAL
+    return {
+        "tracked": count,
+        "due": int(due),
+        "requests_per_day": round(per_day, 1),
+        "naive_requests_per_day": round(naive, 1),
+        "savings": round(1 - per_day / naive, 3) if naive else 0.0,
+    }
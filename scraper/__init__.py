@@ -1,4 +1,15 @@
 """Package de scraping pour manga tracker"""
 from .scraper import scrape_manga_info
+from .async_scraper import scrape_manga_info_async, scrape_many_async
+from .session import get_session, pool_stats
+from .urls import analyze_url, extract_many
 
-__all__ = ['scrape_manga_info']
+__all__ = [
+    'scrape_manga_info',
+    'scrape_manga_info_async',
+    'scrape_many_async',
+    'get_session',
+    'pool_stats',
+    'analyze_url',
+    'extract_many',
+]
@@ -0,0 +1,213 @@
+"""Backend asynchrone du scraper, basé sur httpx.
+
+Le téléchargement se fait sans bloquer la boucle d'événements ; le parsing
+(BeautifulSoup, coûteux en CPU) est déporté dans un thread et réutilise les
+mêmes parsers que scrape_manga_info, les deux backends donnent donc le même
+résultat.
+"""
+import asyncio
+import logging
+
+try:
+    import httpx
+except ImportError:  # dépendance optionnelle, seul le backend async en a besoin
+    httpx = None
+
+from .cache import get_fetch_cache
+from .logs import ScrapeSummary
+from .ratelimit import THROTTLE_STATUSES, RateLimited, get_rate_limiter
+from .sites import adapter_for
+from .scraper import (
+    PLACEHOLDER_IMG,
+    index_key,
+    network_error_result,
+    parse_chapter_page,
+    parse_index_page,
+    parse_page,
+    request_headers,
+)
+from .session import (
+    DEFAULT_HEADERS,
+    DEFAULT_POOL_SIZE,
+    REQUEST_TIMEOUT,
+    RETRY_BACKOFF_FACTOR,
+    RETRY_STATUSES,
+    RETRY_TOTAL,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 8
+
+
+def create_async_client(max_connections=DEFAULT_CONCURRENCY, **kwargs):
+    """Crée un client httpx avec les mêmes headers que la session synchrone"""
+    if httpx is None:
+        raise RuntimeError("Le backend async nécessite httpx (pip install httpx)")
+    kwargs.setdefault("headers", DEFAULT_HEADERS)
+    kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+    kwargs.setdefault("follow_redirects", True)
+    kwargs.setdefault("limits", httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max(max_connections, DEFAULT_POOL_SIZE),
+    ))
+    return httpx.AsyncClient(**kwargs)
+
+
+def _backoff(failures):
+    """Délai avant un nouvel essai, calqué sur urllib3 Retry"""
+    if failures <= 1:
+        return 0
+    return RETRY_BACKOFF_FACTOR * (2 ** (failures - 1))
+
+
+async def _fetch(client, url, headers=None, timeout=None):
+    """GET avec la même politique de retry et de débit que la session synchrone"""
+    limiter = get_rate_limiter()
+    failures = 0
+    throttled = 0
+    while True:
+        await limiter.acquire_async(url)
+        try:
+            if timeout:
+                response = await client.get(url, headers=headers, timeout=timeout)
+            else:
+                response = await client.get(url, headers=headers)
+        except httpx.TransportError:
+            failures += 1
+            if failures > RETRY_TOTAL:
+                raise
+            await asyncio.sleep(_backoff(failures))
+            continue
+
+        limiter.observe(url, response.status_code, response.headers)
+        if response.status_code in THROTTLE_STATUSES and throttled < RETRY_TOTAL:
+            # Le limiteur a ralenti le site et attendra Retry-After
+            throttled += 1
+            continue
+
+        if response.status_code in RETRY_STATUSES and failures < RETRY_TOTAL:
+            failures += 1
+            await asyncio.sleep(_backoff(failures))
+            continue
+
+        # 304 : revalidation réussie, pas une erreur
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+
+async def scrape_manga_info_async(url: str, client=None) -> dict:
+    """Équivalent asynchrone de scrape_manga_info (page de série comprise)"""
+    own_client = client is None
+    if own_client:
+        client = create_async_client()
+    try:
+        adapter = adapter_for(url)
+        cache = get_fetch_cache() if adapter.uses_cache else None
+        series_url = await asyncio.to_thread(cache.series_for, url) if cache and adapter.has_index else None
+        if series_url:
+            result = await _scrape_index(client, url, series_url, adapter, cache)
+            if result is not None:
+                return result
+        return await _scrape_chapter(client, url, adapter, cache)
+    finally:
+        if own_client:
+            await client.aclose()
+
+
+async def _scrape_index(client, url, series_url, adapter, cache):
+    """Scraping par la page de série ; None pour retomber sur la page du chapitre"""
+    summary = ScrapeSummary(url, backend="async")
+    summary.update(page="index", index_url=series_url)
+    key = index_key(series_url)
+    entry = await asyncio.to_thread(cache.lookup, key)
+    try:
+        response = await _fetch(client, series_url, headers=request_headers(adapter, cache, entry),
+                                timeout=adapter.timeout)
+        summary.update(status=response.status_code)
+        if response.status_code == 304 and entry:
+            summary.update(outcome="not_modified")
+            return summary.emit(logger, await asyncio.to_thread(cache.revalidated, key, entry), PLACEHOLDER_IMG)
+        summary.update(bytes=len(response.content))
+        html = response.text
+    except (httpx.HTTPError, RateLimited) as e:
+        response = getattr(e, "response", None)
+        if response is not None and response.status_code in (404, 410):
+            await asyncio.to_thread(cache.forget_series, url)
+        summary.update(outcome="index_error", error=str(e))
+        summary.emit(logger)
+        return None
+
+    result = await asyncio.to_thread(parse_index_page, html, series_url)
+    if result is None:
+        await asyncio.to_thread(cache.forget_series, url)
+        summary.update(outcome="index_empty")
+        summary.emit(logger)
+        return None
+    await asyncio.to_thread(cache.remember, key, response.headers, len(response.content), result)
+    if result["url"] != url:
+        await asyncio.to_thread(cache.remember_series, result["url"], series_url, True)
+    return summary.emit(logger, result, PLACEHOLDER_IMG)
+
+
+async def _scrape_chapter(client, url, adapter, cache):
+    logger.debug("Démarrage du scraping async pour: %s", url)
+    summary = ScrapeSummary(url, backend="async")
+    entry = await asyncio.to_thread(cache.lookup, url) if cache else None
+
+    try:
+        response = await _fetch(client, url, headers=request_headers(adapter, cache, entry),
+                                timeout=adapter.timeout)
+        summary.update(status=response.status_code)
+
+        # Page inchangée depuis le dernier passage : ni corps ni parsing
+        if response.status_code == 304 and entry:
+            logger.debug("Page inchangée (304), résultat en cache")
+            summary.update(outcome="not_modified")
+            return summary.emit(logger, await asyncio.to_thread(cache.revalidated, url, entry), PLACEHOLDER_IMG)
+
+        logger.debug("Page chargée avec succès (status: %s, taille: %s bytes)",
+                     response.status_code, len(response.content))
+        summary.update(bytes=len(response.content))
+        html = response.text
+    except (httpx.HTTPError, RateLimited) as e:
+        summary.update(outcome="network_error", error=str(e))
+        return summary.emit(logger, network_error_result(url), PLACEHOLDER_IMG)
+    except Exception as e:
+        summary.update(outcome="error", error=str(e))
+        return summary.emit(logger, await asyncio.to_thread(parse_page, "<html></html>", url), PLACEHOLDER_IMG)
+
+    # Le parsing est CPU-bound : ne pas bloquer la boucle d'événements
+    result, series_url = await asyncio.to_thread(parse_chapter_page, html, url)
+    if cache:
+        await asyncio.to_thread(cache.remember, url, response.headers, len(response.content), result)
+        if series_url:
+            await asyncio.to_thread(cache.remember_series, url, series_url)
+    return summary.emit(logger, result, PLACEHOLDER_IMG)
+
+
+async def scrape_many_async(urls, concurrency=DEFAULT_CONCURRENCY, client=None):
+    """Scrape un lot d'URLs en parallèle (au plus ``concurrency`` à la fois).
+
+    Les résultats sont renvoyés dans l'ordre des URLs, comme asyncio.gather.
+    """
+    own_client = client is None
+    if own_client:
+        client = create_async_client(max_connections=concurrency)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def bounded(url):
+        async with semaphore:
+            return await scrape_manga_info_async(url, client=client)
+
+    try:
+        return await asyncio.gather(*(bounded(url) for url in urls))
+    finally:
+        if own_client:
+            await client.aclose()
+
+
+def scrape_many(urls, concurrency=DEFAULT_CONCURRENCY):
+    """Point d'entrée synchrone pour scraper un lot d'URLs avec le backend async"""
+    return asyncio.run(scrape_many_async(list(urls), concurrency=concurrency))
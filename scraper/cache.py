@@ -0,0 +1,241 @@
+"""Cache persistant des pages scrapées pour les requêtes conditionnelles.
+
+Pour chaque URL on garde les validateurs HTTP (ETag / Last-Modified) et le
+résultat déjà extrait. Au rafraîchissement suivant, on envoie
+If-None-Match / If-Modified-Since : sur un 304, le corps n'est pas
+retéléchargé et la page n'est pas re-parsée.
+
+Le cache retient aussi, pour chaque page de chapitre, la page de série
+(index des chapitres) trouvée en la parsant : les rafraîchissements
+suivants ne lisent plus que cette page (voir scraper.py).
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database", "scrape_cache.db"
+)
+DEFAULT_MAX_BYTES = 20 * 1024 * 1024
+
+# À incrémenter quand le format du résultat des parsers change
+CACHE_VERSION = 3
+# Une page de série disparue n'est re-déterminée qu'après ce délai
+SERIES_RETRY_AFTER = 24 * 3600
+
+
+class FetchCache:
+    """Cache sur disque (SQLite), borné en taille, avec éviction LRU"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._conn = None
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _connection(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    url TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL,
+                    source TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    result TEXT NOT NULL,
+                    body_bytes INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_entries_last_used ON entries (last_used)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS series (
+                    url TEXT PRIMARY KEY,
+                    series_url TEXT,
+                    resolved_at REAL NOT NULL
+                )
+            """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    # --- Lecture / écriture ---
+
+    def lookup(self, url):
+        """Entrée en cache pour l'URL, ou None"""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT source, etag, last_modified, result, body_bytes FROM entries "
+                "WHERE url = ? AND version = ?",
+                (url, CACHE_VERSION),
+            ).fetchone()
+        if row is None:
+            return None
+        source, etag, last_modified, result, body_bytes = row
+        return {
+            "source": source,
+            "etag": etag,
+            "last_modified": last_modified,
+            "result": json.loads(result),
+            "body_bytes": body_bytes,
+        }
+
+    @staticmethod
+    def conditional_headers(entry):
+        """Headers If-None-Match / If-Modified-Since pour revalider une entrée"""
+        headers = {}
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def revalidated(self, url, entry):
+        """La page n'a pas changé (304) : renvoie le résultat en cache"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("UPDATE entries SET last_used = ? WHERE url = ?", (time.time(), url))
+            conn.commit()
+            self._count(entry["source"], hit=True, bytes_saved=entry["body_bytes"])
+        return dict(entry["result"])
+
+    def remember(self, url, response_headers, body_bytes, result):
+        """Mémorise le résultat d'une page téléchargée (200)"""
+        source = result.get("source")
+        etag = response_headers.get("ETag")
+        last_modified = response_headers.get("Last-Modified")
+        with self._lock:
+            conn = self._connection()
+            self._count(source, hit=False)
+            if not etag and not last_modified:
+                # Pas de validateur : impossible de revalider plus tard
+                conn.execute("DELETE FROM entries WHERE url = ?", (url,))
+                conn.commit()
+                return
+            payload = json.dumps(result, ensure_ascii=False)
+            size = len(url) + len(payload) + len(etag or "") + len(last_modified or "")
+            conn.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(url, version, source, etag, last_modified, result, body_bytes, size, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, CACHE_VERSION, source, etag, last_modified, payload, body_bytes, size, time.time()),
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn):
+        """Supprime les entrées les moins récemment utilisées au-delà de max_bytes"""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Descendre sous 90 % de la limite pour ne pas évincer à chaque écriture
+        target = total - int(self.max_bytes * 0.9)
+        freed = 0
+        stale = []
+        for url, size in conn.execute("SELECT url, size FROM entries ORDER BY last_used"):
+            stale.append((url,))
+            freed += size
+            if freed >= target:
+                break
+        conn.executemany("DELETE FROM entries WHERE url = ?", stale)
+
+    def clear(self):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM series")
+            conn.commit()
+
+    # --- Pages de série ---
+
+    def series_for(self, url):
+        """Page de série connue pour une page de chapitre, ou None"""
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT series_url FROM series WHERE url = ?", (url,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def remember_series(self, url, series_url, force=False):
+        """Retient la page de série d'un chapitre.
+
+        Sans ``force``, une page de série récemment disparue n'est pas
+        réenregistrée avant ``SERIES_RETRY_AFTER`` : le chapitre continue
+        d'être lu directement plutôt que d'échouer deux fois par passage.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO series (url, series_url, resolved_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (url) DO UPDATE SET series_url = excluded.series_url, resolved_at = excluded.resolved_at "
+                "WHERE ? OR series.series_url IS NOT NULL OR series.resolved_at < ?",
+                (url, series_url, now, force, now - SERIES_RETRY_AFTER),
+            )
+            conn.commit()
+
+    def forget_series(self, url):
+        """La page de série ne répond plus : retour à la page du chapitre"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute("UPDATE series SET series_url = NULL, resolved_at = ? WHERE url = ?", (time.time(), url))
+            conn.commit()
+
+    # --- Statistiques ---
+
+    def _count(self, source, hit, bytes_saved=0):
+        stats = self._stats.setdefault(source or "inconnu", {"requests": 0, "hits": 0, "bytes_saved": 0})
+        stats["requests"] += 1
+        if hit:
+            stats["hits"] += 1
+            stats["bytes_saved"] += bytes_saved
+
+    def stats(self):
+        """Taux de hit et octets économisés, par source"""
+        with self._lock:
+            snapshot = {source: dict(counts) for source, counts in self._stats.items()}
+        for counts in snapshot.values():
+            counts["hit_rate"] = round(counts["hits"] / counts["requests"], 3) if counts["requests"] else None
+        return snapshot
+
+
+_cache = None
+_cache_lock = threading.Lock()
+_enabled = True
+
+
+def configure_fetch_cache(path=None, max_bytes=None, enabled=None):
+    """Change l'emplacement, la taille maximale ou désactive le cache"""
+    global _cache, _enabled
+    with _cache_lock:
+        if enabled is not None:
+            _enabled = enabled
+        if path is not None or max_bytes is not None:
+            _cache = FetchCache(path or DEFAULT_CACHE_PATH, max_bytes or DEFAULT_MAX_BYTES)
+
+
+def get_fetch_cache():
+    """Cache partagé du processus, ou None s'il est désactivé"""
+    global _cache
+    if not _enabled:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = FetchCache()
+    return _cache
+
+
+def cache_stats():
+    cache = get_fetch_cache()
+    return cache.stats() if cache else {}
@@ -0,0 +1,266 @@
+"""Extraction des champs d'une page : nettoyage du texte et choix des images.
+
+Briques partagées par les adaptateurs de site (scraper/sites) : fonctions
+de valeur des plans d'extraction (``value(element, url)``) et scoring des
+images candidates à la couverture.
+"""
+import json
+import re
+from functools import lru_cache
+from urllib.parse import urljoin
+
+from .urls import chapter_from_url
+
+PLACEHOLDER_IMG = "https://via.placeholder.com/300x420?text=Manga"
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_CONTROL_CHARS_RE = re.compile(r'[\x00-\x1f\x7f-\x9f]')
+
+def clean_text(text):
+    """Nettoie le texte des caractères indésirables"""
+    if not text:
+        return None
+    # Nettoyer les espaces multiples et caractères spéciaux
+    cleaned = _WHITESPACE_RE.sub(' ', text.strip())
+    # Enlever les caractères de contrôle
+    cleaned = _CONTROL_CHARS_RE.sub('', cleaned)
+    return cleaned if len(cleaned) > 1 else None
+
+# Mots-clés et motifs compilés une seule fois pour le scoring des images
+_POSITIVE_IMAGE_KEYWORDS = ('cover', 'poster', 'thumb', 'manga', 'couverture')
+_NEGATIVE_IMAGE_KEYWORDS = ('avatar', 'icon', 'logo', 'button', 'banner', 'ad')
+_INVALID_IMAGE_RE = re.compile('|'.join(re.escape(p) for p in (
+    '1x1', 'loading', 'spinner', 'default.', 'placeholder',
+    'avatar', 'icon', 'logo', 'banner', 'button', 'ad.', '/ads/',
+    'facebook', 'twitter', 'google', 'youtube'
+)))
+_VALID_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+_IMAGE_INDICATOR_RE = re.compile('jpg|jpeg|png|gif|webp|image|img')
+_SIZE_RE = re.compile(r'(\d+)x(\d+)')
+
+# Nettoyage des titres
+_HEADING_CHAPITRE_RE = re.compile(r'\s*-?\s*Chapitre\s*\d+.*$', re.IGNORECASE)
+_HEADING_CHAPTER_RE = re.compile(r'\s*-?\s*Chapter\s*\d+.*$', re.IGNORECASE)
+_META_SCAN_RE = re.compile(r'\s*-?\s*Scan.*$', re.IGNORECASE)
+_PAGE_TITLE_SPLIT_RE = re.compile(r'[-|–—]')
+
+def score_manga_image(url, img_element):
+    """Score une image pour déterminer si c'est probablement une couverture de manga"""
+    score = 0
+    url_lower = url.lower()
+    
+    # Points positifs pour des mots-clés dans l'URL
+    for keyword in _POSITIVE_IMAGE_KEYWORDS:
+        if keyword in url_lower:
+            score += 10
+    
+    # Points pour les dimensions (si présentes dans l'URL)
+    size_match = _SIZE_RE.search(url)
+    if size_match:
+        width, height = map(int, size_match.groups())
+        # Préférer les images rectangulaires verticales (typique des mangas)
+        if height > width and width >= 200:
+            score += 15
+        elif width >= 300 and height >= 400:
+            score += 10
+    
+    # Points pour les attributs de l'élément
+    if img_element:
+        alt_text = img_element.get('alt', '').lower()
+        if any(keyword in alt_text for keyword in _POSITIVE_IMAGE_KEYWORDS):
+            score += 5
+        
+        # Classes CSS de l'image
+        classes = img_element.get('class', [])
+        if isinstance(classes, list):
+            class_text = ' '.join(classes).lower()
+        else:
+            class_text = str(classes).lower()
+        
+        if any(keyword in class_text for keyword in _POSITIVE_IMAGE_KEYWORDS):
+            score += 8
+    
+    # Pénalités pour des mots-clés négatifs
+    for keyword in _NEGATIVE_IMAGE_KEYWORDS:
+        if keyword in url_lower:
+            score -= 5
+    
+    return score
+
+@lru_cache(maxsize=4096)
+def is_valid_manga_image(url):
+    """Vérifie si l'URL semble être une image de manga valide"""
+    if not url:
+        return False
+    
+    url_lower = url.lower()
+    
+    # Éviter les images système
+    if _INVALID_IMAGE_RE.search(url_lower):
+        return False
+    
+    # Vérifier l'extension ou format
+    # Parfois l'extension n'est pas visible dans l'URL mais on peut deviner
+    if not url_lower.endswith(_VALID_IMAGE_EXTENSIONS):
+        # Chercher des indices d'image dans l'URL
+        if not _IMAGE_INDICATOR_RE.search(url_lower):
+            return False
+    
+    # Éviter les images trop petites (souvent des icônes)
+    size_match = _SIZE_RE.search(url)
+    if size_match:
+        width, height = map(int, size_match.groups())
+        if width < 80 or height < 80:  # Trop petit pour être une couverture
+            return False
+        if width > 2000 or height > 2000:  # Probablement trop grand
+            return False
+    
+    # URL trop courte = probablement pas une vraie image
+    if len(url) < 20:
+        return False
+    
+    return True
+
+def absolute_image_url(candidate, url):
+    """Construit l'URL complète d'une image"""
+    if candidate.startswith('//'):
+        return 'https:' + candidate
+    elif candidate.startswith('/'):
+        return urljoin(url, candidate)
+    elif not candidate.startswith('http'):
+        return urljoin(url, candidate)
+    return candidate
+
+# Attributs testés pour les sélecteurs d'images, puis pour la recherche globale
+_IMAGE_ATTRIBUTES = (
+    'src', 'data-src', 'data-lazy-src', 'data-original',
+    'data-srcset', 'srcset', 'data-image', 'data-thumb'
+)
+_ANY_IMAGE_ATTRIBUTES = ('src', 'data-src', 'data-lazy-src', 'data-original')
+
+def strip_chapter_suffix(title):
+    """Titre sans la mention "Chapitre X" / "Chapter X" qui le suit"""
+    cleaned_title = _HEADING_CHAPITRE_RE.sub('', title)
+    cleaned_title = _HEADING_CHAPTER_RE.sub('', cleaned_title)
+    return clean_text(cleaned_title)
+
+def title_from_heading(element, url):
+    """Stratégie 2 : sélecteurs CSS donnant un titre exploitable"""
+    candidate = clean_text(element.get_text())
+    if candidate and len(candidate) > 3:
+        # Nettoyer le titre (enlever "Chapitre X", etc.)
+        return strip_chapter_suffix(candidate)
+    return None
+
+def title_from_meta(element, url):
+    """Stratégie 3 : meta tags"""
+    candidate = clean_text(element.get("content"))
+    if candidate:
+        # Nettoyer le meta title
+        cleaned_title = _META_SCAN_RE.sub('', candidate)
+        cleaned_title = _HEADING_CHAPITRE_RE.sub('', cleaned_title)
+        return clean_text(cleaned_title)
+    return None
+
+def title_from_page_title(element, url):
+    """Dernier recours : titre de la page"""
+    full_title = clean_text(element.get_text())
+    if full_title:
+        # Nettoyer le titre de la page
+        parts = _PAGE_TITLE_SPLIT_RE.split(full_title)
+        if parts:
+            return clean_text(parts[0])
+    return None
+
+def image_from_meta(element, url):
+    """Stratégie 1 : meta tags (priorité haute car souvent fiables)"""
+    candidate = element.get("content")
+    if candidate and is_valid_manga_image(candidate):
+        if candidate.startswith('//'):
+            return 'https:' + candidate
+        elif candidate.startswith('/'):
+            return urljoin(url, candidate)
+        return candidate
+    return None
+
+def image_from_element(element, url):
+    """Stratégie 2 : image valide portée par un élément des sélecteurs"""
+    # Tester tous les attributs possibles
+    for attr in _IMAGE_ATTRIBUTES:
+        candidate = element.get(attr)
+        if candidate:
+            # Gérer srcset (prendre la première image)
+            if 'srcset' in attr and ',' in candidate:
+                candidate = candidate.split(',')[0].strip().split(' ')[0]
+            full_url = absolute_image_url(candidate, url)
+            if is_valid_manga_image(full_url):
+                return full_url
+    return None
+
+def scored_image(img_tag, url):
+    """Stratégie 3 : (score, url) de la meilleure image d'une balise img"""
+    best = None
+    for attr in _ANY_IMAGE_ATTRIBUTES:
+        candidate = img_tag.get(attr)
+        if candidate:
+            full_url = absolute_image_url(candidate, url)
+            if is_valid_manga_image(full_url):
+                score = score_manga_image(full_url, img_tag)
+                if best is None or score > best[0]:
+                    best = (score, full_url)
+    return best
+
+def image_from_json_ld(script, url):
+    """Stratégie 4 : données JSON embarquées"""
+    try:
+        data = json.loads(script.string)
+        if isinstance(data, dict):
+            # Chercher des champs image
+            for key in ['image', 'thumbnail', 'poster', 'cover']:
+                if key in data:
+                    candidate = data[key]
+                    if isinstance(candidate, str) and is_valid_manga_image(candidate):
+                        return candidate
+                    elif isinstance(candidate, dict) and 'url' in candidate:
+                        candidate_url = candidate['url']
+                        if is_valid_manga_image(candidate_url):
+                            return candidate_url
+    except Exception:
+        pass
+    return None
+
+def resume_from_element(element, url):
+    candidate = clean_text(element.get_text())
+    if candidate and len(candidate) > 30:  # Résumé suffisamment long
+        return candidate[:500]  # Limiter la longueur
+    return None
+
+def resume_from_meta(element, url):
+    """Résumé porté par une meta description (sites sans bloc de synopsis)"""
+    candidate = clean_text(element.get("content"))
+    if candidate and len(candidate) > 30:
+        return candidate[:500]
+    return None
+
+def latest_chapter_link(links, url, accept):
+    """``(chapitre, URL)`` du lien de chapitre le plus avancé, ou None.
+
+    ``links`` sont des balises ``<a>`` ; seules les URLs (absolues) pour
+    lesquelles ``accept(url)`` est vrai sont considérées.
+    """
+    best = None
+    for link in links:
+        href = link.get("href")
+        if not href:
+            continue
+        target = urljoin(url, href)
+        if not accept(target):
+            continue
+        label = chapter_from_url(target)
+        try:
+            key = float(label)
+        except ValueError:
+            continue
+        if best is None or key > best[0]:
+            best = (key, label, target)
+    return (best[1], best[2]) if best else None
@@ -0,0 +1,110 @@
+"""Journalisation : niveaux par module, formatage paresseux et mode JSON lines.
+
+Chaque module journalise via ``logging.getLogger(__name__)`` avec des
+arguments ``%s`` : le message n'est formaté que si le niveau est actif. Le
+détail du parsing est au niveau DEBUG ; chaque scraping produit un seul
+événement récapitulatif (INFO, ou WARNING en cas d'erreur), qui porte ses
+champs en JSON en mode structuré.
+
+Configuration par variables d'environnement (ou via configure_logging) :
+MANGATRACKER_LOG_LEVEL (INFO), MANGATRACKER_LOG_LEVELS
+("scraper.scraper=DEBUG,refresher=WARNING") et MANGATRACKER_LOG_FORMAT
+("text" ou "json").
+"""
+import json
+import logging
+import os
+import sys
+import time
+
+LOG_LEVEL = os.environ.get("MANGATRACKER_LOG_LEVEL", "INFO")
+LOG_LEVELS = os.environ.get("MANGATRACKER_LOG_LEVELS", "")
+LOG_FORMAT = os.environ.get("MANGATRACKER_LOG_FORMAT", "text")
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+# Bibliothèques HTTP bavardes (une ligne INFO par requête), sauf niveau explicite
+QUIET_LOGGERS = ("httpx", "httpcore", "urllib3")
+
+
+def parse_levels(spec):
+    """``"module=NIVEAU,..."`` -> ``{module: NIVEAU}``"""
+    if isinstance(spec, dict):
+        return dict(spec)
+    levels = {}
+    for item in (spec or "").split(","):
+        name, sep, level = item.partition("=")
+        if sep and name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Un objet JSON par ligne ; les champs de ``extra={"event": ...}`` sont à plat"""
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "event", None) or {})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+_handler = None
+
+
+def configure_logging(level=None, module_levels=None, json_lines=None, stream=None):
+    """Installe le handler du processus (remplace celui d'un appel précédent)"""
+    global _handler
+    level = (level or LOG_LEVEL).upper()
+    module_levels = parse_levels(LOG_LEVELS if module_levels is None else module_levels)
+    if json_lines is None:
+        json_lines = LOG_FORMAT.lower() == "json"
+
+    root = logging.getLogger()
+    if _handler is not None:
+        root.removeHandler(_handler)
+    _handler = logging.StreamHandler(stream or sys.stderr)
+    _handler.setFormatter(JsonLinesFormatter() if json_lines else logging.Formatter(TEXT_FORMAT))
+    root.addHandler(_handler)
+    root.setLevel(level)
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+    for name, module_level in module_levels.items():
+        logging.getLogger(name).setLevel(module_level)
+    return _handler
+
+
+class ScrapeSummary:
+    """Champs collectés pendant un scraping, journalisés en un seul événement"""
+
+    def __init__(self, url, backend):
+        self.fields = {"event": "scrape", "url": url, "backend": backend}
+        self._start = time.perf_counter()
+
+    def update(self, **fields):
+        self.fields.update(fields)
+
+    def emit(self, logger, result=None, placeholder=None):
+        """Journalise l'événement ; renvoie ``result`` pour pouvoir écrire ``return summary.emit(...)``"""
+        fields = self.fields
+        fields["duration_ms"] = round((time.perf_counter() - self._start) * 1000, 1)
+        fields.setdefault("outcome", "ok")
+        if result is not None:
+            fields.update(
+                source=result.get("source"),
+                titre=result.get("titre"),
+                chapitre=result.get("chapitre"),
+                has_image=bool(result.get("image")) and result.get("image") != placeholder,
+                has_resume=bool(result.get("resume")),
+            )
+        level = logging.INFO if fields["outcome"] in ("ok", "not_modified") else logging.WARNING
+        if logger.isEnabledFor(level):
+            logger.log(level, "Scraping %s : %s (%s ms)", fields["url"], fields["outcome"],
+                       fields["duration_ms"], extra={"event": fields})
+        return result
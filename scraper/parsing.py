@@ -0,0 +1,78 @@
+"""Construction de l'arbre HTML : choix du parser et parsing restreint.
+
+Le parser est le plus rapide disponible (lxml s'il est installé, sinon
+html.parser de la bibliothèque standard). Les parsers de site n'ont besoin
+que de quelques nœuds (meta, titres, images, résumés, JSON-LD) : un
+SoupStrainer par site (déclaré par l'adaptateur du site, voir sites/)
+évite de construire le reste de la page.
+"""
+import os
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+FALLBACK_BACKEND = "html.parser"
+PARSER_BACKEND = os.environ.get("MANGATRACKER_HTML_PARSER") or ("lxml" if HAS_LXML else FALLBACK_BACKEND)
+
+# Parsing restreint activé par défaut (désactivable pour le debug)
+RESTRICTED_PARSING = True
+
+
+def available_backends():
+    """Backends BeautifulSoup utilisables dans cet environnement"""
+    return ["lxml", FALLBACK_BACKEND] if HAS_LXML else [FALLBACK_BACKEND]
+
+
+def configure_parser(backend=None, restricted=None):
+    global PARSER_BACKEND, RESTRICTED_PARSING
+    if backend is not None:
+        if backend not in available_backends():
+            raise ValueError(f"Backend HTML indisponible : {backend}")
+        PARSER_BACKEND = backend
+    if restricted is not None:
+        RESTRICTED_PARSING = restricted
+
+
+def _class_tokens(attrs):
+    value = attrs.get("class") or ""
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return value.split()
+
+
+def make_strainer(tags, classes=(), class_fragments=()):
+    """Strainer gardant certains tags, et les sous-arbres portant certaines classes.
+
+    BeautifulSoup ne consulte le strainer que pour les nœuds dont aucun
+    ancêtre n'a été gardé : un conteneur retenu (.entry-content, ...) garde
+    donc tout son contenu, ce qui préserve les sélecteurs descendants.
+    """
+    tags = frozenset(tags)
+    classes = frozenset(classes)
+
+    def keep(name, attrs):
+        if name in tags:
+            if name == "script":
+                return attrs.get("type") == "application/ld+json"
+            return True
+        tokens = _class_tokens(attrs)
+        if not tokens:
+            return False
+        if classes.intersection(tokens):
+            return True
+        joined = " ".join(tokens)
+        return any(fragment in joined for fragment in class_fragments)
+
+    return SoupStrainer(keep)
+
+
+def make_soup(html, strainer=None, backend=None):
+    """Parse le HTML avec le backend configuré, éventuellement restreint"""
+    if not RESTRICTED_PARSING:
+        strainer = None
+    return BeautifulSoup(html, backend or PARSER_BACKEND, parse_only=strainer)
@@ -0,0 +1,251 @@
+"""Plans d'extraction : toutes les stratégies d'un parser résolues en un seul parcours.
+
+Plutôt que d'appeler ``soup.select`` une fois par sélecteur (un parcours
+complet de l'arbre à chaque fois), un plan compile ses sélecteurs une fois
+et parcourt le document une seule fois.
+
+Une stratégie (titre, image, résumé...) est une liste de niveaux par ordre
+de priorité. Pendant le parcours, chaque niveau garde son meilleur candidat ;
+dès que le niveau gagnant d'une stratégie est certain, la stratégie est
+close et ses niveaux ne sont plus évalués. Le parcours s'arrête quand toutes
+les stratégies demandées sont closes. Le résultat est identique à
+l'évaluation séquentielle des sélecteurs, niveau par niveau.
+"""
+import re
+
+import soupsieve
+from bs4 import Tag
+
+# Niveau « select_one » : seul le premier élément correspondant compte
+FIRST = "first"
+# Niveau « select » : le premier élément qui donne une valeur l'emporte
+ANY = "any"
+# Niveau « find_all » avec score : la meilleure valeur (la première en cas d'égalité)
+BEST = "best"
+
+_COMPOUND_RE = re.compile(r"^([a-zA-Z][\w-]*)?((?:\.[\w-]+)*)(.*)$")
+_ATTR_CONTAINS_RE = re.compile(r"""\[([\w-]+)\*=['"]?([^'"\]]+)['"]?\]""")
+
+
+class _Matcher:
+    """Sélecteur CSS compilé.
+
+    Les sélecteurs simples (``tag``, ``.classe``, ``tag.classe`` précédés
+    au plus d'un ancêtre ``.classe``) sont testés directement ; les autres
+    passent par soupsieve, après des pré-filtres nécessaires peu coûteux.
+    """
+
+    __slots__ = ("tag", "cls", "classes", "ancestor", "hints", "sieve")
+
+    def __init__(self, selector):
+        compounds = selector.split()
+        parsed = [_COMPOUND_RE.match(c).groups() for c in compounds]
+        tag, classes, rest = parsed[-1]
+        self.tag = tag.lower() if tag else None
+        self.classes = tuple(c for c in classes.split(".") if c)
+        self.cls = self.classes[0] if self.classes else None
+        self.hints = tuple((a, v.lower()) for a, v in _ATTR_CONTAINS_RE.findall(rest))
+        self.ancestor = None
+        self.sieve = None
+
+        simple = not rest and len(compounds) <= 2
+        if simple and len(compounds) == 2:
+            a_tag, a_classes, a_rest = parsed[0]
+            a_classes = [c for c in a_classes.split(".") if c]
+            if a_tag or a_rest or len(a_classes) != 1:
+                simple = False
+            else:
+                self.ancestor = a_classes[0]
+        if not simple:
+            self.ancestor = None
+            self.sieve = soupsieve.compile(selector).match
+
+    def __call__(self, element, ancestors):
+        if self.classes and len(self.classes) > 1:
+            present = element.get("class") or ()
+            if any(c not in present for c in self.classes):
+                return False
+        for attr, fragment in self.hints:
+            value = element.get(attr)
+            if isinstance(value, list):
+                value = " ".join(value)
+            if not value or fragment not in value.lower():
+                return False
+        if self.ancestor is not None and not ancestors.get(self.ancestor):
+            return False
+        if self.sieve is not None:
+            return self.sieve(element)
+        return True
+
+
+class _TagMatcher:
+    """Équivalent de ``soup.find(tag, attrs)`` : comparaison exacte des attributs"""
+
+    __slots__ = ("tag", "cls", "attrs")
+
+    def __init__(self, tag, attrs):
+        self.tag = tag
+        self.cls = None
+        self.attrs = tuple((attrs or {}).items())
+
+    def __call__(self, element, ancestors):
+        for attr, value in self.attrs:
+            if element.get(attr) != value:
+                return False
+        return True
+
+
+class Level:
+    """Un niveau de priorité d'une stratégie"""
+
+    __slots__ = ("kind", "matcher", "value")
+
+    def __init__(self, kind, matcher, value):
+        self.kind = kind
+        self.matcher = matcher
+        self.value = value
+
+
+def first(selector, value):
+    """Premier élément du sélecteur (select_one) ; ``value(element, url)`` peut renvoyer None"""
+    return Level(FIRST, _Matcher(selector), value)
+
+
+def first_tag(tag, attrs, value):
+    """Premier ``tag`` portant ces attributs (find)"""
+    return Level(FIRST, _TagMatcher(tag, attrs), value)
+
+
+def any_match(selector, value):
+    """Premier élément du sélecteur pour lequel ``value`` renvoie une valeur"""
+    return Level(ANY, _Matcher(selector), value)
+
+
+def any_tag(tag, attrs, value):
+    """Premier ``tag`` portant ces attributs pour lequel ``value`` renvoie une valeur"""
+    return Level(ANY, _TagMatcher(tag, attrs), value)
+
+
+def best_tag(tag, attrs, scored):
+    """Meilleur ``(score, valeur)`` renvoyé par ``scored`` sur tous les ``tag``"""
+    return Level(BEST, _TagMatcher(tag, attrs), scored)
+
+
+class _State:
+    """Progression d'une stratégie pendant un parcours"""
+
+    __slots__ = ("levels", "settled", "values", "scores", "best", "closed")
+
+    def __init__(self, levels):
+        count = len(levels)
+        self.levels = levels
+        self.settled = [False] * count
+        self.values = [None] * count
+        self.scores = [None] * count
+        self.best = count      # plus petit niveau ayant une valeur
+        self.closed = False
+
+    def settle(self, index, value):
+        self.settled[index] = True
+        self.values[index] = value
+        if value is not None and index < self.best:
+            self.best = index
+        return self._check()
+
+    def _check(self):
+        """Close la stratégie si tous les niveaux prioritaires ont échoué"""
+        if self.best == len(self.levels):
+            return False
+        for index in range(self.best):
+            if not self.settled[index] or self.values[index] is not None:
+                return False
+        self.closed = True
+        return True
+
+    def result(self):
+        for value in self.values:
+            if value is not None:
+                return value
+        return None
+
+
+class ExtractionPlan:
+    """Ensemble de stratégies exécutées en un seul parcours du document"""
+
+    def __init__(self):
+        self._strategies = {}
+        self._by_tag = {}
+        self._by_class = {}
+        self._anywhere = []
+
+    def strategy(self, name, levels):
+        self._strategies[name] = levels
+        for index, level in enumerate(levels):
+            entry = (name, index)
+            matcher = level.matcher
+            if matcher.cls is not None:
+                self._by_class.setdefault(matcher.cls, []).append((matcher.tag, entry))
+            elif matcher.tag is not None:
+                self._by_tag.setdefault(matcher.tag, []).append(entry)
+            else:
+                self._anywhere.append(entry)
+        return self
+
+    def run(self, soup, url, strategies=None):
+        """Renvoie ``{stratégie: valeur ou None}`` pour les stratégies demandées"""
+        names = list(self._strategies) if strategies is None else list(strategies)
+        states = {name: _State(self._strategies[name]) for name in names}
+        open_count = len(states)
+        by_tag, by_class, anywhere = self._by_tag, self._by_class, self._anywhere
+        ancestors = {}
+
+        stack = [(iter(soup.contents), ())]
+        while stack and open_count:
+            children, _ = stack[-1]
+            for element in children:
+                if not isinstance(element, Tag):
+                    continue
+
+                entries = by_tag.get(element.name, ())
+                classes = element.get("class") or ()
+                if classes or anywhere:
+                    entries = list(entries)
+                    for cls in dict.fromkeys(classes):
+                        for tag, entry in by_class.get(cls, ()):
+                            if tag is None or tag == element.name:
+                                entries.append(entry)
+                    entries.extend(anywhere)
+
+                for name, index in entries:
+                    state = states.get(name)
+                    if state is None or state.closed or index > state.best or state.settled[index]:
+                        continue
+                    level = state.levels[index]
+                    if not level.matcher(element, ancestors):
+                        continue
+                    if level.kind == FIRST:
+                        closed = state.settle(index, level.value(element, url))
+                    elif level.kind == ANY:
+                        value = level.value(element, url)
+                        closed = value is not None and state.settle(index, value)
+                    else:
+                        scored = level.value(element, url)
+                        closed = False
+                        if scored is not None and (state.scores[index] is None or scored[0] > state.scores[index]):
+                            state.scores[index], state.values[index] = scored
+                    if closed:
+                        open_count -= 1
+
+                if open_count == 0:
+                    break
+                if element.contents:
+                    for cls in classes:
+                        ancestors[cls] = ancestors.get(cls, 0) + 1
+                    stack.append((iter(element.contents), classes))
+                    break
+            else:
+                _, classes = stack.pop()
+                for cls in classes:
+                    ancestors[cls] -= 1
+
+        return {name: state.result() for name, state in states.items()}
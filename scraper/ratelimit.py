@@ -0,0 +1,174 @@
+"""Limiteur de débit par site (token bucket) remplaçant le délai fixe avant chaque requête.
+
+Chaque netloc a son propre seau : attendre un site ne retarde jamais les
+requêtes vers un autre. Le débit s'adapte aux réponses 429/503 (division
+par deux, respect de Retry-After) puis remonte progressivement.
+
+Un Retry-After au-delà de ``MAX_RETRY_AFTER`` est respecté sans bloquer de
+thread : tant qu'il court, les requêtes vers ce site échouent tout de suite
+(``RateLimited``) et la file de jobs les reprogramme.
+"""
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+
+# Débit par défaut : une requête par seconde et par site, rafale de 2
+DEFAULT_RATE = 1.0
+DEFAULT_BURST = 2
+HOST_RATES = {}
+
+MIN_RATE = 0.05          # plancher : une requête toutes les 20 s
+RECOVERY_STEP = 0.05     # gain de débit après chaque réponse normale
+THROTTLE_STATUSES = (429, 503)
+# Pause demandée par un site (Retry-After) au-delà de laquelle on n'attend pas
+MAX_RETRY_AFTER = 120
+
+
+class RateLimited(requests.exceptions.RequestException):
+    """Le site a demandé une pause plus longue que MAX_RETRY_AFTER"""
+
+
+def parse_retry_after(value):
+    """Durée en secondes d'un header Retry-After (délai ou date HTTP)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """Seau à jetons d'un site, avec débit adaptatif"""
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.throttled = 0
+        self.refused = 0
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Réserve un jeton ; renvoie le délai à attendre avant d'envoyer la requête.
+
+        Lève RateLimited (sans prendre de jeton) si le site a demandé une pause
+        de plus de MAX_RETRY_AFTER qui n'est pas terminée.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.blocked_until - now > MAX_RETRY_AFTER:
+                self.refused += 1
+                raise RateLimited(f"Pause demandée par le site (Retry-After) : encore "
+                                  f"{self.blocked_until - now:.0f} s")
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            delay = max(delay, self.blocked_until - now)
+            self.waited += delay
+            return delay
+
+    def penalize(self, retry_after=None):
+        """Le site nous freine : on divise le débit et on respecte Retry-After"""
+        with self._lock:
+            self.throttled += 1
+            self.rate = max(MIN_RATE, self.rate / 2)
+            pause = retry_after if retry_after is not None else 1 / self.rate
+            self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+
+    def reward(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + RECOVERY_STEP)
+
+
+class RateLimiter:
+    """Un seau par netloc, créé à la première requête vers ce site"""
+
+    def __init__(self, default_rate=DEFAULT_RATE, burst=DEFAULT_BURST, host_rates=None):
+        self.default_rate = default_rate
+        self.burst = burst
+        self.host_rates = dict(HOST_RATES if host_rates is None else host_rates)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url):
+        host = urlparse(url).netloc.lower()
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            with self._lock:
+                bucket = self._buckets.get(host)
+                if bucket is None:
+                    bucket = TokenBucket(self.host_rates.get(host, self.default_rate), self.burst)
+                    self._buckets[host] = bucket
+        return bucket
+
+    def acquire(self, url):
+        """Attend (en bloquant le thread) que le site de l'URL accepte une requête"""
+        delay = self.bucket(url).reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self, url):
+        """Équivalent non bloquant de acquire"""
+        delay = self.bucket(url).reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def observe(self, url, status_code, headers):
+        """Adapte le débit du site à la réponse reçue"""
+        bucket = self.bucket(url)
+        if status_code in THROTTLE_STATUSES:
+            bucket.penalize(parse_retry_after(headers.get("Retry-After")))
+        elif status_code < 400:
+            bucket.reward()
+
+    def stats(self):
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {
+            host: {
+                "rate": round(bucket.rate, 3),
+                "throttled": bucket.throttled,
+                "refused": bucket.refused,
+                "waited_seconds": round(bucket.waited, 2),
+            }
+            for host, bucket in buckets.items()
+        }
+
+
+_limiter = RateLimiter()
+
+
+def get_rate_limiter():
+    return _limiter
+
+
+def configure_rate_limits(default_rate=None, burst=None, host_rates=None):
+    """Remplace le limiteur du processus (les seaux existants sont oubliés)"""
+    global _limiter
+    _limiter = RateLimiter(
+        default_rate if default_rate is not None else _limiter.default_rate,
+        burst if burst is not None else _limiter.burst,
+        host_rates if host_rates is not None else _limiter.host_rates,
+    )
+    return _limiter
+
+
+def limiter_stats():
+    return _limiter.stats()
@@ -0,0 +1,158 @@
+"""Registre de sessions HTTP partagées par le processus, avec un pool de connexions par hôte"""
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+# Nombre de connexions keep-alive conservées par hôte
+DEFAULT_POOL_SIZE = 4
+POOL_SIZES = {}
+
+# Politique de retry, partagée avec le backend async. 429 et 503 n'y
+# figurent pas : ils sont gérés par le limiteur de débit (ratelimit.py)
+RETRY_TOTAL = 3
+RETRY_BACKOFF_FACTOR = 2
+RETRY_STATUSES = [500, 502, 504]
+REQUEST_TIMEOUT = 15
+
+# Headers pour éviter la détection de bot - plus complets et réalistes
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+    'Accept-Language': 'fr-FR,fr;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Accept-Encoding': 'gzip, deflate, br, zstd',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Sec-Fetch-User': '?1',
+    'Sec-Ch-Ua': '"Google Chrome";v="131", "Chromium";v="131", "Not_A Brand";v="24"',
+    'Sec-Ch-Ua-Mobile': '?0',
+    'Sec-Ch-Ua-Platform': '"Windows"',
+    'Cache-Control': 'max-age=0',
+    'Referer': 'https://www.google.com/',
+}
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _record_checkout(host, reused):
+    with _stats_lock:
+        stats = _stats.setdefault(host, {"hits": 0, "misses": 0})
+        stats["hits" if reused else "misses"] += 1
+
+
+class _CountingPoolMixin:
+    """Compte les connexions réutilisées (hit) et ouvertes (miss) à chaque emprunt"""
+
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout=timeout)
+        # Une connexion sans socket devra refaire le handshake TCP/TLS
+        _record_checkout(self.host, getattr(conn, "sock", None) is not None)
+        return conn
+
+
+class CountingHTTPConnectionPool(_CountingPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class CountingHTTPSConnectionPool(_CountingPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter dont les pools urllib3 alimentent les compteurs hit/miss"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool,
+        }
+
+
+def create_session(pool_size=DEFAULT_POOL_SIZE):
+    """Crée une session avec retry et headers réalistes"""
+    session = requests.Session()
+
+    session.headers.update(DEFAULT_HEADERS)
+
+    # Configuration retry
+    retry_strategy = Retry(
+        total=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        # Sinon urllib3 rejoue lui-même les 429/503 porteurs de Retry-After
+        respect_retry_after_header=False,
+    )
+    # pool_block : au-delà de pool_size, les threads attendent une connexion
+    # libre plutôt que d'en ouvrir une nouvelle qui serait jetée ensuite
+    adapter = PooledHTTPAdapter(
+        max_retries=retry_strategy,
+        pool_connections=1,
+        pool_maxsize=pool_size,
+        pool_block=True,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    return session
+
+
+def configure_pools(default=None, per_host=None):
+    """Ajuste la taille des pools (s'applique aux sessions créées ensuite)"""
+    global DEFAULT_POOL_SIZE
+    if default is not None:
+        DEFAULT_POOL_SIZE = max(1, int(default))
+    if per_host:
+        POOL_SIZES.update({host.lower(): max(1, int(size)) for host, size in per_host.items()})
+
+
+def get_session(url):
+    """Session partagée pour l'hôte de l'URL, créée au premier appel.
+
+    Une session par hôte : chaque site a son propre pool de connexions
+    keep-alive, dimensionné par POOL_SIZES. Les sessions sont partagées
+    entre threads ; urllib3 sérialise l'accès aux connexions du pool.
+    """
+    host = urlparse(url).netloc.lower()
+    session = _sessions.get(host)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(host)
+            if session is None:
+                session = create_session(POOL_SIZES.get(host, DEFAULT_POOL_SIZE))
+                _sessions[host] = session
+    return session
+
+
+def pool_stats():
+    """Compteurs de réutilisation des connexions, par hôte"""
+    with _stats_lock:
+        snapshot = {host: dict(counts) for host, counts in _stats.items()}
+    for counts in snapshot.values():
+        total = counts["hits"] + counts["misses"]
+        counts["hit_ratio"] = round(counts["hits"] / total, 3) if total else None
+    return snapshot
+
+
+def reset_pool_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def close_sessions():
+    """Ferme toutes les sessions partagées (et leurs connexions)"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
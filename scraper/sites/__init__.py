@@ -0,0 +1,158 @@
+"""Registre des adaptateurs de site.
+
+Un adaptateur (``SiteAdapter``) regroupe tout ce que le scraper doit savoir
+d'un site : son parser, le sous-ensemble de la page à construire
+(strainer), la façon de télécharger la page (headers, timeout) et la
+politique de cache. Un adaptateur peut aussi savoir trouver la page de
+série d'un chapitre (``find_series``) et y lire le dernier chapitre paru
+(``parse_index``).
+
+Les sites sont déclarés dans ``SITES`` par hôte : une entrée s'applique à
+l'hôte exact et à ses sous-domaines (``scan-manga.com`` couvre
+``www.scan-manga.com``), sauf si elle est marquée exacte. Les sites qui
+changent souvent d'extension sont déclarés par nom dans ``SITE_NAMES`` :
+``anime-sama`` couvre ``anime-sama.fr``, ``anime-sama.eu``... et leurs
+sous-domaines. La résolution se fait par recherche dans un dict, suffixe
+par suffixe puis par nom, et est mémorisée par hôte. Le module d'un adaptateur n'est importé qu'au premier scraping d'une
+URL de ce site ; les hôtes inconnus utilisent l'adaptateur générique.
+
+Ajouter un site : écrire un module qui expose ``ADAPTER`` et l'ajouter à
+``SITES``, ou l'enregistrer à l'exécution avec ``register_site`` (ou via
+``MANGATRACKER_SITES="hôte=paquet.module,..."``), sans toucher au scraper.
+"""
+import importlib
+import logging
+import os
+import threading
+from functools import lru_cache
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Politique de cache d'un adaptateur
+CACHE_CONDITIONAL = "conditional"   # revalidation ETag / Last-Modified (cache.py)
+CACHE_NONE = "none"                 # toujours retélécharger et reparser
+
+GENERIC_MODULE = "generic"
+
+# Hôte -> module (relatif à ce paquet, ou chemin complet)
+SITES = {
+    "scan-manga.com": "scan_manga",
+}
+# Nom de domaine, quelle que soit l'extension (anime-sama.fr, .org, .eu...) -> module
+SITE_NAMES = {
+    "anime-sama": "anime_sama",
+}
+# Hôtes qui ne couvrent pas leurs sous-domaines
+EXACT_HOSTS = set()
+
+
+class SiteAdapter:
+    """Parser et stratégie de téléchargement d'un site"""
+
+    def __init__(self, name, parse, strainer=None, source=None, headers=None, timeout=None,
+                 cache=CACHE_CONDITIONAL, find_series=None, parse_index=None, index_strainer=None):
+        if cache not in (CACHE_CONDITIONAL, CACHE_NONE):
+            raise ValueError(f"Politique de cache inconnue : {cache}")
+        self.name = name
+        # parse(soup, url) -> dict (titre, chapitre, image, resume, source)
+        self.parse = parse
+        # SoupStrainer des nœuds lus par parse ; None pour la page entière
+        self.strainer = strainer
+        # Valeur de "source" des résultats de repli ; None pour l'hôte de l'URL
+        self.source = source
+        # Headers ajoutés à ceux de la session pour ce site
+        self.headers = dict(headers or {})
+        self.timeout = timeout
+        self.cache = cache
+        # find_series(soup, url) -> URL de la page de série du chapitre, ou None
+        self.find_series = find_series
+        # parse_index(soup, url) -> résultat avec "url" (dernier chapitre), ou None
+        self.parse_index = parse_index
+        self.index_strainer = index_strainer
+
+    @property
+    def has_index(self):
+        return self.find_series is not None and self.parse_index is not None
+
+    @property
+    def uses_cache(self):
+        return self.cache == CACHE_CONDITIONAL
+
+    def source_for(self, url):
+        return self.source or urlparse(url).netloc.lower()
+
+    def __repr__(self):
+        return f"<SiteAdapter {self.name}>"
+
+
+_adapters = {}
+_adapters_lock = threading.Lock()
+
+
+def register_site(host, module, exact=False):
+    """Associe un hôte à un module d'adaptateur (chargé au premier usage)"""
+    host = host.lower().strip(".")
+    SITES[host] = module
+    if exact:
+        EXACT_HOSTS.add(host)
+    else:
+        EXACT_HOSTS.discard(host)
+    _module_for_host.cache_clear()
+
+
+def _register_from_env():
+    spec = os.environ.get("MANGATRACKER_SITES", "")
+    for item in spec.split(","):
+        host, _, module = item.partition("=")
+        if host.strip() and module.strip():
+            register_site(host.strip(), module.strip())
+
+
+@lru_cache(maxsize=1024)
+def _module_for_host(host):
+    module = SITES.get(host)
+    if module is not None:
+        return module
+    # Domaines parents, du plus précis au plus large : a.b.c -> b.c -> c
+    dot = host.find(".")
+    while dot != -1:
+        parent = host[dot + 1:]
+        module = SITES.get(parent)
+        if module is not None and parent not in EXACT_HOSTS:
+            return module
+        dot = host.find(".", dot + 1)
+    # Nom de domaine : l'avant-dernier label (www.anime-sama.eu -> anime-sama)
+    labels = host.rsplit(".", 2)
+    if len(labels) >= 2:
+        module = SITE_NAMES.get(labels[-2])
+        if module is not None:
+            return module
+    return GENERIC_MODULE
+
+
+def _load(module):
+    adapter = _adapters.get(module)
+    if adapter is None:
+        with _adapters_lock:
+            adapter = _adapters.get(module)
+            if adapter is None:
+                path = module if "." in module else f"{__name__}.{module}"
+                adapter = importlib.import_module(path).ADAPTER
+                _adapters[module] = adapter
+                logger.debug("Adaptateur de site chargé : %s", adapter.name)
+    return adapter
+
+
+def adapter_for(url):
+    """Adaptateur du site de l'URL (générique pour un hôte inconnu)"""
+    host = (urlparse(url).hostname or "").rstrip(".")
+    return _load(_module_for_host(host))
+
+
+def loaded_adapters():
+    """Noms des adaptateurs déjà importés par le processus"""
+    return sorted(adapter.name for adapter in _adapters.values())
+
+
+_register_from_env()
@@ -0,0 +1,133 @@
+"""Adaptateur anime-sama : pages de catalogue (anime et scans)"""
+import logging
+from urllib.parse import urljoin
+
+from ..extract import PLACEHOLDER_IMG, clean_text, is_valid_manga_image, title_from_page_title
+from ..parsing import make_strainer
+from ..urls import chapter_from_url, slug_title_from_url
+from . import SiteAdapter
+
+logger = logging.getLogger(__name__)
+
+# Nœuds lus par parse_anime_sama
+STRAINER = make_strainer(
+    tags=("title", "meta", "h1"),
+    class_fragments=("title", "poster", "cover", "synopsis", "description", "summary"),
+)
+
+def parse_anime_sama(soup, url):
+    """Parser pour anime-sama.com"""
+    title = None
+    img = None
+    resume = None
+    
+    logger.debug("Parsing anime-sama URL: %s", url)
+    
+    # Titre
+    title_selectors = [
+        "h1.anime-title",
+        "h1.manga-title", 
+        ".anime-info h1",
+        ".manga-info h1",
+        "h1",
+        "[class*='title'] h1"
+    ]
+    
+    for selector in title_selectors:
+        try:
+            element = soup.select_one(selector)
+            if element:
+                candidate = clean_text(element.get_text())
+                if candidate and len(candidate) > 2:
+                    title = candidate
+                    logger.debug("Titre trouvé: %s", title)
+                    break
+        except:
+            continue
+    
+    # Meta og:title en fallback
+    if not title:
+        og_title = soup.find("meta", {"property": "og:title"})
+        if og_title:
+            title = clean_text(og_title.get("content"))
+    
+    # Image
+    img_selectors = [
+        ".anime-poster img",
+        ".manga-poster img",
+        ".anime-cover img",
+        ".poster img",
+        "[class*='cover'] img",
+        "[class*='poster'] img"
+    ]
+    
+    for selector in img_selectors:
+        try:
+            element = soup.select_one(selector)
+            if element:
+                for attr in ['src', 'data-src', 'data-lazy-src']:
+                    candidate = element.get(attr)
+                    if candidate:
+                        full_url = urljoin(url, candidate)
+                        if is_valid_manga_image(full_url):
+                            img = full_url
+                            break
+                if img:
+                    break
+        except:
+            continue
+    
+    # Meta og:image en fallback
+    if not img:
+        og_image = soup.find("meta", {"property": "og:image"})
+        if og_image:
+            candidate = og_image.get("content")
+            if candidate:
+                img = urljoin(url, candidate)
+    
+    # Résumé
+    resume_selectors = [
+        ".anime-synopsis",
+        ".manga-synopsis", 
+        ".synopsis",
+        "[class*='description']",
+        "[class*='summary']"
+    ]
+    
+    for selector in resume_selectors:
+        try:
+            element = soup.select_one(selector)
+            if element:
+                candidate = clean_text(element.get_text())
+                if candidate and len(candidate) > 20:
+                    resume = candidate
+                    break
+        except:
+            continue
+    
+    # Fallbacks
+    if not title:
+        page_title = soup.find("title")
+        if page_title:
+            title = title_from_page_title(page_title, url)
+    
+    if not title:
+        title = slug_title_from_url(url)
+    
+    if not img:
+        img = PLACEHOLDER_IMG
+    
+    if not title:
+        title = "Anime/Manga Inconnu"
+    
+    chapitre = chapter_from_url(url)
+    
+    return {
+        "titre": title,
+        "chapitre": chapitre,
+        "image": img,
+        "resume": resume,
+        "source": "anime-sama",
+    }
+
+ADAPTER = SiteAdapter("anime-sama", parse_anime_sama, strainer=STRAINER, source="anime-sama")
@@ -0,0 +1,139 @@
+"""Adaptateur générique, pour les sites sans adaptateur dédié.
+
+La page est parsée : titre, couverture et résumé viennent d'abord des
+métadonnées standard (Open Graph, Twitter, JSON-LD, meta description), que
+la plupart des sites renseignent, puis des balises de la page. Le titre et
+le chapitre déduits de l'URL restent le dernier recours.
+
+Quand le dernier segment de l'URL désigne un chapitre
+(``/series/berserk/chapter-374``), le segment parent est pris pour la page
+de série, et le dernier chapitre se lit dans ses liens.
+"""
+import re
+from urllib.parse import urlsplit, urlunsplit
+
+from .. import plan
+from ..extract import (
+    PLACEHOLDER_IMG,
+    image_from_element,
+    image_from_json_ld,
+    image_from_meta,
+    latest_chapter_link,
+    resume_from_element,
+    resume_from_meta,
+    scored_image,
+    strip_chapter_suffix,
+    title_from_heading,
+    title_from_meta,
+    title_from_page_title,
+)
+from ..parsing import make_strainer
+from ..plan import ExtractionPlan
+from ..urls import chapter_from_url, slug_title_from_url, title_from_url
+from . import SiteAdapter
+
+PLAN = (
+    ExtractionPlan()
+    .strategy("titre", [
+        plan.first_tag("meta", {"property": "og:title"}, title_from_meta),
+        plan.first("h1", title_from_heading),
+        plan.first_tag("meta", {"name": "twitter:title"}, title_from_meta),
+        plan.first_tag("title", None, title_from_page_title),
+    ])
+    .strategy("image", [
+        plan.first_tag("meta", attrs, image_from_meta) for attrs in (
+            {"property": "og:image"},
+            {"name": "twitter:image"},
+            {"property": "og:image:url"},
+        )
+    ] + [
+        plan.any_tag("script", {"type": "application/ld+json"}, image_from_json_ld),
+    ] + [
+        plan.any_match(selector, image_from_element) for selector in (
+            ".wp-post-image",
+            "img[class*='cover']",
+            "img[class*='poster']",
+        )
+    ] + [
+        plan.best_tag("img", None, scored_image),
+    ])
+    .strategy("resume", [
+        plan.first_tag("meta", attrs, resume_from_meta) for attrs in (
+            {"property": "og:description"},
+            {"name": "description"},
+        )
+    ] + [
+        plan.first(selector, resume_from_element) for selector in (
+            ".synopsis",
+            "[class*='summary']",
+            "[class*='description']",
+        )
+    ])
+)
+
+# Nœuds lus par PLAN
+STRAINER = make_strainer(
+    tags=("title", "meta", "h1", "img", "script"),
+    class_fragments=("synopsis", "summary", "description"),
+)
+# Page de série : les mêmes nœuds, plus les liens vers les chapitres
+INDEX_STRAINER = make_strainer(
+    tags=("title", "meta", "h1", "img", "script", "a"),
+    class_fragments=("synopsis", "summary", "description"),
+)
+
+_CHAPTER_SEGMENT_RE = re.compile(r"^(?:chapitre|chapter|chap|ch|episode|ep)[-_]?\d+(?:[.-]\d+)?/?$",
+                                 re.IGNORECASE)
+
+
+def _segments(path):
+    return [segment for segment in path.split("/") if segment]
+
+
+def _result(found, url, chapitre):
+    title = strip_chapter_suffix(found["titre"]) if found["titre"] else None
+    return {
+        "titre": title or title_from_url(url) or slug_title_from_url(url) or "Manga Inconnu",
+        "chapitre": chapitre,
+        "image": found["image"] or PLACEHOLDER_IMG,
+        "resume": found["resume"],
+        "source": ADAPTER.source_for(url),
+    }
+
+
+def parse_generic(soup, url):
+    return _result(PLAN.run(soup, url), url, chapter_from_url(url))
+
+
+def find_series(soup, url):
+    """Segment parent d'une URL de chapitre (``.../chapter-374`` -> ``.../``)"""
+    parts = urlsplit(url)
+    segments = _segments(parts.path)
+    if len(segments) < 2 or not _CHAPTER_SEGMENT_RE.match(segments[-1]):
+        return None
+    return urlunsplit((parts.scheme, parts.netloc, "/" + "/".join(segments[:-1]) + "/", "", ""))
+
+
+def parse_index(soup, url):
+    """Lien de chapitre le plus avancé parmi ceux situés sous la page de série"""
+    base = urlsplit(url)
+    prefix = base.path.rstrip("/") + "/"
+
+    def accept(target):
+        parts = urlsplit(target)
+        if parts.netloc != base.netloc or not parts.path.startswith(prefix):
+            return False
+        segments = _segments(parts.path[len(prefix):])
+        return len(segments) == 1 and _CHAPTER_SEGMENT_RE.match(segments[0])
+
+    latest = latest_chapter_link(soup.find_all("a", href=True), url, accept)
+    if latest is None:
+        return None
+    chapitre, chapter_url = latest
+    result = _result(PLAN.run(soup, url), chapter_url, chapitre)
+    result["url"] = chapter_url
+    return result
+
+
+ADAPTER = SiteAdapter("generic", parse_generic, strainer=STRAINER,
+                      find_series=find_series, parse_index=parse_index, index_strainer=INDEX_STRAINER)
@@ -0,0 +1,187 @@
+"""Adaptateur scan-manga.com : pages de lecture de chapitre.
+
+Le titre et le chapitre se lisent dans l'URL ; la page ne sert qu'à
+l'image de couverture et au résumé. Le fil d'Ariane mène à la page du
+manga (``/<id>/<Titre>.html``), qui liste tous les chapitres parus.
+"""
+import logging
+import re
+from urllib.parse import urljoin, urlparse
+
+from .. import plan
+from ..extract import (
+    PLACEHOLDER_IMG,
+    image_from_element,
+    image_from_json_ld,
+    image_from_meta,
+    latest_chapter_link,
+    resume_from_element,
+    scored_image,
+    title_from_heading,
+    title_from_meta,
+    title_from_page_title,
+)
+from ..parsing import make_strainer
+from ..plan import ExtractionPlan
+from ..urls import chapter_from_url, title_from_url
+from . import SiteAdapter
+
+logger = logging.getLogger(__name__)
+
+_STRAINER_CLASSES = (
+    "manga-title", "post-header", "entry-header", "page-header", "breadcrumb",
+    "manga-cover", "post-thumbnail", "entry-thumb", "manga-poster", "cover-image",
+    "post-img", "featured-image", "post-content", "entry-content", "content",
+    "manga-summary", "manga-description", "synopsis",
+)
+
+# Nœuds lus par PLAN (et find_series, dans le fil d'Ariane)
+STRAINER = make_strainer(
+    tags=("title", "meta", "h1", "img", "script"),
+    classes=_STRAINER_CLASSES,
+    class_fragments=("description", "summary"),
+)
+# Page du manga : les mêmes nœuds, plus les liens vers les chapitres
+INDEX_STRAINER = make_strainer(
+    tags=("title", "meta", "h1", "img", "script", "a"),
+    classes=_STRAINER_CLASSES,
+    class_fragments=("description", "summary"),
+)
+
+_SERIES_PATH_RE = re.compile(r"^/\d+/[^/]+\.html$")
+_READER_PATH_RE = re.compile(r"^/lecture-en-ligne/[^/]+-Chapitre-\d", re.IGNORECASE)
+
+# Plan d'extraction : chaque stratégie liste ses niveaux par ordre de priorité
+PLAN = (
+    ExtractionPlan()
+    .strategy("titre", [
+        plan.first(selector, title_from_heading) for selector in (
+            "h1.entry-title",
+            "h1.post-title",
+            ".manga-title h1",
+            ".post-header h1",
+            ".entry-header h1",
+            ".page-header h1",
+            "h1",
+            ".breadcrumb a:last-child",  # Parfois le titre est dans le breadcrumb
+        )
+    ] + [
+        plan.first_tag("meta", attrs, title_from_meta) for attrs in (
+            {"property": "og:title"},
+            {"name": "title"},
+            {"name": "twitter:title"},
+        )
+    ] + [
+        plan.first_tag("title", None, title_from_page_title),
+    ])
+    .strategy("image", [
+        plan.first_tag("meta", attrs, image_from_meta) for attrs in (
+            {"property": "og:image"},
+            {"name": "twitter:image"},
+            {"property": "og:image:url"},
+        )
+    ] + [
+        plan.any_match(selector, image_from_element) for selector in (
+            # Sites de manga spécifiques
+            ".manga-cover img",
+            ".post-thumbnail img",
+            ".entry-thumb img",
+            ".manga-poster img",
+            ".cover-image img",
+            ".wp-post-image",
+            ".attachment-post-thumbnail",
+            ".post-img img",
+            ".featured-image img",
+            # Sélecteurs génériques mais souvent efficaces
+            ".post-content img:first-of-type",
+            ".entry-content img:first-of-type",
+            ".content img:first-of-type",
+            # Recherche par attributs
+            "img[src*='cover']",
+            "img[src*='poster']",
+            "img[src*='thumb']",
+            "img[alt*='cover']",
+            "img[class*='cover']",
+            "img[class*='poster']",
+        )
+    ] + [
+        # Recherche dans toutes les images de la page, avec score
+        plan.best_tag("img", None, scored_image),
+        plan.any_tag("script", {"type": "application/ld+json"}, image_from_json_ld),
+    ])
+    .strategy("resume", [
+        plan.first(selector, resume_from_element) for selector in (
+            ".manga-summary",
+            ".manga-description",
+            ".post-content .description",
+            ".entry-content p",
+            ".synopsis",
+            "[class*='description'] p",
+            "[class*='summary'] p",
+        )
+    ])
+)
+
+def parse_scan_manga_specialized(soup, url):
+    """Parser spécialisé pour scan-manga.com basé sur l'analyse de l'URL fournie"""
+    
+    logger.debug("Parsing scan-manga URL: %s", url)
+    
+    # 1. TITRE - Stratégie 1: extraire de l'URL (très fiable pour scan-manga.com)
+    title = title_from_url(url)
+    
+    # Un seul parcours du document pour le titre (si besoin), l'image et le résumé
+    found = PLAN.run(soup, url, ["image", "resume"] if title else None)
+    title = title or found.get("titre")
+    img = found["image"]
+    resume = found["resume"]
+    
+    if not title:
+        title = "Manga Inconnu"
+        logger.debug("Utilisation du titre par défaut")
+    
+    if not img:
+        img = PLACEHOLDER_IMG
+        logger.debug("Utilisation de l'image placeholder")
+    
+    chapitre = chapter_from_url(url)
+    
+    result = {
+        "titre": title,
+        "chapitre": chapitre,
+        "image": img,
+        "resume": resume,
+        "source": "scan-manga",
+    }
+    
+    logger.debug("Résultat final: %s", result)
+    return result
+
+def find_series(soup, url):
+    """Page du manga, d'après le dernier lien du fil d'Ariane qui y mène"""
+    series = None
+    for link in soup.select(".breadcrumb a[href]"):
+        target = urljoin(url, link["href"])
+        if _SERIES_PATH_RE.match(urlparse(target).path):
+            series = target
+    return series
+
+def parse_index(soup, url):
+    """Dernier chapitre paru, lu dans la liste de la page du manga"""
+    latest = latest_chapter_link(soup.find_all("a", href=True), url,
+                                 lambda target: _READER_PATH_RE.match(urlparse(target).path))
+    if latest is None:
+        return None
+    chapitre, chapter_url = latest
+    found = PLAN.run(soup, url)
+    return {
+        "titre": title_from_url(chapter_url) or found["titre"] or "Manga Inconnu",
+        "chapitre": chapitre,
+        "image": found["image"] or PLACEHOLDER_IMG,
+        "resume": found["resume"],
+        "source": "scan-manga",
+        "url": chapter_url,
+    }
+
+ADAPTER = SiteAdapter("scan-manga", parse_scan_manga_specialized, strainer=STRAINER, source="scan-manga",
+                      find_series=find_series, parse_index=parse_index, index_strainer=INDEX_STRAINER)
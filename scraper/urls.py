@@ -0,0 +1,106 @@
+"""Analyse des URLs de chapitres : numéro de chapitre et titre.
+
+Les motifs sont compilés une seule fois et les résultats sont mémorisés par
+URL (la même URL est analysée à chaque rafraîchissement, import ou
+scraping en erreur). ``extract_many`` traite un lot d'URLs d'un coup pour
+les imports en masse.
+"""
+from functools import lru_cache
+import re
+from urllib.parse import urlparse
+
+URL_CACHE_SIZE = 4096
+
+# Motifs de numéro de chapitre, par ordre de priorité : le premier motif
+# trouvé dans l'URL l'emporte, même si un motif suivant apparaît plus tôt.
+# Ils ne peuvent donc pas être fusionnés en une seule alternance, qui
+# renverrait la correspondance la plus à gauche.
+# ("Chapitre" et "chapitre" étaient deux motifs distincts, identiques sans
+# tenir compte de la casse.)
+CHAPTER_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    # Pour scan-manga.com, pattern: Chapitre-126-FR
+    r"chapitre[-_](\d+(?:\.\d+)?)",
+    r"chap(?:itre)?[-_](\d+(?:\.\d+)?)",
+    r"ch(?:apter)?[-_](\d+(?:\.\d+)?)",
+    r"c(\d+(?:\.\d+)?)",
+    r"/(\d+(?:\.\d+)?)/?$",
+))
+_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+
+# Pattern URL: /lecture-en-ligne/Return-of-the-Iron-Blooded-Hound-Chapitre-126-FR_478862.html
+_READER_SEGMENT_RE = re.compile(r"/lecture-en-ligne/([^/]+)")
+_CHAPTER_SUFFIX_RE = re.compile(r"-Chapitre-\d+.*$")
+_PAGE_ID_RE = re.compile(r"_\d+\.html$")
+
+DEFAULT_CHAPTER = "1"
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def chapter_from_url(url: str) -> str:
+    """Extrait le numéro de chapitre depuis l'URL"""
+    for pattern in CHAPTER_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return match.group(1)
+
+    # Fallback: prendre le plus gros nombre (souvent le chapitre)
+    numbers = _NUMBER_RE.findall(url)
+    if numbers:
+        return max(numbers, key=float)
+
+    return DEFAULT_CHAPTER
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def title_from_url(url: str):
+    """Extrait le titre depuis une URL de lecture scan-manga.com"""
+    match = _READER_SEGMENT_RE.search(urlparse(url).path)
+    if not match:
+        return None
+    # Enlever la partie chapitre et l'ID (Titre-Chapitre-X-FR_ID.html)
+    title_part = _CHAPTER_SUFFIX_RE.sub("", match.group(1))
+    title_part = _PAGE_ID_RE.sub("", title_part)
+    title = title_part.replace("-", " ").strip()
+    return title or None
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def slug_title_from_url(url: str):
+    """Titre déduit du dernier segment du chemin (anime-sama, sites inconnus)"""
+    segments = [s for s in urlparse(url).path.strip("/").split("/") if s]
+    if not segments:
+        return None
+    slug = segments[-1] if len(segments) > 1 else segments[0]
+    return slug.replace("-", " ").title()
+
+
+def analyze_url(url: str) -> dict:
+    """Titre et chapitre qu'on peut déduire de l'URL seule"""
+    return {
+        "url": url,
+        "titre": title_from_url(url),
+        "chapitre": chapter_from_url(url),
+    }
+
+
+def extract_many(urls):
+    """Analyse un lot d'URLs (imports en masse), dans l'ordre donné.
+
+    Les doublons du lot ne sont analysés qu'une fois.
+    """
+    urls = list(urls)
+    analyzed = {url: analyze_url(url) for url in dict.fromkeys(urls)}
+    return [dict(analyzed[url]) for url in urls]
+
+
+def url_cache_info():
+    """Statistiques des mémos par fonction (hits, misses, taille)"""
+    return {
+        func.__name__: func.cache_info()._asdict()
+        for func in (chapter_from_url, title_from_url, slug_title_from_url)
+    }
+
+
+def clear_url_cache():
+    for func in (chapter_from_url, title_from_url, slug_title_from_url):
+        func.cache_clear()
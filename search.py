@@ -0,0 +1,152 @@
+"""Recherche plein texte (SQLite FTS5) sur les titres, résumés et sources.
+
+L'index ``mangas_fts`` est une table FTS5 à contenu externe : elle ne stocke
+que l'index inversé et relit le texte dans ``mangas``. Des triggers la
+tiennent à jour à chaque INSERT/UPDATE/DELETE, quel que soit le chemin
+(ajout, édition, rafraîchissement, suppression, job groupé).
+
+La recherche ignore accents et casse (tokenizer unicode61 avec
+remove_diacritics), chaque mot est un préfixe ("one pi" trouve
+"One Piece") et les résultats sont classés par pertinence (bm25, le titre
+pesant plus que la source puis le résumé). Sans FTS5 dans le SQLite
+installé, la recherche retombe sur ILIKE sur le titre.
+"""
+import logging
+import re
+
+from sqlalchemy import column, text
+from sqlalchemy.exc import OperationalError
+
+from models import db, Manga
+from pagination import decode_token, encode_token, keyset_page
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "mangas_fts"
+# Poids bm25 des colonnes indexées, dans l'ordre de la table
+COLUMN_WEIGHTS = {"titre": 10.0, "resume": 1.0, "source": 2.0}
+
+_SCHEMA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        titre, resume, source,
+        content='mangas', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON mangas BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, titre, resume, source)
+        VALUES (new.id, new.titre, new.resume, new.source);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON mangas BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, titre, resume, source)
+        VALUES ('delete', old.id, old.titre, old.resume, old.source);
+    END""",
+    # Le rafraîchissement ne touche souvent que le chapitre : pas de réindexation
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF titre, resume, source ON mangas BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, titre, resume, source)
+        VALUES ('delete', old.id, old.titre, old.resume, old.source);
+        INSERT INTO {FTS_TABLE}(rowid, titre, resume, source)
+        VALUES (new.id, new.titre, new.resume, new.source);
+    END""",
+]
+
+_WORD_RE = re.compile(r"\w+")
+
+# None : pas encore vérifié pour ce processus
+_available = None
+
+
+def match_query(q):
+    """Requête MATCH FTS5 : tous les mots de ``q``, chacun en préfixe.
+
+    Les mots sont mis entre guillemets, la syntaxe FTS5 (NEAR, OR, -, :...)
+    saisie par l'utilisateur n'est donc jamais interprétée.
+    """
+    words = _WORD_RE.findall(q or "")
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def create_search_index(rebuild=False):
+    """Crée la table FTS5 et ses triggers si besoin ; renvoie False sans FTS5.
+
+    Une table tout juste créée (base existante) est remplie depuis ``mangas``.
+    """
+    global _available
+    with db.engine.begin() as conn:
+        _available = create_search_tables(conn, rebuild)
+    return _available
+
+
+def create_search_tables(conn, rebuild=False):
+    """``create_search_index`` sur la connexion ``conn`` (transaction ouverte), pour les migrations"""
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": FTS_TABLE},
+    ).first() is not None
+    try:
+        for statement in _SCHEMA:
+            conn.execute(text(statement))
+    except OperationalError as e:
+        logger.warning("FTS5 indisponible, recherche par ILIKE : %s", e)
+        return False
+    if rebuild or not exists:
+        conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    return True
+
+
+def rebuild_search_index():
+    """Reconstruit l'index depuis la table mangas ; renvoie le nombre de titres indexés"""
+    if not create_search_index(rebuild=True):
+        return None
+    return db.session.query(Manga.id).count()
+
+
+def search_available():
+    if _available is None:
+        create_search_index()
+    return _available
+
+
+def search_page(q, cursor=None, limit=24):
+    """Page de résultats classés par pertinence : ``(titres, curseur_suivant)``.
+
+    Le curseur encode le couple (score bm25, id) du dernier résultat, comme
+    la pagination de la bibliothèque encode (date_maj, id).
+    """
+    if not search_available():
+        return keyset_page(Manga.query.filter(Manga.titre.ilike(f"%{q}%")), cursor, limit)
+
+    match = match_query(q)
+    if match is None:
+        return [], None
+
+    params = {"match": match, "limit": limit + 1}
+    after = ""
+    if cursor:
+        values = decode_token(cursor)
+        if len(values) != 2 or not isinstance(values[0], (int, float)) or not isinstance(values[1], int):
+            raise ValueError(f"Curseur invalide : {cursor!r}")
+        params["score"], params["id"] = values
+        after = "WHERE score > :score OR (score = :score AND id > :id)"
+
+    weights = ", ".join(str(weight) for weight in COLUMN_WEIGHTS.values())
+    # .columns() en fait un SELECT : la requête part sur le pool de lecteurs
+    rows = db.session.execute(text(f"""
+        SELECT id, score FROM (
+            SELECT rowid AS id, bm25({FTS_TABLE}, {weights}) AS score
+            FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match
+        )
+        {after}
+        ORDER BY score, id
+        LIMIT :limit
+    """).columns(column("id"), column("score")), params).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_token([rows[-1].score, rows[-1].id])
+
+    mangas = {m.id: m for m in Manga.query.filter(Manga.id.in_([row.id for row in rows]))}
+    return [mangas[row.id] for row in rows if row.id in mangas], next_cursor
@@ -0,0 +1,47 @@
+"""Fixtures communes : tests hors ligne, base SQLite temporaire par test."""
+import os
+import sys
+
+import pytest
+from flask import Flask
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(ROOT, "benchmarks", "fixtures")
+sys.path.insert(0, ROOT)
+# fixture_server.py (corpus de pages et URL locales)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from api import api  # noqa: E402
+from dbengine import init_database  # noqa: E402
+from migrations import migrate  # noqa: E402
+from models import db  # noqa: E402
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE  # noqa: E402
+
+
+def make_app(path):
+    """Application minimale (API seule) sur la base SQLite ``path``, sans migration.
+
+    app.py n'est pas importé : il ouvrirait database/manga.db.
+    """
+    app = Flask("tests")
+    app.config["TESTING"] = True
+    app.config["LIBRARY_PAGE_SIZE"] = DEFAULT_PAGE_SIZE
+    app.config["LIBRARY_MAX_PAGE_SIZE"] = MAX_PAGE_SIZE
+    init_database(app, db, str(path))
+    app.register_blueprint(api)
+    return app
+
+
+@pytest.fixture
+def app(tmp_path):
+    """make_app sur une base migrée dans ``tmp_path``"""
+    app = make_app(tmp_path / "manga.db")
+    with app.app_context():
+        migrate()
+        yield app
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,48 @@
+"""API JSON : validation des lots de chapitres et de rafraîchissements"""
+import pytest
+
+from models import db, Chapter, Manga, ScrapeJob
+
+
+@pytest.fixture
+def manga(app):
+    manga = Manga(titre="One Piece", dernier_chapitre="1", url="https://example.org/one-piece")
+    db.session.add(manga)
+    db.session.commit()
+    return manga.id
+
+
+@pytest.mark.parametrize("chapitre, expected", [("12", "12"), (" 12.5 ", "12.5"), (13, "13")])
+def test_update_chapters_accepts_text_and_integers(client, manga, chapitre, expected):
+    response = client.post("/api/mangas/chapters", json={"updates": [{"id": manga, "chapitre": chapitre}]})
+    assert response.status_code == 200
+    assert response.get_json() == {"updated": [manga], "unchanged": []}
+    assert db.session.get(Manga, manga).dernier_chapitre == expected
+
+
+@pytest.mark.parametrize("chapitre", [None, True, 12.5, ["12"], {"n": 12}, "", "  "])
+def test_update_chapters_rejects_other_types(client, manga, chapitre):
+    item = {"id": manga, "chapitre": chapitre}
+    response = client.post("/api/mangas/chapters", json={"updates": [item]})
+    assert response.status_code == 400
+    body = response.get_json()
+    assert "chapitre" in body["error"]
+    assert body["item"] == item
+    assert db.session.get(Manga, manga).dernier_chapitre == "1"
+    assert Chapter.query.filter_by(manga_id=manga).count() == 0
+
+
+def test_update_chapters_rejects_missing_chapter(client, manga):
+    response = client.post("/api/mangas/chapters", json={"updates": [{"id": manga}]})
+    assert response.status_code == 400
+    assert db.session.get(Manga, manga).dernier_chapitre == "1"
+
+
+def test_refresh_skips_manual_entries(client, manga):
+    manual = Manga(titre="Saisie manuelle", dernier_chapitre="4", url="#")
+    db.session.add(manual)
+    db.session.commit()
+    response = client.post("/api/mangas/refresh", json={"ids": [manga, manual.id, manga]})
+    assert response.status_code == 202
+    assert response.get_json() == {"requested": 2, "enqueued": 1, "skipped": 1, "not_pollable": [manual.id]}
+    assert [(job.kind, job.manga_id) for job in ScrapeJob.query] == [("refresh", manga)]
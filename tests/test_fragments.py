@@ -0,0 +1,54 @@
+"""Actions des cartes : la réponse dépend de X-Fragment, Vary doit le dire"""
+import importlib
+import os
+
+import pytest
+
+from migrations import migrate
+from models import db, Manga, ScrapeJob
+
+FRAGMENT = {"X-Fragment": "card"}
+
+
+@pytest.fixture(scope="module")
+def web(tmp_path_factory):
+    """app.py sur une base temporaire (MANGATRACKER_DB_PATH), sans worker"""
+    os.environ["MANGATRACKER_DB_PATH"] = str(tmp_path_factory.mktemp("web") / "manga.db")
+    try:
+        module = importlib.import_module("app")
+    finally:
+        del os.environ["MANGATRACKER_DB_PATH"]
+    with module.app.app_context():
+        migrate()
+    return module.app
+
+
+@pytest.fixture
+def manga(web):
+    with web.app_context():
+        manga = Manga(titre="Berserk", dernier_chapitre="1", url="https://example.org/berserk")
+        db.session.add(manga)
+        db.session.commit()
+        yield manga.id
+        db.session.remove()
+
+
+@pytest.mark.parametrize("headers", [FRAGMENT, {}])
+@pytest.mark.parametrize("action, form", [("update", {"chapitre": "2"}), ("update", {"chapitre": ""}),
+                                          ("refresh", {}), ("delete", {})])
+def test_card_actions_vary_on_fragment(web, manga, action, form, headers):
+    response = web.test_client().post(f"/{action}/{manga}", data=form, headers=headers)
+    assert response.status_code < 500
+    assert "X-Fragment" in response.vary
+
+
+@pytest.mark.parametrize("headers, status", [(FRAGMENT, 400), ({}, 302)])
+def test_manual_entry_is_not_refreshed(web, headers, status):
+    with web.app_context():
+        manga = Manga(titre="Saisie manuelle", dernier_chapitre="4", url="#")
+        db.session.add(manga)
+        db.session.commit()
+        response = web.test_client().post(f"/refresh/{manga.id}", headers=headers)
+        assert response.status_code == status
+        assert ScrapeJob.query.filter_by(manga_id=manga.id).count() == 0
+        db.session.remove()
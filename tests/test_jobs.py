@@ -0,0 +1,216 @@
+"""File de jobs : déduplication, prise, bail, retries et vérifications périodiques"""
+from datetime import datetime, timedelta
+
+import time
+
+import pytest
+from sqlalchemy import select
+
+import jobs
+from jobs import (KIND_ADD, KIND_POLL, KIND_REFRESH, LEASE_SECONDS, MAX_RETRY_DELAY, claim, enqueue,
+                  enqueue_due_polls, enqueue_many, job_states, queue_stats, recover_expired, renew_lease, retry_delay,
+                  run_next)
+from models import db, Manga, PollSchedule, ScrapeJob
+from pagecache import library_version
+from scheduler import sync_schedules
+
+URL = "https://www.scan-manga.com/lecture-en-ligne/Eleceed-Chapitre-377-FR_519095.html"
+PAGE = {"titre": "Eleceed", "chapitre": "378", "image": "https://example.org/eleceed.jpg",
+        "resume": "Résumé", "source": "scan-manga"}
+
+
+@pytest.fixture
+def scrape(monkeypatch):
+    """Résultat (ou exception) du scraping, sans réseau ; note si la transaction est close
+    quand les couvertures sont mises en cache"""
+    state = {"result": PAGE, "warmed": [], "during": None}
+
+    def scrape_manga_info(url, raise_errors=False):
+        assert raise_errors
+        if state["during"]:
+            state["during"]()
+        if isinstance(state["result"], Exception):
+            raise state["result"]
+        return state["result"]
+
+    def warm_cover(source):
+        state["warmed"].append((source, db.session().in_transaction()))
+
+    monkeypatch.setattr(jobs, "scrape_manga_info", scrape_manga_info)
+    monkeypatch.setattr(jobs, "warm_cover", warm_cover)
+    monkeypatch.setattr(jobs, "enforce_cover_quota", lambda: None)
+    return state
+
+
+@pytest.fixture
+def manga(app):
+    manga = Manga(titre="Eleceed", dernier_chapitre="377", url=URL)
+    db.session.add(manga)
+    db.session.commit()
+    return manga
+
+
+def test_enqueue_deduplicates_active_jobs(app):
+    job, created = enqueue(KIND_REFRESH, URL)
+    again, created_again = enqueue(KIND_REFRESH, URL)
+    assert created and not created_again
+    assert again.id == job.id
+    # Un autre type ou une autre URL fait un autre job
+    assert enqueue(KIND_POLL, URL)[1]
+    assert enqueue_many([(KIND_REFRESH, URL, None), (KIND_REFRESH, URL + "?2", None),
+                         (KIND_REFRESH, URL + "?2", None)]) == 1
+    assert ScrapeJob.query.count() == 3
+
+
+def test_claim_takes_ready_jobs_in_order(app):
+    first = enqueue(KIND_REFRESH, URL + "?1")[0].id
+    second = enqueue(KIND_REFRESH, URL + "?2")[0].id
+    later = enqueue(KIND_REFRESH, URL + "?3")[0]
+    now = datetime.utcnow()
+    later.run_after = now + timedelta(hours=1)
+    db.session.commit()
+
+    job = claim("w1", now)
+    assert job.id == first
+    assert (job.status, job.attempts, job.worker) == ("running", 1, "w1")
+    assert job.locked_until == now + timedelta(seconds=LEASE_SECONDS)
+    assert claim("w2", now).id == second
+    assert claim("w3", now) is None
+
+
+def test_expired_lease_requeues_or_fails(app):
+    for suffix in ("?1", "?2"):
+        enqueue(KIND_REFRESH, URL + suffix)
+    now = datetime.utcnow()
+    retried, exhausted = claim("w", now), claim("w", now)
+    exhausted.attempts = exhausted.max_attempts
+    db.session.commit()
+
+    assert recover_expired(now + timedelta(seconds=LEASE_SECONDS - 1)) == 0
+    assert recover_expired(now + timedelta(seconds=LEASE_SECONDS + 1)) == 2
+    db.session.expire_all()
+    assert (retried.status, retried.worker, retried.locked_until) == ("queued", None, None)
+    assert exhausted.status == "failed"
+    assert "Bail expiré" in exhausted.last_error
+
+
+def test_lease_is_renewed_only_by_its_owner(app):
+    job_id = enqueue(KIND_REFRESH, URL)[0].id
+    now = datetime.utcnow()
+    claim("w1", now)
+    later = now + timedelta(seconds=LEASE_SECONDS)
+    assert renew_lease(job_id, "w1", later)
+    assert not renew_lease(job_id, "w2", later + timedelta(seconds=60))
+    db.session.expire_all()
+    assert db.session.get(ScrapeJob, job_id).locked_until == later + timedelta(seconds=LEASE_SECONDS)
+
+
+def test_lease_is_renewed_while_scraping(app, manga, scrape, monkeypatch):
+    monkeypatch.setattr(jobs, "LEASE_RENEW_INTERVAL", 0.05)
+    job_id = enqueue(KIND_REFRESH, URL)[0].id
+    leases = []
+
+    def slow_scrape():
+        for _ in range(2):
+            time.sleep(0.2)
+            # Connexion à part : la session du worker garde son instantané
+            with db.engine.connect() as conn:
+                leases.append(conn.execute(select(ScrapeJob.locked_until).where(ScrapeJob.id == job_id)).scalar())
+
+    scrape["during"] = slow_scrape
+    assert run_next("w")
+    assert leases[1] > leases[0]
+    assert db.session.get(ScrapeJob, job_id).status == "done"
+
+
+def test_late_result_of_a_lost_lease_is_discarded(app, manga, scrape):
+    job_id = enqueue(KIND_REFRESH, URL)[0].id
+
+    def taken_over():
+        # Le scraping de "w" dure plus que son bail : le job est repris par "w2"
+        later = datetime.utcnow() + timedelta(seconds=LEASE_SECONDS + 100)
+        assert recover_expired(later) == 1
+        assert claim("w2", later).id == job_id
+
+    scrape["during"] = taken_over
+    assert run_next("w")
+    db.session.expire_all()
+    job = db.session.get(ScrapeJob, job_id)
+    assert (job.status, job.worker, job.attempts) == ("running", "w2", 2)
+    assert db.session.get(Manga, manga.id).dernier_chapitre == "377"
+    assert scrape["warmed"] == []
+
+    # Même chose pour un échec : le job n'est pas remis en file sous "w2"
+    scrape["during"] = None
+    scrape["result"] = RuntimeError("HTTP 503")
+    job.attempts = 1
+    job.status, job.worker, job.run_after = "queued", None, datetime.utcnow()
+    db.session.commit()
+    scrape["during"] = taken_over
+    assert run_next("w")
+    db.session.expire_all()
+    job = db.session.get(ScrapeJob, job_id)
+    assert (job.status, job.worker, job.last_error) == ("running", "w2", "Bail expiré : worker interrompu")
+
+
+def test_retry_delay_backs_off_and_caps():
+    assert [retry_delay(KIND_REFRESH, attempts) for attempts in (1, 2, 3)] == [60, 120, 240]
+    assert retry_delay(KIND_ADD, 50) == MAX_RETRY_DELAY
+
+
+def test_failures_are_retried_then_abandoned(app, manga, scrape):
+    scrape["result"] = RuntimeError("HTTP 503")
+    job_id = enqueue(KIND_REFRESH, URL)[0].id
+    for attempt in range(1, 4):
+        before = datetime.utcnow()
+        assert run_next("w")
+        job = db.session.get(ScrapeJob, job_id)
+        assert job.attempts == attempt
+        assert job.last_error == "HTTP 503"
+        if attempt < 3:
+            assert job.status == "queued"
+            assert job.run_after >= before + timedelta(seconds=retry_delay(KIND_REFRESH, attempt))
+            job.run_after = datetime.utcnow()
+            db.session.commit()
+    assert job.status == "failed"
+    assert not run_next("w")
+    # Le manga n'a pas été touché
+    assert db.session.get(Manga, manga.id).dernier_chapitre == "377"
+    assert job_states([manga])[manga.id]["status"] == "failed"
+
+
+def test_success_applies_result_then_warms_covers(app, manga, scrape):
+    job_id = enqueue(KIND_REFRESH, URL)[0].id
+    assert run_next("w")
+    assert db.session.get(ScrapeJob, job_id).status == "done"
+    assert db.session.get(Manga, manga.id).dernier_chapitre == "378"
+    assert db.session.get(PollSchedule, manga.id) is not None
+    # Couvertures mises en cache après le commit, hors transaction
+    assert scrape["warmed"] == [(PAGE["image"], False)]
+
+
+def test_polls_skip_manual_entries_and_stay_out_of_sight(app, manga, scrape):
+    db.session.add(Manga(titre="Saisie manuelle", dernier_chapitre="3", url="#"))
+    db.session.commit()
+    assert sync_schedules() == (1, 0)
+    version = library_version()[0]
+
+    # Premières vérifications réparties sur l'intervalle : toutes dues dans 30 jours
+    now = datetime.utcnow() + timedelta(days=30)
+    assert enqueue_due_polls(now) == 1
+    job = ScrapeJob.query.one()
+    assert (job.kind, job.url) == (KIND_POLL, URL)
+    assert job_states([manga]) == {}
+    assert queue_stats(polls=False)["queued"] == 0
+    assert library_version()[0] == version
+
+    # Un rafraîchissement demandé change la version et vaut vérification
+    job.status = "done"
+    db.session.commit()
+    assert library_version()[0] == version
+    enqueue(KIND_REFRESH, URL)
+    assert library_version()[0] > version
+    PollSchedule.query.update({"next_check_at": now})
+    db.session.commit()
+    assert enqueue_due_polls(now) == 0
+    assert ScrapeJob.query.filter_by(kind=KIND_POLL, status="queued").count() == 0
@@ -0,0 +1,128 @@
+"""Import / export de la bibliothèque : aller-retour CSV et JSON Lines"""
+import io
+from datetime import datetime
+
+import pytest
+
+from chapters import record_chapter
+from conftest import make_app
+from library_io import import_library, iter_export
+from migrations import migrate
+from models import db, Chapter, Manga, ScrapeJob
+
+# Champs qui doivent survivre à un aller-retour (l'id et les dates sont ceux de la base cible)
+KEPT = ("titre", "url", "dernier_chapitre", "source", "image_couverture", "resume")
+
+
+@pytest.fixture
+def library(app):
+    mangas = [
+        Manga(titre="Eleceed", dernier_chapitre="377", source="scan-manga", resume="Un chat, des pouvoirs",
+              url="https://www.scan-manga.com/lecture-en-ligne/Eleceed-Chapitre-377-FR_519095.html",
+              image_couverture="https://example.org/eleceed.jpg"),
+        Manga(titre="One Piece", dernier_chapitre="1120", source="anime-sama",
+              url="https://anime-sama.fr/catalogue/one-piece", resume='Guillemets "doubles", virgules,\nlignes'),
+        Manga(titre="Saisie manuelle", dernier_chapitre="12.5", source="Manuel", url="#"),
+        Manga(titre="Autre saisie", dernier_chapitre="3", source="Manuel", url="#"),
+    ]
+    db.session.add_all(mangas)
+    db.session.flush()
+    for manga in mangas:
+        record_chapter(manga, manga.dernier_chapitre, now=datetime(2026, 1, 1))
+    record_chapter(mangas[0], "376", now=datetime(2025, 12, 25))
+    db.session.commit()
+    return _snapshot()
+
+
+def _snapshot():
+    return sorted(tuple(getattr(m, field) for field in KEPT) for m in Manga.query)
+
+
+def _export(fmt, history=False, batch_size=2):
+    return "".join(iter_export(fmt, history=history, batch_size=batch_size))
+
+
+def _import(text, fmt, **options):
+    return import_library(io.BytesIO(text.encode("utf-8")), fmt, **options)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl"])
+def test_export_import_round_trip(library, fmt):
+    exported = _export(fmt)
+    report = _import(exported, fmt, scrape="none", batch_size=3)
+    # Réimport dans la même base : rien de créé, rien de modifié
+    assert (report.read, report.created, report.updated, report.unchanged) == (4, 0, 0, 4)
+    assert _snapshot() == library
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl"])
+def test_import_into_empty_library(library, fmt, tmp_path):
+    exported = _export(fmt)
+    app = make_app(tmp_path / "target.db")
+    with app.app_context():
+        migrate()
+        report = _import(exported, fmt, scrape="none", batch_size=3)
+        assert (report.created, report.skipped, report.commits) == (4, 0, 2)
+        assert _snapshot() == library
+        assert Chapter.query.count() == 4
+        db.session.remove()
+
+
+def test_jsonl_history_is_restored(library, tmp_path):
+    exported = _export("jsonl", history=True)
+    app = make_app(tmp_path / "target.db")
+    with app.app_context():
+        migrate()
+        _import(exported, "jsonl", scrape="none")
+        eleceed = Manga.query.filter_by(titre="Eleceed").one()
+        chapters = Chapter.query.filter_by(manga_id=eleceed.id).order_by(Chapter.seen_at)
+        history = [(c.numero, c.seen_at) for c in chapters]
+        assert history == [("376", datetime(2025, 12, 25)), ("377", datetime(2026, 1, 1))]
+        db.session.remove()
+
+
+def test_import_advances_chapters_and_reports_errors(library):
+    text = "\n".join([
+        '{"url": "https://anime-sama.fr/catalogue/one-piece", "chapitre": "1121"}',
+        '{"titre": "Saisie manuelle", "chapitre": "12"}',
+        '{"titre": "Saisie manuelle", "chapitre": "13"}',
+        'pas du json',
+        '["liste"]',
+        '{"source": "ni titre ni url"}',
+    ])
+    report = _import(text, "jsonl", scrape="none", batch_size=2)
+    assert (report.read, report.updated, report.unchanged, report.skipped) == (6, 2, 1, 3)
+    assert [error["line"] for error in report.errors] == [4, 5, 6]
+    assert Manga.query.filter_by(titre="One Piece").one().dernier_chapitre == "1121"
+    assert Manga.query.filter_by(titre="Saisie manuelle").one().dernier_chapitre == "13"
+    assert Manga.query.count() == 4
+
+
+def test_imported_chapter_is_stored_like_record_chapter(app):
+    label = "  Chapitre " + "9" * 60 + "  "
+    _import('{"titre": "Long", "url": "#", "chapitre": "%s"}' % label, "jsonl", scrape="none")
+    manga = Manga.query.filter_by(titre="Long").one()
+    chapter = Chapter.query.filter_by(manga_id=manga.id).one()
+    assert chapter.numero == label.strip()[:50]
+    # Une nouvelle observation du même libellé ne crée pas de doublon
+    assert record_chapter(manga, label) is None
+
+
+@pytest.mark.parametrize("scrape, kinds", [
+    ("missing", [("add", "https://example.org/a/chapter-3"), ("refresh", "https://example.org/b/chapter-9")]),
+    ("all", [("add", "https://example.org/a/chapter-3"), ("refresh", "https://example.org/b/chapter-9"),
+             ("refresh", "https://example.org/c/chapter-1")]),
+    ("none", []),
+])
+def test_scrape_modes_enqueue_jobs(app, scrape, kinds):
+    text = ("url,titre,chapitre\n"
+            "https://example.org/a/chapter-3,,\n"
+            "https://example.org/b/chapter-9,B,\n"
+            "https://example.org/c/chapter-1,C,1\n"
+            "#,Manuel,4\n")
+    report = _import(text, "csv", scrape=scrape)
+    assert report.created == 4
+    assert report.jobs == len(kinds)
+    assert sorted((job.kind, job.url) for job in ScrapeJob.query) == kinds
+    # Titre déduit de l'URL en attendant le scraping
+    assert Manga.query.filter_by(url="https://example.org/b/chapter-9").one().dernier_chapitre == "9"
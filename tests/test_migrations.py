@@ -0,0 +1,79 @@
+"""Migrations sur des bases d'avant les migrations versionnées"""
+import os
+import sqlite3
+
+import pytest
+from sqlalchemy import inspect, text
+
+import migrations
+from conftest import ROOT, make_app
+from migrations import MIGRATIONS, migrate, migration_status
+from models import db, Chapter, Manga
+from pagecache import library_version
+from search import search_page
+
+# Base livrée avec le dépôt : table mangas seule (db.create_all + migratedb.py)
+ORIGINAL_DB = os.path.join(ROOT, "database", "manga.db")
+
+
+def _read_only(path):
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+
+@pytest.fixture
+def legacy(tmp_path):
+    """Copie de la base d'origine, ouverte par l'application"""
+    path = tmp_path / "manga.db"
+    with _read_only(ORIGINAL_DB) as source, sqlite3.connect(path) as target:
+        source.backup(target)
+    app = make_app(path)
+    with app.app_context():
+        yield app
+        db.session.remove()
+
+
+def test_original_database_is_migrated_in_place(legacy):
+    with _read_only(ORIGINAL_DB) as conn:
+        before = conn.execute("SELECT id, titre, dernier_chapitre, url FROM mangas ORDER BY id").fetchall()
+    assert before
+
+    assert migrate() == [step.version for step in MIGRATIONS]
+    assert all(state == "appliquée" for _, _, state, _ in migration_status())
+
+    tables = set(inspect(db.engine).get_table_names())
+    assert {"jobs", "chapters", "poll_schedules", "uploads", "library_version", "mangas_fts"} <= tables
+    assert [(m.id, m.titre, m.dernier_chapitre, m.url) for m in Manga.query.order_by(Manga.id)] == before
+    # Le chapitre courant de chaque titre ouvre son historique
+    assert {(c.manga_id, c.numero) for c in Chapter.query} == {(row[0], row[2]) for row in before}
+    # Index de recherche rempli depuis les titres existants
+    mangas, _ = search_page("one piece")
+    assert "One Piece" in [m.titre for m in mangas]
+    # Triggers de version posés
+    version = library_version()[0]
+    Manga.query.first().dernier_chapitre = "9999"
+    db.session.commit()
+    assert library_version()[0] == version + 1
+
+
+def test_second_run_applies_nothing(legacy):
+    migrate()
+    migrations._up_to_date.clear()
+    assert migrate() == []
+    with db.engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM schema_migrations")).scalar() == len(MIGRATIONS)
+
+
+def test_database_from_before_cover_uploads(tmp_path):
+    path = tmp_path / "manga.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute("""CREATE TABLE mangas (id INTEGER NOT NULL, titre VARCHAR(200) NOT NULL,
+            dernier_chapitre VARCHAR(50) NOT NULL, url VARCHAR(500) NOT NULL, resume TEXT,
+            source VARCHAR(100), date_ajout DATETIME, date_maj DATETIME, PRIMARY KEY (id))""")
+        conn.execute("INSERT INTO mangas VALUES (1, 'Berserk', '374', '#', NULL, NULL, NULL, NULL)")
+    app = make_app(path)
+    with app.app_context():
+        migrate()
+        manga = db.session.get(Manga, 1)
+        assert (manga.titre, manga.image_couverture) == ("Berserk", None)
+        assert Chapter.query.filter_by(manga_id=1).one().numero == "374"
+        db.session.remove()
@@ -0,0 +1,56 @@
+"""Validateurs HTTP des lectures : ETag et Last-Modified"""
+import time
+
+import pytest
+from sqlalchemy import update
+
+import pagecache
+from models import db, LibraryVersion, Manga
+
+
+@pytest.fixture
+def manga(app):
+    manga = Manga(titre="Berserk", dernier_chapitre="374", url="https://example.org/berserk")
+    db.session.add(manga)
+    db.session.commit()
+    return manga.id
+
+
+def _last_write(at):
+    db.session.execute(update(LibraryVersion).values(version=LibraryVersion.version + 1, updated_at=at))
+    db.session.commit()
+
+
+def test_if_modified_since_after_a_quiet_period(client, manga):
+    _last_write(time.time() - 100.3)
+    response = client.get(f"/api/mangas/{manga}")
+    assert response.status_code == 200
+    since = response.headers["Last-Modified"]
+    assert client.get(f"/api/mangas/{manga}", headers={"If-Modified-Since": since}).status_code == 304
+    _last_write(time.time())
+    assert client.get(f"/api/mangas/{manga}", headers={"If-Modified-Since": since}).status_code == 200
+
+
+def test_second_write_in_the_same_second_is_not_hidden(client, manga):
+    second = int(time.time()) + 5
+    _last_write(second + 0.3)
+    since = client.get(f"/api/mangas/{manga}").headers["Last-Modified"]
+    # Une seconde écriture, dans la même seconde que la première
+    _last_write(second + 0.8)
+    assert client.get(f"/api/mangas/{manga}", headers={"If-Modified-Since": since}).status_code == 200
+
+
+def test_validators_expire_with_the_render_cache(client, manga, monkeypatch):
+    # Rien n'est écrit quand un badge d'échec expire : seule la tranche de ttl change
+    _last_write(time.time() - 10000)
+    period = (time.time() - 5000) // 300 * 300
+    monkeypatch.setattr(pagecache, "_period_start", lambda: period)
+    first = client.get(f"/api/mangas/{manga}")
+    etag, since = first.headers["ETag"], first.headers["Last-Modified"]
+    assert client.get(f"/api/mangas/{manga}", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(f"/api/mangas/{manga}", headers={"If-Modified-Since": since}).status_code == 304
+
+    monkeypatch.setattr(pagecache, "_period_start", lambda: period + 300)
+    response = client.get(f"/api/mangas/{manga}", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+    assert client.get(f"/api/mangas/{manga}", headers={"If-Modified-Since": since}).status_code == 200
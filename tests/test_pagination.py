@@ -0,0 +1,92 @@
+"""Curseurs : pagination keyset de la bibliothèque, recherche et API"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, Manga
+from pagination import encode_token, keyset_page
+from search import search_page
+
+BASE = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def library(app):
+    """50 titres : dates en partie identiques (départage par id) et 5 sans date_maj"""
+    for i in range(1, 51):
+        db.session.add(Manga(
+            id=i, titre=f"Héros {i}" if i % 2 else f"Autre {i}", dernier_chapitre="1",
+            url=f"https://example.org/{i}", resume="Un résumé", source="example.org",
+            date_ajout=BASE, date_maj=None if i > 45 else BASE + timedelta(hours=i // 3),
+        ))
+    db.session.commit()
+    # Ordre attendu : date_maj DESC, id DESC, les titres sans date à la fin
+    return [m.id for m in sorted(Manga.query.all(),
+                                 key=lambda m: (m.date_maj is not None, m.date_maj or BASE, m.id),
+                                 reverse=True)]
+
+
+def _walk(fetch, limit):
+    ids, cursor = [], None
+    while True:
+        items, cursor = fetch(cursor, limit)
+        assert len(items) <= limit
+        ids.extend(items)
+        if cursor is None:
+            return ids
+
+
+@pytest.mark.parametrize("limit", [1, 7, 24, 50, 96])
+def test_keyset_pages_cover_the_library_in_order(library, limit):
+    def fetch(cursor, limit):
+        mangas, next_cursor = keyset_page(Manga.query, cursor, limit)
+        return [m.id for m in mangas], next_cursor
+    assert _walk(fetch, limit) == library
+
+
+@pytest.mark.parametrize("cursor", ["???", encode_token(["pas une date", 3]), encode_token([None, "3"]),
+                                    encode_token([1, 2, 3]), "eyJhIjoxfQ"])
+def test_invalid_cursor_raises(library, cursor):
+    with pytest.raises(ValueError):
+        keyset_page(Manga.query, cursor)
+
+
+@pytest.mark.parametrize("limit", [1, 4, 10])
+def test_search_pages_have_no_gaps_or_duplicates(library, limit):
+    def fetch(cursor, limit):
+        mangas, next_cursor = search_page("heros", cursor, limit)
+        return [m.id for m in mangas], next_cursor
+    ids = _walk(fetch, limit)
+    assert sorted(ids) == list(range(1, 51, 2))
+
+
+def test_search_prefix_and_invalid_cursor(library):
+    mangas, _ = search_page("autr", limit=100)
+    assert {m.id for m in mangas} == set(range(2, 51, 2))
+    assert search_page("!!!") == ([], None)
+    with pytest.raises(ValueError):
+        search_page("heros", encode_token(["x", 1]))
+
+
+def test_api_follows_next_cursor(client, library):
+    ids, cursor = [], None
+    while True:
+        response = client.get("/api/mangas", query_string={"limit": 9, "fields": "titre", **(
+            {"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        body = response.get_json()
+        assert all(set(item) == {"id", "titre"} for item in body["items"])
+        ids.extend(item["id"] for item in body["items"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert ids == library
+
+
+def test_api_search_and_errors(client, library):
+    body = client.get("/api/mangas", query_string={"q": "héros", "limit": 100}).get_json()
+    assert sorted(item["id"] for item in body["items"]) == list(range(1, 51, 2))
+    response = client.get("/api/mangas", query_string={"cursor": "???"})
+    assert response.status_code == 400
+    assert "Curseur invalide" in response.get_json()["error"]
+    assert client.get("/api/mangas", query_string={"fields": "nope"}).status_code == 400
@@ -0,0 +1,54 @@
+"""Extraction sur le corpus de benchmarks/fixtures, comparée à expected.json"""
+import json
+import os
+
+import pytest
+
+from conftest import FIXTURES_DIR
+from fixture_server import load_index, local_url
+from scraper.parsing import make_soup
+from scraper.scraper import parse_chapter_page, parse_index_page, parse_page, parse_soup, strainer_for
+
+INDEX = load_index()
+with open(os.path.join(FIXTURES_DIR, "expected.json"), encoding="utf-8") as f:
+    EXPECTED = json.load(f)
+
+
+def _html(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("name", sorted(INDEX))
+def test_parse_matches_expected(name):
+    # expected.json est produit par bench_scrape.py, qui sert le corpus en http
+    assert parse_page(_html(name), local_url(INDEX[name])) == EXPECTED[name]
+
+
+@pytest.mark.parametrize("name", sorted(INDEX))
+def test_restricted_parsing_extracts_the_same(name):
+    url = local_url(INDEX[name])
+    html = _html(name)
+    assert parse_soup(make_soup(html, strainer_for(url)), url) == parse_soup(make_soup(html), url)
+
+
+@pytest.mark.parametrize("name, series_url", [
+    ("scan_manga_chapter.html", "https://www.scan-manga.com/400000/Eleceed.html"),
+    ("scan_manga_gallery.html", "https://www.scan-manga.com/400000/Blue-Lock.html"),
+    ("generic_gallery.html", "https://galerie.example.org/series/berserk/"),
+    ("anime_sama_gallery.html", None),
+])
+def test_chapter_page_finds_its_series(name, series_url):
+    _, found = parse_chapter_page(_html(name), INDEX[name])
+    assert found == series_url
+
+
+@pytest.mark.parametrize("name, chapitre, url", [
+    ("scan_manga_series.html", "380",
+     "https://www.scan-manga.com/lecture-en-ligne/Eleceed-Chapitre-380-FR_519116.html"),
+    ("generic_series.html", "376", "https://galerie.example.org/series/berserk/chapter-376/"),
+])
+def test_series_page_gives_latest_chapter(name, chapitre, url):
+    result = parse_index_page(_html(name), INDEX[name])
+    assert result["chapitre"] == chapitre
+    assert result["url"] == url
@@ -0,0 +1,45 @@
+"""Limiteur de débit : Retry-After respecté, mais jamais une pause sans fin"""
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+import requests
+
+from scraper.ratelimit import MAX_RETRY_AFTER, RateLimited, RateLimiter, parse_retry_after
+
+URL = "https://www.scan-manga.com/lecture-en-ligne/Eleceed-Chapitre-377-FR_519095.html"
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("86400") == 86400
+    in_two_days = datetime.now(timezone.utc) + timedelta(days=2)
+    assert parse_retry_after(format_datetime(in_two_days, usegmt=True)) == pytest.approx(2 * 86400, abs=5)
+    assert parse_retry_after("pas une date") is None
+    assert parse_retry_after(None) is None
+
+
+@pytest.mark.parametrize("retry_after", ["86400", "Wed, 01 Jan 2100 00:00:00 GMT"])
+def test_long_retry_after_fails_fast(retry_after):
+    assert parse_retry_after(retry_after) > MAX_RETRY_AFTER
+    limiter = RateLimiter(default_rate=1000, burst=10)
+    limiter.observe(URL, 429, {"Retry-After": retry_after})
+    started = time.monotonic()
+    with pytest.raises(RateLimited) as caught:
+        limiter.acquire(URL)
+    assert time.monotonic() - started < 1
+    # Traité comme une erreur réseau : la file de jobs réessaie plus tard
+    assert isinstance(caught.value, requests.RequestException)
+    assert limiter.stats()["www.scan-manga.com"]["refused"] == 1
+    # Les autres sites ne sont pas concernés
+    limiter.acquire("https://anime-sama.fr/catalogue/one-piece")
+
+
+def test_short_retry_after_is_waited():
+    limiter = RateLimiter(default_rate=1000, burst=10)
+    limiter.observe(URL, 503, {"Retry-After": "0"})
+    limiter.acquire(URL)
+    limiter.bucket(URL).penalize(0.2)
+    started = time.monotonic()
+    limiter.acquire(URL)
+    assert time.monotonic() - started >= 0.15
@@ -0,0 +1,40 @@
+"""Rafraîchissement groupé de la bibliothèque"""
+import pytest
+
+import refresher
+from models import db, Manga
+from refresher import BulkRefreshJob
+
+PAGES = {
+    "https://www.scan-manga.com/lecture-en-ligne/Eleceed-Chapitre-377-FR_519095.html":
+        {"titre": "Eleceed", "chapitre": "378", "source": "scan-manga"},
+    "https://anime-sama.fr/catalogue/one-piece": {"titre": "One Piece", "chapitre": "1121", "source": "anime-sama"},
+}
+
+
+@pytest.fixture
+def scraped(monkeypatch):
+    """URLs scrapées, sans réseau ; une URL inconnue échoue comme requests"""
+    urls = []
+
+    def scrape_with_cover(url):
+        urls.append(url)
+        return PAGES[url]
+
+    monkeypatch.setattr(refresher, "scrape_with_cover", scrape_with_cover)
+    monkeypatch.setattr(refresher, "enforce_cover_quota", lambda: None)
+    return urls
+
+
+def test_manual_entries_are_not_refreshed(app, scraped):
+    db.session.add_all([Manga(titre=page["titre"], dernier_chapitre="1", url=url) for url, page in PAGES.items()])
+    db.session.add(Manga(titre="Saisie manuelle", dernier_chapitre="4", url="#"))
+    db.session.commit()
+
+    job = BulkRefreshJob(app, batch_size=1)
+    job.run()
+    state = job.snapshot()
+    assert (state["status"], state["total"], state["done"], state["updated"], state["errors"]) == \
+        ("done", 2, 2, 2, 0)
+    assert sorted(scraped) == sorted(PAGES)
+    assert Manga.query.filter_by(url="#").one().dernier_chapitre == "4"
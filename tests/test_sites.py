@@ -0,0 +1,48 @@
+"""Choix de l'adaptateur de site d'après l'hôte de l'URL."""
+import os
+import sqlite3
+
+import pytest
+
+from conftest import ROOT
+from scraper.sites import adapter_for
+
+# Une URL par hôte présent dans la bibliothèque
+LIBRARY_URLS = {
+    "https://www.scan-manga.com/lecture-en-ligne/Eleceed-Chapitre-377-FR_519095.html": "scan-manga",
+    "https://anime-sama.fr/catalogue/one-piece": "anime-sama",
+    "https://anime-sama.org/catalogue/ordeal": "anime-sama",
+    "https://anime-sama.eu/catalogue/villain-to-kill": "anime-sama",
+    "https://anime-sama.si/catalogue/kagura-bachi": "anime-sama",
+}
+
+
+@pytest.mark.parametrize("url, name", sorted(LIBRARY_URLS.items()))
+def test_library_hosts(url, name):
+    assert adapter_for(url).name == name
+
+
+@pytest.mark.parametrize("url, name", [
+    ("https://www.anime-sama.tv/catalogue/x", "anime-sama"),
+    ("https://scan-manga.com/lecture-en-ligne/x.html", "scan-manga"),
+    ("https://anime-sama-fan.com/catalogue/x", "generic"),
+    ("https://scan-manga.com.example/x", "generic"),
+    ("https://galerie.example.org/series/berserk/", "generic"),
+])
+def test_other_hosts(url, name):
+    assert adapter_for(url).name == name
+
+
+def test_tracked_library_has_no_generic_known_site():
+    """Chaque titre de la base livrée va vers l'adaptateur de sa source"""
+    path = os.path.join(ROOT, "database", "manga.db")
+    if not os.path.exists(path):
+        pytest.skip("pas de base de bibliothèque")
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute("SELECT url, source FROM mangas WHERE url LIKE 'http%'").fetchall()
+    finally:
+        conn.close()
+    for url, source in rows:
+        if source in ("scan-manga", "anime-sama"):
+            assert adapter_for(url).name == source, url
@@ -0,0 +1,116 @@
+"""Uploads adressés par contenu : déduplication, compteurs de références et GC"""
+import io
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+from werkzeug.datastructures import FileStorage
+
+from models import db, Manga, Upload
+from uploads import ORPHAN_GRACE, collect_orphans, reconcile_references, save_upload, upload_name
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+LATER = timedelta(hours=2)
+
+
+@pytest.fixture
+def folder(app, tmp_path):
+    folder = tmp_path / "uploads"
+    folder.mkdir()
+    app.config["UPLOAD_FOLDER"] = str(folder)
+    return folder
+
+
+def _upload(content=PNG, filename="cover.jpeg"):
+    return save_upload(FileStorage(stream=io.BytesIO(content), filename=filename))
+
+
+def _manga(titre, image):
+    manga = Manga(titre=titre, dernier_chapitre="1", url="#", image_couverture=image)
+    db.session.add(manga)
+    db.session.commit()
+    return manga
+
+
+def _upload_row(url):
+    db.session.expire_all()
+    return db.session.get(Upload, upload_name(url))
+
+
+def test_same_content_is_stored_once(folder):
+    first = _upload(filename="a.jpeg")
+    second = _upload(filename="b.png")
+    other = _upload(PNG + b"\x01")
+    # Extension lue dans le contenu, pas dans le nom du fichier
+    assert first == second and first.endswith(".png")
+    assert other != first
+    _manga("A", first)
+    _manga("B", second)
+    assert sorted(os.listdir(folder)) == sorted([upload_name(first), upload_name(other)])
+    assert _upload_row(first).refcount == 2
+    assert _upload_row(other).refcount == 0
+
+
+def test_unreferenced_file_is_collected_after_grace(folder):
+    url = _upload()
+    a, b = _manga("A", url), _manga("B", url)
+    a.image_couverture = None
+    db.session.commit()
+    assert _upload_row(url).refcount == 1
+    db.session.delete(b)
+    db.session.commit()
+    row = _upload_row(url)
+    assert (row.refcount, row.orphaned_at is not None) == (0, True)
+
+    assert collect_orphans() == 0
+    assert (folder / upload_name(url)).exists()
+    assert collect_orphans(now=datetime.utcnow() + LATER) == 1
+    assert not (folder / upload_name(url)).exists()
+    assert _upload_row(url) is None
+
+
+def test_reused_orphan_is_kept(folder):
+    url = _upload()
+    manga = _manga("A", url)
+    manga.image_couverture = None
+    db.session.commit()
+    manga.image_couverture = url
+    db.session.commit()
+    row = _upload_row(url)
+    assert (row.refcount, row.orphaned_at) == (1, None)
+    assert collect_orphans(now=datetime.utcnow() + LATER) == 0
+    assert (folder / upload_name(url)).exists()
+
+
+def test_wrong_counter_never_deletes_a_file_in_use(folder):
+    url = _upload()
+    _manga("A", url)
+    db.session.execute(update(Upload).values(refcount=0, orphaned_at=datetime.utcnow() - LATER))
+    db.session.commit()
+    assert collect_orphans() == 0
+    assert (folder / upload_name(url)).exists()
+    assert _upload_row(url).refcount == 1
+
+
+def test_reconcile_recounts_references(folder):
+    url = _upload()
+    _manga("A", url)
+    _manga("B", url)
+    db.session.execute(update(Upload).values(refcount=7))
+    db.session.commit()
+    assert reconcile_references() == 1
+    assert _upload_row(url).refcount == 2
+    assert reconcile_references() == 0
+
+
+def test_abandoned_partial_files_are_swept(folder):
+    stale = folder / "tmp123.part"
+    fresh = folder / "tmp456.part"
+    stale.write_bytes(b"x")
+    fresh.write_bytes(b"x")
+    old = time.time() - ORPHAN_GRACE.total_seconds() - 60
+    os.utime(stale, (old, old))
+    assert collect_orphans() == 1
+    assert not stale.exists() and fresh.exists()
@@ -0,0 +1,282 @@
+"""Stockage des images uploadées, adressé par contenu et dédupliqué.
+
+Un fichier uploadé est écrit sous ``<sha256>.<ext>`` : la même image
+envoyée deux fois n'est stockée qu'une fois. Le fichier est lu par blocs,
+haché et écrit sur le disque au fil de l'eau, sans être chargé en mémoire.
+
+Chaque fichier a une ligne ``uploads`` avec le nombre de mangas qui le
+référencent. Le compteur est tenu à jour par un hook ``before_flush`` sur
+les changements de ``Manga.image_couverture`` (ajout, édition, suppression,
+import...). Un fichier qui n'est plus référencé n'est pas supprimé tout de
+suite : le worker le supprime (``collect_orphans``) après ``ORPHAN_GRACE``,
+ce qui laisse le temps à un formulaire en cours de le réutiliser.
+"""
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import case, event, func, inspect
+
+from covers import sniff_format
+from models import db, Manga, Upload
+
+logger = logging.getLogger(__name__)
+
+URL_PREFIX = "/static/uploads/"
+CHUNK_SIZE = 64 * 1024
+ORPHAN_GRACE = timedelta(hours=1)
+UPLOAD_NAME_RE = re.compile(r"^[0-9a-f]{64}\.[a-z0-9]+$")
+# Extensions normalisées : un même contenu a toujours le même nom
+_EXTENSION_ALIASES = {"jpeg": "jpg"}
+
+_stats = {"stored": 0, "deduplicated": 0, "collected": 0}
+
+
+def upload_name(url):
+    """Nom du fichier désigné par une URL d'upload, ou None pour une autre URL"""
+    if not url or not url.startswith(URL_PREFIX):
+        return None
+    name = url[len(URL_PREFIX):]
+    return name if name and "/" not in name else None
+
+
+def upload_url(name):
+    return URL_PREFIX + name
+
+
+def save_upload(file, folder=None):
+    """Enregistre un fichier uploadé (FileStorage) et renvoie son URL.
+
+    L'extension vient du contenu quand il est reconnu, sinon du nom de
+    fichier. La ligne ``uploads`` est ajoutée à la session (sans commit) ;
+    le compteur de références suivra l'affectation à un manga.
+    """
+    folder = folder or current_app.config["UPLOAD_FOLDER"]
+    digest = hashlib.sha256()
+    size = 0
+    ext = None
+    fd, tmp = tempfile.mkstemp(dir=folder, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = file.stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if ext is None:
+                    ext = sniff_format(chunk)
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        if ext is None:
+            ext = file.filename.rsplit(".", 1)[-1].lower() if "." in (file.filename or "") else "bin"
+        ext = _EXTENSION_ALIASES.get(ext, ext)
+        name = f"{digest.hexdigest()}.{ext}"
+        path = os.path.join(folder, name)
+        if os.path.exists(path):
+            os.remove(tmp)
+            _stats["deduplicated"] += 1
+            logger.info("Upload déjà présent, réutilisé : %s", name)
+        else:
+            os.replace(tmp, path)
+            _stats["stored"] += 1
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+    with db.session.no_autoflush:
+        if _find_upload(db.session, name) is None:
+            db.session.add(Upload(name=name, size=size, refcount=0, orphaned_at=datetime.utcnow()))
+    return upload_url(name)
+
+
+# --- Compteurs de références ---
+
+def _find_upload(session, name):
+    """Ligne ``uploads`` en base ou encore en attente dans la session"""
+    for obj in session.new:
+        if isinstance(obj, Upload) and obj.name == name:
+            return obj
+    return session.get(Upload, name)
+
+
+def _adjust(session, url, delta):
+    name = upload_name(url)
+    if name is None:
+        return
+    upload = _find_upload(session, name)
+    if upload is None:
+        # Fichier antérieur au stockage par contenu, ou ligne perdue
+        upload = Upload(name=name, size=0, refcount=0)
+        session.add(upload)
+    upload.refcount = max(0, (upload.refcount or 0) + delta)
+    upload.orphaned_at = datetime.utcnow() if upload.refcount == 0 else None
+
+
+@event.listens_for(Manga.image_couverture, "set", active_history=True)
+def _load_previous_cover(target, value, oldvalue, initiator):
+    """Charge l'ancienne image avant une affectation, même sur un manga expiré
+    par un commit : sans elle, l'historique ne dirait pas quel fichier perd une
+    référence"""
+
+
+@event.listens_for(db.session, "before_flush")
+def _track_references(session, flush_context, instances):
+    changes = []
+    for obj in session.new:
+        if isinstance(obj, Manga):
+            changes.append((obj.image_couverture, 1))
+    for obj in session.deleted:
+        if isinstance(obj, Manga):
+            # load_history : relit l'image d'un manga supprimé sans avoir été chargé
+            history = inspect(obj).attrs.image_couverture.load_history()
+            for url in (history.deleted or history.unchanged or ()):
+                changes.append((url, -1))
+    for obj in session.dirty:
+        if isinstance(obj, Manga) and obj not in session.deleted:
+            history = inspect(obj).attrs.image_couverture.history
+            if history.has_changes():
+                changes.extend((url, -1) for url in history.deleted)
+                changes.extend((url, 1) for url in history.added)
+    if not changes:
+        return
+    with session.no_autoflush:
+        for url, delta in changes:
+            _adjust(session, url, delta)
+
+
+def reconcile_references():
+    """Recalcule tous les compteurs depuis la table mangas ; renvoie le nombre de corrections"""
+    counts = dict(
+        db.session.query(Manga.image_couverture, func.count())
+        .filter(Manga.image_couverture.startswith(URL_PREFIX))
+        .group_by(Manga.image_couverture)
+        .all()
+    )
+    expected = {upload_name(url): count for url, count in counts.items() if upload_name(url)}
+    fixed = 0
+    now = datetime.utcnow()
+    for upload in Upload.query:
+        count = expected.pop(upload.name, 0)
+        if upload.refcount != count:
+            upload.refcount = count
+            fixed += 1
+        if count == 0 and upload.orphaned_at is None:
+            upload.orphaned_at = now
+        elif count:
+            upload.orphaned_at = None
+    for name, count in expected.items():
+        db.session.add(Upload(name=name, size=0, refcount=count))
+        fixed += 1
+    db.session.commit()
+    return fixed
+
+
+# --- Ramasse-miettes ---
+
+def collect_orphans(folder=None, grace=ORPHAN_GRACE, now=None):
+    """Supprime les fichiers sans référence depuis ``grace`` ; renvoie leur nombre"""
+    folder = folder or current_app.config["UPLOAD_FOLDER"]
+    now = now or datetime.utcnow()
+    orphans = (Upload.query
+               .filter(Upload.refcount == 0, Upload.orphaned_at <= now - grace)
+               .all())
+    collected = 0
+    for upload in orphans:
+        # Filet de sécurité : jamais supprimer un fichier encore affiché
+        references = db.session.query(Manga.id).filter_by(image_couverture=upload_url(upload.name)).count()
+        if references:
+            upload.refcount = references
+            upload.orphaned_at = None
+            logger.warning("Compteur de références faux pour %s, corrigé", upload.name)
+            continue
+        try:
+            os.remove(os.path.join(folder, upload.name))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Suppression de l'upload %s impossible : %s", upload.name, e)
+            continue
+        db.session.delete(upload)
+        collected += 1
+    db.session.commit()
+    collected += _sweep_untracked(folder, grace)
+    if collected:
+        _stats["collected"] += collected
+        logger.info("%s upload(s) orphelin(s) supprimé(s)", collected)
+    return collected
+
+
+def _sweep_untracked(folder, grace):
+    """Fichiers écrits puis jamais enregistrés (requête annulée après l'upload)"""
+    cutoff = time.time() - grace.total_seconds()
+    tracked = {name for (name,) in db.session.query(Upload.name)}
+    removed = 0
+    for entry in os.scandir(folder):
+        if not entry.is_file() or entry.stat().st_mtime >= cutoff:
+            continue
+        if entry.name.endswith(".part") or (UPLOAD_NAME_RE.match(entry.name) and entry.name not in tracked
+                                            and not db.session.query(Manga.id)
+                                            .filter_by(image_couverture=upload_url(entry.name)).first()):
+            os.remove(entry.path)
+            removed += 1
+    return removed
+
+
+def migrate_legacy_uploads(folder=None):
+    """Renomme les anciens uploads ``{date}_{nom}`` sous l'empreinte de leur contenu.
+
+    Les mangas sont mis à jour, les doublons fusionnés ; les fichiers que
+    plus aucun manga n'utilise seront supprimés par le GC. Renvoie
+    ``(fichiers renommés, doublons fusionnés)``.
+    """
+    folder = folder or current_app.config["UPLOAD_FOLDER"]
+    renamed = merged = 0
+    for entry in sorted(os.listdir(folder)):
+        path = os.path.join(folder, entry)
+        if UPLOAD_NAME_RE.match(entry) or entry.endswith(".part") or not os.path.isfile(path):
+            continue
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            head = f.read(CHUNK_SIZE)
+            ext = sniff_format(head) or entry.rsplit(".", 1)[-1].lower()
+            chunk = head
+            while chunk:
+                digest.update(chunk)
+                chunk = f.read(CHUNK_SIZE)
+        ext = _EXTENSION_ALIASES.get(ext, ext)
+        name = f"{digest.hexdigest()}.{ext}"
+        target = os.path.join(folder, name)
+        if os.path.exists(target):
+            os.remove(path)
+            merged += 1
+        else:
+            os.replace(path, target)
+            renamed += 1
+        if db.session.get(Upload, name) is None:
+            db.session.add(Upload(name=name, size=os.path.getsize(target), refcount=0,
+                                  orphaned_at=datetime.utcnow()))
+        for manga in Manga.query.filter_by(image_couverture=upload_url(entry)):
+            manga.image_couverture = upload_url(name)
+        db.session.flush()
+        # Ligne créée pour l'ancien nom par le suivi des références
+        old = db.session.get(Upload, entry)
+        if old is not None:
+            db.session.delete(old)
+        db.session.commit()
+    reconcile_references()
+    return renamed, merged
+
+
+def upload_stats():
+    files, size, orphans = db.session.query(
+        func.count(Upload.name),
+        func.coalesce(func.sum(Upload.size), 0),
+        func.coalesce(func.sum(case((Upload.refcount == 0, 1), else_=0)), 0),
+    ).one()
+    return dict(_stats, files=files, bytes=int(size), orphans=int(orphans))
@@ -0,0 +1,51 @@
+"""Worker de la file de scraping (voir jobs.py).
+
+Usage : python worker.py [--threads 2] [--poll 1.0] [--once] [--no-scheduler]
+
+Le worker programme aussi les vérifications automatiques de nouveaux
+chapitres (scheduler.py), sauf avec --no-scheduler, et supprime les
+uploads que plus aucun manga n'utilise (uploads.py).
+
+Plusieurs workers (processus ou machines partageant la base) peuvent
+tourner en même temps. Arrêt propre sur Ctrl+C / SIGTERM : les jobs en
+cours se terminent ; un worker tué net laisse des jobs que les autres
+reprennent à l'expiration de leur bail.
+"""
+import argparse
+import logging
+import signal
+
+from app import app
+from jobs import DEFAULT_POLL_INTERVAL, DEFAULT_WORKER_THREADS, Worker
+from migrations import migrate
+
+logger = logging.getLogger("worker")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=DEFAULT_WORKER_THREADS, help="jobs exécutés en parallèle")
+    parser.add_argument("--poll", type=float, default=DEFAULT_POLL_INTERVAL, help="attente (s) quand la file est vide")
+    parser.add_argument("--once", action="store_true", help="vider la file puis s'arrêter")
+    parser.add_argument("--no-scheduler", action="store_true", help="ne pas programmer les vérifications périodiques")
+    args = parser.parse_args()
+
+    with app.app_context():
+        migrate()
+
+    worker = Worker(app, threads=args.threads, poll_interval=args.poll, scheduler=not args.no_scheduler)
+
+    def shutdown(signum, frame):
+        logger.info("Arrêt demandé, fin des jobs en cours…")
+        worker.stop()
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    logger.info("Worker %s démarré (%s threads)", worker.name, worker.threads)
+    worker.start(once=args.once, daemon=False)
+    worker.join()
+
+
+if __name__ == "__main__":
+    main()